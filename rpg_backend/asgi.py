@@ -13,4 +13,14 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'rpg_backend.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+from rpg_backend.rpg.neo4j_connection import lifespan  # noqa: E402  (needs settings loaded)
+
+
+async def application(scope, receive, send):
+    # Django does not speak the lifespan protocol; it is used to close
+    # the shared async Neo4j driver when the server shuts down
+    if scope["type"] == "lifespan":
+        return await lifespan(scope, receive, send)
+    return await django_application(scope, receive, send)
@@ -0,0 +1,76 @@
+import threading
+import time
+
+
+class IdBlock:
+    """
+    Ids reserved ahead of time for one sequence, handed out from memory.
+    `epoch` is the counter generation the ids were reserved in; a block
+    from an older generation is treated as used up.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.next_id = 0
+        self.last_id = -1
+        self.epoch = None
+
+    def take(self, epoch=None):
+        with self.lock:
+            if self.next_id > self.last_id or self.epoch != epoch:
+                return None
+            new_id = self.next_id
+            self.next_id += 1
+            return new_id
+
+    def refill(self, last_id, size, epoch=None):
+        with self.lock:
+            self.next_id = last_id - size + 1
+            self.last_id = last_id
+            self.epoch = epoch
+
+
+class IdBlocks:
+    """
+    One IdBlock per sequence name, plus the last epoch read for each
+    sequence and when it was read (see epoch_due)
+    """
+
+    def __init__(self):
+        self._blocks = {}
+        self._epochs = {}
+        self._lock = threading.Lock()
+
+    def get(self, name):
+        with self._lock:
+            return self._blocks.setdefault(name, IdBlock())
+
+    def clear(self):
+        with self._lock:
+            self._blocks.clear()
+            self._epochs.clear()
+
+    def epoch_due(self, name, max_age):
+        """Whether the epoch of `name` was never read or was read `max_age` seconds ago or more"""
+        with self._lock:
+            entry = self._epochs.get(name)
+        return entry is None or time.monotonic() - entry[1] >= max_age
+
+    def set_epoch(self, name, epoch):
+        with self._lock:
+            self._epochs[name] = (epoch, time.monotonic())
+
+    def epoch(self, name):
+        """The epoch last read for `name`; blocks from any other epoch are not used"""
+        with self._lock:
+            return self._epochs.get(name, (None, None))[0]
+
+    def next_id(self, name, size, reserve):
+        """Next id for `name`, calling reserve(name, size) -> last id when the block runs out"""
+        block = self.get(name)
+        epoch = self.epoch(name)
+        new_id = block.take(epoch)
+        while new_id is None:
+            block.refill(reserve(name, size), size, epoch)
+            new_id = block.take(epoch)
+        return new_id
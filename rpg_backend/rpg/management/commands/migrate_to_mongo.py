@@ -1,9 +1,17 @@
 from django.core.management.base import BaseCommand
-from pymongo import MongoClient
 from django.apps import apps
 from django.db.models.fields.related import ManyToManyField
 from django.contrib.auth.models import User
 
+from rpg_backend.rpg.mongo_connection import get_db
+from rpg_backend.rpg.mongo_indexes import MONGO_COLLECTIONS
+from rpg_backend.rpg.mongo_sequences import sync_counters
+from rpg_backend.rpg.mongo_search import SEARCH_FIELDS, search_keys
+from rpg_backend.rpg.mongo_read_model import enabled as read_model_enabled, build_read_models
+from rpg_backend.rpg.management.commands.mongo_indexes import (
+    bootstrap_indexes, report_index_sizes, check_filter_queries,
+)
+
 
 class Command(BaseCommand):
     help = "Migrates all SQL data (Django ORM models) into MongoDB"
@@ -13,8 +21,7 @@ class Command(BaseCommand):
         # -------------------------------------
         # CONNECT TO MONGODB
         # -------------------------------------
-        client = MongoClient("mongodb://localhost:27017/")
-        db = client["rpg_mongo"]  
+        db = get_db()
 
         self.stdout.write(self.style.NOTICE("Connected to MongoDB"))
 
@@ -98,6 +105,10 @@ class Command(BaseCommand):
                         # Regular field, store as-is
                         doc[field.name] = value
 
+                # autocomplete keys for searchable collections
+                if model_name in SEARCH_FIELDS:
+                    doc.update(search_keys(model_name, doc))
+
                 documents.append(doc)
 
             # -------------------------------------
@@ -134,9 +145,33 @@ class Command(BaseCommand):
                 "date_joined": u.date_joined.isoformat(),
                 "last_login": u.last_login.isoformat() if u.last_login else None
             })
+            docs[-1].update(search_keys("user", docs[-1]))
         if docs:
             user_collection.insert_many(docs)
 
         self.stdout.write(self.style.SUCCESS(f" {len(docs)} rows migrated from user"))
 
+        # -------------------------------------
+        # CHARACTER READ MODEL
+        # -------------------------------------
+        # Needs every guild / skill / quest in place, so it runs last
+        if read_model_enabled():
+            built = build_read_models(db)
+            self.stdout.write(self.style.SUCCESS(f" {built} character read models built"))
+
+        # -------------------------------------
+        # ID COUNTERS
+        # -------------------------------------
+        # Documents keep their SQL ids, so point every counter past them
+        sync_counters(db, MONGO_COLLECTIONS)
+        self.stdout.write(self.style.SUCCESS(" id counters synced"))
+
+        # -------------------------------------
+        # INDEXES
+        # -------------------------------------
+        # delete_many() keeps existing indexes, so this only adds missing ones
+        bootstrap_indexes(self, db)
+        report_index_sizes(self, db)
+        check_filter_queries(self, db)
+
         self.stdout.write(self.style.SUCCESS("\n Migration completed successfully!"))
\ No newline at end of file
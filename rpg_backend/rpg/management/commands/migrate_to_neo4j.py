@@ -1,39 +1,125 @@
-from django.core.management.base import BaseCommand
-from neo4j import GraphDatabase
+from django.core.management.base import BaseCommand, CommandError
 from django.apps import apps
 from django.db.models.fields.related import ManyToManyField
 from django.contrib.auth.models import User
-import os
+import time
+
+from rpg_backend.rpg.neo4j_connection import get_session, close_driver
+from rpg_backend.rpg.neo4j_schema import GRAPH_LABELS
+from rpg_backend.rpg.neo4j_sequences import sync_sequences
+from rpg_backend.rpg.management.commands.neo4j_schema import bootstrap_schema
+
+
+DEFAULT_BATCH_SIZE = 1000
+
+USER_COLUMNS = [
+    "id",
+    "username",
+    "email",
+    "first_name",
+    "last_name",
+    "is_staff",
+    "is_superuser",
+    "date_joined",
+    "last_login",
+]
+
+
+def to_node_props(row):
+    """Turn a values() row into node properties (id -> sql_id, dates -> ISO strings)"""
+    props = {}
+    for key, value in row.items():
+        if key == "id":
+            key = "sql_id"
+        if hasattr(value, "isoformat"):
+            value = value.isoformat()
+        props[key] = value
+    return props
+
+
+def create_nodes(tx, label, rows):
+    """Write one batch of nodes with a single UNWIND statement"""
+    tx.run(f"UNWIND $rows AS row CREATE (n:{label}) SET n = row", rows=rows).consume()
+
+
+def create_relationships(tx, source, rel_type, target, pairs):
+    """Link one batch of [source sql_id, target sql_id] pairs, return how many were linked"""
+    cypher = f"""
+    UNWIND $pairs AS pair
+    MATCH (a:{source} {{sql_id: pair[0]}})
+    MATCH (b:{target} {{sql_id: pair[1]}})
+    MERGE (a)-[:{rel_type}]->(b)
+    RETURN count(*) AS linked
+    """
+    return tx.run(cypher, pairs=pairs).single()["linked"]
+
+
+def relationship_sources(models):
+    """
+    Yield (source label, rel type, target label, pairs queryset) for every
+    FK and M2M field. FK ids come from values_list on the model itself and
+    M2M pairs straight from the through table, so no row is loaded twice.
+    """
+    for model in models:
+        label = model.__name__
+
+        for field in model._meta.get_fields():
+            if field.auto_created or not field.is_relation:
+                continue
+
+            target = field.related_model.__name__
+            rel_type = field.name.upper()
+
+            if isinstance(field, ManyToManyField):
+                through = field.remote_field.through
+                source_col = through._meta.get_field(field.m2m_field_name()).attname
+                target_col = through._meta.get_field(field.m2m_reverse_field_name()).attname
+                pairs = through.objects.order_by("pk").values_list(source_col, target_col)
+            else:
+                pairs = (
+                    model.objects.filter(**{f"{field.attname}__isnull": False})
+                    .order_by("pk")
+                    .values_list("pk", field.attname)
+                )
+
+            yield label, rel_type, target, pairs
 
 
 class Command(BaseCommand):
     help = "Migrates SQL data (Django ORM models) into a Neo4j graph database"
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help=f"Rows per UNWIND write transaction (default {DEFAULT_BATCH_SIZE})",
+        )
+
     def handle(self, *args, **kwargs):
-        # Connect to Neo4j
-        uri = os.environ.get("NEO4J_URI", "bolt://localhost:7687")
-        user = os.environ.get("NEO4J_USER", "neo4j")
-        password = os.environ.get("NEO4J_PASSWORD", "password")
-        
-        driver = GraphDatabase.driver(uri, auth=(user, password))
-        
+        batch_size = kwargs["batch_size"]
+
+        # Connect to Neo4j through the shared driver
         try:
-            with driver.session() as session:
+            with get_session() as session:
                 self.stdout.write(self.style.NOTICE("Connected to Neo4j"))
                 
-                # Clear existing data
-                session.run("MATCH (n) DETACH DELETE n")
+                # Clear existing data; the id counters stay, so sync_sequences
+                # moves their epoch on and workers drop the blocks they hold
+                session.run("MATCH (n) WHERE NOT n:Sequence DETACH DELETE n")
+
+                # Constraints first, so every sql_id lookup below is an index seek
+                bootstrap_schema(self, session)
                 
                 # Get all RPG models
                 rpg_models = apps.get_app_config("rpg").get_models()
                 
-                # Create nodes for each model
+                # Create nodes for each model, streamed from the ORM in batches
                 for model in rpg_models:
                     label = model.__name__
                     
                     try:
-                        rows = model.objects.all()
-                        total = rows.count()
+                        total = model.objects.count()
                     except Exception as e:
                         self.stdout.write(f"Skipping {label}: {str(e)[:50]}")
                         continue
@@ -43,127 +129,98 @@ class Command(BaseCommand):
                     
                     self.stdout.write(f"Migrating: {label} ...")
                     
-                    for obj in rows:
-                        props = {"sql_id": obj.id}
-                        
-                        for field in model._meta.get_fields():
-                            if field.auto_created and not isinstance(field, ManyToManyField):
-                                continue
-                            
-                            if isinstance(field, ManyToManyField):
-                                continue
-                            
-                            field_name = field.name
-                            try:
-                                value = getattr(obj, field_name)
-                            except:
-                                value = None
-                            
-                            if value is not None:
-                                if hasattr(value, 'isoformat'):
-                                    value = value.isoformat()
-                                elif hasattr(value, 'id'):
-                                    props[f"{field_name}_id"] = value.id
-                                    continue
-                                else:
-                                    props[field_name] = value
-                            else:
-                                props[field_name] = value
-                        
-                        cypher = f"CREATE (n:{label}) SET n = $props"
-                        session.run(cypher, props=props)
-                    
-                    self.stdout.write(self.style.SUCCESS(f"✔ {total} rows migrated from {label}"))
+                    # Concrete columns only; FKs are read as <name>_id without a join
+                    columns = [field.attname for field in model._meta.concrete_fields]
+                    rows = model.objects.order_by("pk").values(*columns)
+                    self.import_nodes(session, label, rows, total, batch_size)
                 
                 # Migrate User table
                 self.stdout.write("Migrating: User ...")
-                users = User.objects.all()
-                docs = []
-                
-                for u in users:
-                    props = {
-                        "sql_id": u.id,
-                        "username": u.username,
-                        "email": u.email,
-                        "first_name": u.first_name,
-                        "last_name": u.last_name,
-                        "is_staff": u.is_staff,
-                        "is_superuser": u.is_superuser,
-                        "date_joined": u.date_joined.isoformat(),
-                        "last_login": u.last_login.isoformat() if u.last_login else None
-                    }
-                    cypher = "CREATE (n:User) SET n = $props"
-                    session.run(cypher, props=props)
-                
-                user_count = User.objects.count()
-                self.stdout.write(self.style.SUCCESS(f"✔ {user_count} rows migrated from User"))
+                users = User.objects.order_by("pk").values(*USER_COLUMNS)
+                self.import_nodes(session, "User", users, User.objects.count(), batch_size)
+
+                # Start the id counters after the migrated sql_ids
+                sync_sequences(session, GRAPH_LABELS)
+                self.stdout.write(self.style.SUCCESS("✔ Id sequences synced"))
                 
                 self.stdout.write("Creating relationships...")
-                rel_count = 0
-                
-                # Reload models for relationship creation
-                rpg_models = apps.get_app_config("rpg").get_models()
-                
-                for model in rpg_models:
-                    label = model.__name__
-                    
-                    try:
-                        rows = model.objects.all()
-                    except:
-                        continue
-                    
-                    if rows.count() == 0:
-                        continue
-                    
-                    for obj in rows:
-                        src_id = obj.id
-                        
-                        for field in model._meta.get_fields():
-                            if field.auto_created and not isinstance(field, ManyToManyField):
-                                continue
-                            
-                            # ForeignKey relationships
-                            if field.is_relation and not isinstance(field, ManyToManyField):
-                                try:
-                                    related_obj = getattr(obj, field.name, None)
-                                    if related_obj is not None:
-                                        target_label = field.related_model.__name__
-                                        tgt_id = related_obj.id
-                                        rel_name = field.name.upper()
-                                        
-                                        cypher = f"""
-                                        MATCH (a:{label} {{sql_id: $a_id}})
-                                        MATCH (b:{target_label} {{sql_id: $b_id}})
-                                        MERGE (a)-[:{rel_name}]->(b)
-                                        """
-                                        session.run(cypher, a_id=src_id, b_id=tgt_id)
-                                        rel_count += 1
-                                except:
-                                    pass
-                            
-                            # Many-to-Many relationships
-                            elif isinstance(field, ManyToManyField):
-                                try:
-                                    related_manager = getattr(obj, field.name, None)
-                                    if related_manager:
-                                        related_qs = related_manager.all()
-                                        if related_qs.exists():
-                                            target_label = field.related_model.__name__
-                                            rel_name = field.name.upper()
-                                            
-                                            for related in related_qs:
-                                                tgt_id = related.id
-                                                cypher = f"""
-                                                MATCH (a:{label} {{sql_id: $a_id}})
-                                                MATCH (b:{target_label} {{sql_id: $b_id}})
-                                                MERGE (a)-[:{rel_name}]->(b)
-                                                """
-                                                session.run(cypher, a_id=src_id, b_id=tgt_id)
-                                                rel_count += 1
-                                except:
-                                    pass
+                rel_count, failures = self.import_relationships(session, batch_size)
                 
+                if failures:
+                    raise CommandError(
+                        f"{len(failures)} relationship groups failed: " + ", ".join(failures)
+                    )
                 self.stdout.write(self.style.SUCCESS(f"✔ {rel_count} relationships created"))
         
         finally:
-            driver.close()
\ No newline at end of file
+            close_driver()
+
+    def import_nodes(self, session, label, rows, total, batch_size):
+        """Stream `rows` into Neo4j in batches and report rows/sec"""
+        started = time.monotonic()
+        written = 0
+        batch = []
+
+        for row in rows.iterator(chunk_size=batch_size):
+            batch.append(to_node_props(row))
+            if len(batch) >= batch_size:
+                session.execute_write(create_nodes, label, batch)
+                written += len(batch)
+                batch = []
+                self.report_progress(label, written, total, started)
+
+        if batch:
+            session.execute_write(create_nodes, label, batch)
+            written += len(batch)
+
+        elapsed = time.monotonic() - started
+        rate = written / elapsed if elapsed else written
+        self.stdout.write(self.style.SUCCESS(
+            f"✔ {written} rows migrated from {label} ({rate:,.0f} rows/sec)"
+        ))
+
+    def report_progress(self, label, written, total, started):
+        elapsed = time.monotonic() - started
+        rate = written / elapsed if elapsed else written
+        self.stdout.write(f"  {label}: {written}/{total} ({rate:,.0f} rows/sec)")
+
+    def import_relationships(self, session, batch_size):
+        """Create every FK/M2M relationship in UNWIND batches, grouped by type"""
+        rel_count = 0
+        failures = []
+        rpg_models = apps.get_app_config("rpg").get_models()
+
+        for source, rel_type, target, pairs in relationship_sources(rpg_models):
+            group = f"({source})-[:{rel_type}]->({target})"
+            linked = 0
+            expected = 0
+
+            try:
+                batch = []
+                for pair in pairs.iterator(chunk_size=batch_size):
+                    batch.append(list(pair))
+                    if len(batch) >= batch_size:
+                        linked += session.execute_write(create_relationships, source, rel_type, target, batch)
+                        expected += len(batch)
+                        batch = []
+
+                if batch:
+                    linked += session.execute_write(create_relationships, source, rel_type, target, batch)
+                    expected += len(batch)
+            except Exception as e:
+                failures.append(group)
+                self.stderr.write(self.style.ERROR(f"✘ {group}: {e}"))
+                continue
+
+            rel_count += linked
+            if expected == 0:
+                continue
+
+            if linked < expected:
+                self.stdout.write(self.style.WARNING(
+                    f"  {group}: {linked}/{expected} linked, {expected - linked} endpoints missing"
+                ))
+            else:
+                self.stdout.write(f"  {group}: {linked}")
+
+        return rel_count, failures
@@ -0,0 +1,72 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from rpg_backend.rpg.mongo_connection import get_db
+from rpg_backend.rpg.mongo_indexes import MONGO_COLLECTIONS, ensure_indexes, explain_filter_queries, index_sizes
+from rpg_backend.rpg.mongo_sequences import backfill_ids
+
+
+class Command(BaseCommand):
+    help = "Creates the id and filter indexes on the rpg_mongo collections"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--check-only",
+            action="store_true",
+            help="Skip index creation and only explain() the view queries",
+        )
+
+    def handle(self, *args, **options):
+        db = get_db()
+
+        if not options["check_only"]:
+            backfill_missing_ids(self, db)
+            bootstrap_indexes(self, db)
+
+        report_index_sizes(self, db)
+        check_filter_queries(self, db)
+
+
+def backfill_missing_ids(command, db):
+    """Number documents written without an integer id, list pages only reach integer ids"""
+    command.stdout.write("Backfilling missing ids ...")
+    total = sum(backfill_ids(db, collection) for collection in MONGO_COLLECTIONS)
+    command.stdout.write(command.style.SUCCESS(f"✔ {total} documents numbered"))
+
+
+def bootstrap_indexes(command, db):
+    """Create the indexes and print what was applied"""
+    command.stdout.write("Creating MongoDB indexes ...")
+    created = ensure_indexes(db)
+    total = sum(len(names) for names in created.values())
+    command.stdout.write(
+        command.style.SUCCESS(f"✔ {total} indexes on {len(created)} collections")
+    )
+
+
+def report_index_sizes(command, db):
+    """Print the size of every index"""
+    command.stdout.write("Index sizes:")
+
+    for collection, sizes in index_sizes(db).items():
+        for name, size in sorted(sizes.items()):
+            command.stdout.write(f"  {collection}.{name}: {size / 1024:.1f} KiB")
+
+
+def check_filter_queries(command, db):
+    """explain() the view queries and fail if any of them scans a collection"""
+    command.stdout.write("Checking query plans ...")
+    missing = []
+
+    for name, uses_index, stages in explain_filter_queries(db):
+        if uses_index:
+            command.stdout.write(f"  ✔ {name}")
+        else:
+            missing.append(name)
+            command.stdout.write(
+                command.style.WARNING(f"  ✘ {name}: {' -> '.join(stages)}")
+            )
+
+    if missing:
+        raise CommandError(f"{len(missing)} queries do not use an index")
+
+    command.stdout.write(command.style.SUCCESS("✔ All view queries use an index"))
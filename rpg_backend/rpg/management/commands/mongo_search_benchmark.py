@@ -0,0 +1,101 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+
+from rpg_backend.rpg.mongo_connection import get_db
+from rpg_backend.rpg.mongo_search import SEARCH_MODES, search_indexes, search_keys, search_query
+
+SYLLABLES = [
+    "ar", "bel", "cor", "dra", "el", "fen", "gor", "hal", "is", "jor",
+    "kal", "lor", "mor", "nar", "or", "pel", "quin", "ror", "sil", "tor",
+    "ul", "val", "wyn", "xan", "yor", "zel",
+]
+TITLES = ["Knight", "Mage", "Rogue", "Hunter", "Priest", "Warden", "Bard", "Monk"]
+
+INSERT_BATCH = 10000
+
+
+def random_name(rng):
+    first = "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 3))).capitalize()
+    return f"{first} the {rng.choice(TITLES)}"
+
+
+class Command(BaseCommand):
+    help = "Benchmarks the Mongo search modes against the old unanchored $regex filter"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--count", type=int, default=1_000_000, help="Characters to generate")
+        parser.add_argument("--queries", type=int, default=50, help="Queries per mode")
+        parser.add_argument("--collection", default="character_search_benchmark")
+        parser.add_argument("--keep", action="store_true", help="Keep the generated collection")
+        parser.add_argument("--seed", type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        coll = get_db()[options["collection"]]
+
+        if coll.estimated_document_count() != options["count"]:
+            self.generate(coll, rng, options["count"])
+
+        names = [doc["character_name"] for doc in coll.aggregate([
+            {"$sample": {"size": options["queries"]}},
+            {"$project": {"character_name": 1}},
+        ])]
+
+        # What a user would type: the first letters of a name / one whole word
+        samples = {
+            "regex": [name[:4] for name in names],
+            "prefix": [name[:4] for name in names],
+            "text": [name.split()[0] for name in names],
+            "autocomplete": [name[:4] for name in names],
+        }
+
+        self.stdout.write(f"{'mode':<14}{'avg ms':>10}{'p95 ms':>10}{'avg hits':>10}{'keys':>10}{'docs':>10}")
+        for mode in ("regex",) + SEARCH_MODES:
+            self.report(coll, mode, samples[mode])
+
+        if not options["keep"]:
+            coll.drop()
+
+    def generate(self, coll, rng, count):
+        self.stdout.write(f"Generating {count} characters in {coll.name} ...")
+        coll.drop()
+
+        started = time.perf_counter()
+        for start in range(0, count, INSERT_BATCH):
+            batch = []
+            for i in range(start, min(start + INSERT_BATCH, count)):
+                doc = {"id": i + 1, "character_name": random_name(rng), "level": rng.randint(1, 60)}
+                doc.update(search_keys("character", doc))
+                batch.append(doc)
+            coll.insert_many(batch, ordered=False)
+
+        coll.create_indexes(search_indexes("character"))
+        self.stdout.write(f"  done in {time.perf_counter() - started:.1f}s")
+
+    def query_for(self, mode, q):
+        if mode == "regex":
+            # the old MongoCharacterFilter ?name= query
+            return {"character_name": {"$regex": q, "$options": "i"}}, None
+        return search_query("character", q, mode)
+
+    def report(self, coll, mode, samples):
+        timings = []
+        hits = 0
+
+        for q in samples:
+            query, collation = self.query_for(mode, q)
+            started = time.perf_counter()
+            hits += len(list(coll.find(query, {"_id": 1}, collation=collation)))
+            timings.append((time.perf_counter() - started) * 1000)
+
+        query, collation = self.query_for(mode, samples[0])
+        stats = coll.find(query, {"_id": 1}, collation=collation).explain()["executionStats"]
+
+        timings.sort()
+        p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+        self.stdout.write(
+            f"{mode:<14}{sum(timings) / len(timings):>10.2f}{p95:>10.2f}{hits / len(samples):>10.1f}"
+            f"{stats['totalKeysExamined']:>10}{stats['totalDocsExamined']:>10}"
+        )
@@ -0,0 +1,93 @@
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections, connections
+from django.test import Client
+from rest_framework.authtoken.models import Token
+
+ENDPOINTS = ["/api/items/", "/api/characters/"]
+
+# mode -> DATABASES["default"] overrides
+MODES = {
+    "per-request": {"CONN_MAX_AGE": 0, "CONN_HEALTH_CHECKS": False},
+    "persistent": {"CONN_MAX_AGE": 600, "CONN_HEALTH_CHECKS": False},
+    "persistent+health": {"CONN_MAX_AGE": 600, "CONN_HEALTH_CHECKS": True},
+    "pool": {"CONN_MAX_AGE": 0, "CONN_HEALTH_CHECKS": False, "POOL_SIZE": 5},
+}
+
+POOL_OPTIONS = ("pool_name", "pool_size", "pool_reset_session")
+
+
+class Command(BaseCommand):
+    help = "Compares request latency on the SQL endpoints across MySQL connection modes"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=200, help="Requests per endpoint and mode")
+        parser.add_argument("--username", help="User the requests authenticate as (default: first user)")
+        parser.add_argument("--mode", action="append", choices=list(MODES), help="Only these modes")
+
+    def handle(self, *args, **options):
+        user = self.get_user(options["username"])
+        token, _ = Token.objects.get_or_create(user=user)
+        client = Client(HTTP_HOST="localhost", HTTP_AUTHORIZATION=f"Token {token.key}")
+
+        self.stdout.write(f"{'mode':<20}{'endpoint':<20}{'avg ms':>10}{'p50 ms':>10}{'p95 ms':>10}")
+        for mode in options["mode"] or MODES:
+            self.configure(mode)
+            for endpoint in ENDPOINTS:
+                self.report(mode, endpoint, self.measure(client, endpoint, options["requests"]))
+
+        connections["default"].close()
+
+    def get_user(self, username):
+        users = User.objects.order_by("pk")
+        user = users.filter(username=username).first() if username else users.first()
+        if user is None:
+            raise CommandError("No user to authenticate as, create one or pass --username")
+        return user
+
+    def configure(self, mode):
+        """Switch the default connection to `mode`; takes effect on the next connect"""
+        connection = connections["default"]
+        connection.close()
+
+        settings_dict = connection.settings_dict
+        overrides = dict(MODES[mode])
+        pool_size = overrides.pop("POOL_SIZE", 0)
+        settings_dict.update(overrides)
+
+        for option in POOL_OPTIONS:
+            settings_dict["OPTIONS"].pop(option, None)
+        if pool_size:
+            # a fresh pool name per run, mysql.connector pools live for the process
+            settings_dict["OPTIONS"].update({
+                "pool_name": f"benchmark-{mode}-{time.monotonic_ns()}",
+                "pool_size": pool_size,
+                "pool_reset_session": True,
+            })
+
+    def measure(self, client, endpoint, count):
+        """
+        Time `count` requests. The test client skips the request_started /
+        request_finished connection handling, so it is done here as a server would.
+        """
+        timings = []
+        for _ in range(count):
+            started = time.perf_counter()
+            close_old_connections()
+            response = client.get(endpoint)
+            close_old_connections()
+            timings.append((time.perf_counter() - started) * 1000)
+
+            if response.status_code != 200:
+                raise CommandError(f"{endpoint} answered {response.status_code}")
+
+        return sorted(timings)
+
+    def report(self, mode, endpoint, timings):
+        p50 = timings[len(timings) // 2]
+        p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+        self.stdout.write(
+            f"{mode:<20}{endpoint:<20}{sum(timings) / len(timings):>10.2f}{p50:>10.2f}{p95:>10.2f}"
+        )
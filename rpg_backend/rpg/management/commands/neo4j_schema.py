@@ -0,0 +1,54 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from rpg_backend.rpg.neo4j_connection import get_session, close_driver
+from rpg_backend.rpg.neo4j_schema import ensure_schema, explain_view_queries
+
+
+class Command(BaseCommand):
+    help = "Creates sql_id uniqueness constraints and secondary indexes in Neo4j"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--check-only",
+            action="store_true",
+            help="Skip schema creation and only EXPLAIN the view queries",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            with get_session() as session:
+                if not options["check_only"]:
+                    bootstrap_schema(self, session)
+
+                check_view_queries(self, session)
+        finally:
+            close_driver()
+
+
+def bootstrap_schema(command, session):
+    """Create the schema and print what was applied"""
+    command.stdout.write("Creating Neo4j constraints and indexes ...")
+    statements = ensure_schema(session)
+    command.stdout.write(
+        command.style.SUCCESS(f"✔ {len(statements)} schema statements applied")
+    )
+
+
+def check_view_queries(command, session):
+    """EXPLAIN the view queries and fail if any of them scans a label"""
+    command.stdout.write("Checking query plans ...")
+    missing = []
+
+    for name, problems, operators in explain_view_queries(session):
+        if not problems:
+            command.stdout.write(f"  ✔ {name}")
+        else:
+            missing.append(name)
+            command.stdout.write(
+                command.style.WARNING(f"  ✘ {name}: {'; '.join(problems)} ({' -> '.join(operators)})")
+            )
+
+    if missing:
+        raise CommandError(f"{len(missing)} queries are not index-only")
+
+    command.stdout.write(command.style.SUCCESS("✔ Every view query reads its labels through an index"))
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:08
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rpg', '0003_inventoryitem'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='battle',
+            name='character',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='battles', to='rpg.character'),
+        ),
+    ]
@@ -6,7 +6,7 @@ from .character import Character
 # BATTLE
 # =============================
 class Battle(models.Model):
-    character = models.ForeignKey(Character, on_delete=models.CASCADE)  
+    character = models.ForeignKey(Character, on_delete=models.CASCADE, related_name="battles")
     xp = models.IntegerField(default=0)
     money = models.IntegerField(default=0)
     outcome = models.CharField(max_length=20, choices=[('Victory', 'Victory'), ('Defeat', 'Defeat')])
@@ -0,0 +1,191 @@
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+# =============================
+# MONGODB ANALYTICS
+# =============================
+# Aggregation pipelines answering the questions that used to need whole
+# collections pulled through the list views. Each pipeline starts with a
+# $match (and, where it sorts, a $sort) that an index in mongo_indexes
+# can serve, and only joins names in after the result is cut down.
+
+LEADERBOARD_METRICS = ("level", "gold")
+GUILD_SORTS = ("total_gold", "member_count", "avg_level")
+
+DEFAULT_LIMIT = 10
+MAX_LIMIT = 100
+
+CACHE_PREFIX = "mongo-analytics"
+
+
+def _character_names(local_field="character"):
+    """$lookup + $set adding character_name for the id in `local_field`"""
+    return [
+        {"$lookup": {
+            "from": "character",
+            "localField": local_field,
+            "foreignField": "id",
+            "pipeline": [{"$project": {"_id": 0, "character_name": 1}}],
+            "as": "_character",
+        }},
+        {"$set": {"character_name": {"$first": "$_character.character_name"}}},
+        {"$unset": "_character"},
+    ]
+
+
+def inventory_value_pipeline(character=None, limit=DEFAULT_LIMIT):
+    """inventory: total item value per character (quantity x item.value)"""
+    # served by character_items_item, or a plain scan of every inventory
+    match = {"character": character} if character is not None else {}
+
+    return [
+        {"$match": match},
+        {"$unwind": "$items"},
+        # item.value by id (id_unique); a missing item or value counts as 0
+        {"$lookup": {
+            "from": "item",
+            "localField": "items.item",
+            "foreignField": "id",
+            "pipeline": [{"$project": {"_id": 0, "value": 1}}],
+            "as": "_item",
+        }},
+        {"$group": {
+            "_id": "$character",
+            "total_value": {"$sum": {"$multiply": [
+                "$items.quantity",
+                {"$ifNull": [{"$first": "$_item.value"}, 0]},
+            ]}},
+            "total_quantity": {"$sum": "$items.quantity"},
+            "distinct_items": {"$addToSet": "$items.item"},
+        }},
+        {"$sort": {"total_value": -1, "_id": 1}},
+        {"$limit": limit},
+        {"$project": {
+            "_id": 0,
+            "character": "$_id",
+            "total_value": 1,
+            "total_quantity": 1,
+            "distinct_items": {"$size": "$distinct_items"},
+        }},
+        *_character_names(),
+    ]
+
+
+def leaderboard_pipeline(metric="level", guild=None, limit=DEFAULT_LIMIT):
+    """character: top characters by level or gold, optionally within one guild"""
+    match = {"guild": guild} if guild is not None else {}
+
+    # $sort + $limit directly after $match walk the level_id / gold_id (or
+    # guild_level_id / guild_gold_id) index backwards and stop after `limit`
+    # keys; id breaks ties so equal scores keep a stable order
+    return [
+        {"$match": match},
+        {"$sort": {metric: -1, "id": 1}},
+        {"$limit": limit},
+        {"$project": {
+            "_id": 0, "id": 1, "character_name": 1,
+            "guild": 1, "level": 1, "gold": 1, "xp": 1,
+        }},
+    ]
+
+
+def guild_stats_pipeline(guild=None, sort="total_gold", limit=DEFAULT_LIMIT):
+    """character grouped by guild: members found, level and gold statistics"""
+    # guild equality, or every character with a guild ($ne null is a two-interval index scan)
+    match = {"guild": guild} if guild is not None else {"guild": {"$ne": None}}
+
+    return [
+        {"$match": match},
+        {"$group": {
+            "_id": "$guild",
+            "member_count": {"$sum": 1},
+            "avg_level": {"$avg": "$level"},
+            "max_level": {"$max": "$level"},
+            "total_gold": {"$sum": "$gold"},
+            "avg_gold": {"$avg": "$gold"},
+        }},
+        {"$sort": {sort: -1, "_id": 1}},
+        {"$limit": limit},
+        {"$lookup": {
+            "from": "guild",
+            "localField": "_id",
+            "foreignField": "id",
+            "pipeline": [{"$project": {"_id": 0, "guild_name": 1, "members": 1}}],
+            "as": "_guild",
+        }},
+        {"$project": {
+            "_id": 0,
+            "guild": "$_id",
+            "guild_name": {"$first": "$_guild.guild_name"},
+            "members": {"$first": "$_guild.members"},
+            "member_count": 1,
+            "avg_level": {"$round": ["$avg_level", 2]},
+            "max_level": 1,
+            "total_gold": 1,
+            "avg_gold": {"$round": ["$avg_gold", 2]},
+        }},
+    ]
+
+
+def battle_win_rates_pipeline(character=None, min_battles=1, limit=DEFAULT_LIMIT):
+    """battle grouped by character: victories / battles, xp and money earned"""
+    # served by character_outcome; without a character the $sort walks the same index
+    match = {"character": character} if character is not None else {"character": {"$ne": None}}
+
+    return [
+        {"$match": match},
+        {"$sort": {"character": 1}},
+        {"$group": {
+            "_id": "$character",
+            "battles": {"$sum": 1},
+            "victories": {"$sum": {"$cond": [{"$eq": ["$outcome", "Victory"]}, 1, 0]}},
+            "xp": {"$sum": "$xp"},
+            "money": {"$sum": "$money"},
+        }},
+        {"$match": {"battles": {"$gte": min_battles}}},
+        {"$set": {"win_rate": {"$round": [{"$divide": ["$victories", "$battles"]}, 4]}}},
+        {"$sort": {"win_rate": -1, "battles": -1, "_id": 1}},
+        {"$limit": limit},
+        {"$project": {
+            "_id": 0,
+            "character": "$_id",
+            "battles": 1,
+            "victories": 1,
+            "defeats": {"$subtract": ["$battles", "$victories"]},
+            "win_rate": 1,
+            "xp": 1,
+            "money": 1,
+        }},
+        *_character_names(),
+    ]
+
+
+def cache_key(name, params):
+    """Stable cache key for one report and its parameters"""
+    digest = hashlib.sha1(json.dumps(params, sort_keys=True).encode()).hexdigest()
+    return f"{CACHE_PREFIX}:{name}:{digest}"
+
+
+def run_report(collection, name, pipeline, params, refresh=False):
+    """
+    Aggregate `pipeline` on `collection`, cached for MONGO["ANALYTICS_CACHE_SECONDS"]
+    (0 disables caching). Returns (rows, cached).
+    """
+    ttl = settings.MONGO["ANALYTICS_CACHE_SECONDS"]
+    key = cache_key(name, params)
+
+    if ttl > 0 and not refresh:
+        rows = cache.get(key)
+        if rows is not None:
+            return rows, True
+
+    rows = list(collection.aggregate(pipeline))
+
+    if ttl > 0:
+        cache.set(key, rows, ttl)
+
+    return rows, False
@@ -0,0 +1,77 @@
+import atexit
+import threading
+
+from django.conf import settings
+from pymongo import MongoClient
+
+
+# =============================
+# SHARED MONGODB CLIENT
+# =============================
+# One MongoClient (one pool per server plus its monitor threads) per process.
+# It is created on first use, so importing the URLconf or running a
+# manage.py command that never touches Mongo opens no sockets.
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def _client_kwargs():
+    config = settings.MONGO
+    kwargs = {
+        "maxPoolSize": config["MAX_POOL_SIZE"],
+        "minPoolSize": config["MIN_POOL_SIZE"],
+        "maxIdleTimeMS": config["MAX_IDLE_TIME_MS"],
+        "serverSelectionTimeoutMS": config["SERVER_SELECTION_TIMEOUT_MS"],
+        "connectTimeoutMS": config["CONNECT_TIMEOUT_MS"],
+        "socketTimeoutMS": config["SOCKET_TIMEOUT_MS"],
+        "waitQueueTimeoutMS": config["WAIT_QUEUE_TIMEOUT_MS"],
+    }
+    if config["COMPRESSORS"]:
+        kwargs["compressors"] = config["COMPRESSORS"]
+    return kwargs
+
+
+def get_client():
+    """Return the process-wide MongoClient, creating it on first call"""
+    global _client
+
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = MongoClient(settings.MONGO["URI"], **_client_kwargs())
+    return _client
+
+
+def close_client():
+    """Close the shared client (called automatically on interpreter exit)"""
+    global _client
+
+    with _client_lock:
+        if _client is not None:
+            _client.close()
+            _client = None
+
+
+atexit.register(close_client)
+
+
+def get_db():
+    """The configured RPG database on the shared client"""
+    return get_client()[settings.MONGO["DATABASE"]]
+
+
+class LazyCollection:
+    """
+    Module-level stand-in for a collection: resolved on the shared client
+    the first time it is used instead of at import time.
+    """
+
+    def __init__(self, name):
+        self.name = name
+
+    def __getattr__(self, attr):
+        return getattr(get_db()[self.name], attr)
+
+    def __getitem__(self, key):
+        return get_db()[self.name][key]
@@ -0,0 +1,170 @@
+from pymongo import ASCENDING, DESCENDING, IndexModel
+
+from rpg_backend.rpg.mongo_search import (
+    SEARCH_MODES, character_filter, search_indexes, search_query, user_filter,
+)
+
+
+# =============================
+# MONGODB INDEXES
+# =============================
+# Every detail view looks documents up by {"id": ...} and the filter
+# endpoints query a few fixed fields. Without these each request is a
+# full collection scan.
+
+MONGO_COLLECTIONS = [
+    "character",
+    "item",
+    "skill",
+    "quest",
+    "guild",
+    "npc",
+    "battle",
+    "transaction",
+    "inventory",
+    "inventoryitem",
+    "user",
+]
+
+# collection -> extra indexes backing the filter endpoints
+SECONDARY_INDEXES = {
+    # MongoCharacterFilter: guild equality + level range (guild first, ESR order),
+    # and level alone for ?min_level= without a guild. The trailing id serves
+    # the leaderboard tie-break (metric desc, id asc) when walked backwards
+    "character": [
+        IndexModel([("guild", ASCENDING), ("level", ASCENDING), ("id", DESCENDING)], name="guild_level_id"),
+        IndexModel([("level", ASCENDING), ("id", DESCENDING)], name="level_id"),
+        # analytics gold leaderboard, overall and per guild
+        IndexModel([("gold", ASCENDING), ("id", DESCENDING)], name="gold_id"),
+        IndexModel([("guild", ASCENDING), ("gold", ASCENDING), ("id", DESCENDING)], name="guild_gold_id"),
+        # read model fan-out from skill / quest writes (multikey)
+        IndexModel([("skills", ASCENDING)], name="skills"),
+        IndexModel([("quests", ASCENDING)], name="quests"),
+        # name search (prefix / text / autocomplete), see mongo_search
+        *search_indexes("character"),
+    ],
+    # MongoFilterInventory: ?character=, ?item= (multikey over the embedded items) or both
+    "inventory": [
+        IndexModel([("character", ASCENDING), ("items.item", ASCENDING)], name="character_items_item"),
+        IndexModel([("items.item", ASCENDING)], name="items_item"),
+    ],
+    # analytics battle win rates: ?character= and the per-character $group
+    "battle": [
+        IndexModel([("character", ASCENDING), ("outcome", ASCENDING)], name="character_outcome"),
+    ],
+    # MongoUserFilter: ?is_staff= (?username= / ?email= go through the search indexes)
+    "user": [
+        IndexModel([("is_staff", ASCENDING), ("username", ASCENDING)], name="is_staff_username"),
+        *search_indexes("user"),
+    ],
+}
+
+# Winning-plan stages that mean the query went through an index
+INDEX_STAGES = ("IXSCAN", "EXPRESS_IXSCAN", "IDHACK", "COUNT_SCAN", "DISTINCT_SCAN", "TEXT_MATCH")
+
+
+def id_index():
+    return IndexModel([("id", ASCENDING)], name="id_unique", unique=True)
+
+
+def index_models(collection):
+    """All indexes a collection should have (besides _id)"""
+    return [id_index()] + SECONDARY_INDEXES.get(collection, [])
+
+
+def ensure_indexes(db):
+    """Create the indexes on every collection, returns {collection: [names]}"""
+    created = {}
+
+    for collection in MONGO_COLLECTIONS:
+        created[collection] = db[collection].create_indexes(index_models(collection))
+
+    return created
+
+
+def index_sizes(db):
+    """{collection: {index name: bytes}} from $collStats"""
+    sizes = {}
+
+    for collection in MONGO_COLLECTIONS:
+        stats = list(db[collection].aggregate([{"$collStats": {"storageStats": {}}}]))
+        sizes[collection] = stats[0]["storageStats"].get("indexSizes", {}) if stats else {}
+
+    return sizes
+
+
+def filter_queries():
+    """The query shapes (name, collection, query[, collation]) sent by the Mongo views"""
+    queries = []
+
+    for collection in MONGO_COLLECTIONS:
+        queries.append((f"{collection} detail", collection, {"id": 0}))
+
+    queries += [
+        ("inventory filter ?character=", "inventory", {"character": 0}),
+        ("inventory filter ?item=", "inventory", {"items.item": 0}),
+        ("inventory filter ?character=&item=", "inventory", {"character": 0, "items.item": 0}),
+        ("read model fan-out skill", "character", {"skills": 0}),
+        ("read model fan-out quest", "character", {"quests": 0}),
+        ("analytics inventory value ?character=", "inventory", {"character": 0}),
+        ("analytics guild stats", "character", {"guild": {"$ne": None}}),
+        ("analytics battle win rates", "battle", {"character": {"$ne": None}}),
+        ("analytics battle win rates ?character=", "battle", {"character": 0}),
+    ]
+
+    # the filter endpoints build their query and collation the same way
+    character_filters = {
+        "?guild=": {"guild": 0},
+        "?min_level=": {"min_level": 0},
+        "?guild=&min_level=": {"guild": 0, "min_level": 0},
+        "?name=": {"name": "ab"},
+        "?name=&guild=": {"name": "ab", "guild": 0},
+    }
+    for params, kwargs in character_filters.items():
+        queries.append((f"character filter {params}", "character", *character_filter(**kwargs)))
+
+    user_filters = {
+        "?is_staff=": {"is_staff": True},
+        "?username=": {"username": "ab"},
+        "?email=": {"email": "ab"},
+        "?email=&is_staff=": {"email": "ab", "is_staff": True},
+    }
+    for params, kwargs in user_filters.items():
+        queries.append((f"user filter {params}", "user", *user_filter(**kwargs)))
+
+    for collection in ("character", "user"):
+        for mode in SEARCH_MODES:
+            query, collation = search_query(collection, "ab", mode)
+            queries.append((f"{collection} search mode={mode}", collection, query, collation))
+
+    return queries
+
+
+def _plan_stages(plan):
+    """Flatten a winning plan into its stage names"""
+    if isinstance(plan, list):
+        return [stage for child in plan for stage in _plan_stages(child)]
+    if not isinstance(plan, dict):
+        return []
+
+    stages = [plan["stage"]] if "stage" in plan else []
+    for key in ("queryPlan", "inputStage", "inputStages"):
+        if key in plan:
+            stages.extend(_plan_stages(plan[key]))
+    return stages
+
+
+def explain_filter_queries(db):
+    """
+    explain() every view query and report whether it uses an index.
+    Returns a list of (name, uses_index, stages).
+    """
+    report = []
+
+    for name, collection, query, *collation in filter_queries():
+        explain = db[collection].find(query, collation=collation[0] if collation else None).explain()
+        stages = _plan_stages(explain["queryPlanner"]["winningPlan"])
+        uses_index = "COLLSCAN" not in stages and any(stage in INDEX_STAGES for stage in stages)
+        report.append((name, uses_index, stages))
+
+    return report
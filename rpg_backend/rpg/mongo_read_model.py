@@ -0,0 +1,261 @@
+from django.conf import settings
+from pymongo import UpdateOne
+
+from rpg_backend.rpg.mongo_connection import get_db
+
+
+# =============================
+# CHARACTER READ MODEL
+# =============================
+# A character document only stores guild / skill / quest ids. With
+# MONGO["CHARACTER_READ_MODEL"] on, it also embeds what a character card
+# shows under "details", so the detail view is a single document read:
+#   details.guild   {id, guild_name} or null
+#   details.skills  [{id, name, damage, healing}, ...]  (same order as skills)
+#   details.quests  [{id, title, reward_xp, reward_money}, ...]
+# Writes to guilds, skills and quests fan out to the characters holding
+# them with one update_many each (served by the guild_level_id, skills and
+# quests indexes); a new one is embedded in characters already holding its id.
+
+DETAILS_FIELD = "details"
+
+# kind -> (source collection, character field holding the id(s), fields copied)
+EMBEDDED = {
+    "guild": ("guild", "guild", ("guild_name",)),
+    "skill": ("skill", "skills", ("name", "damage", "healing")),
+    "quest": ("quest", "quests", ("title", "reward_xp", "reward_money")),
+}
+
+MIGRATE_BATCH = 1000
+
+
+def enabled():
+    return settings.MONGO["CHARACTER_READ_MODEL"]
+
+
+def summary(kind, doc):
+    """The part of a guild / skill / quest document embedded in characters"""
+    _, _, fields = EMBEDDED[kind]
+    return {"id": doc["id"], **{field: doc.get(field) for field in fields}}
+
+
+def _summaries(db, kind, ids=None):
+    """{id: summary} for the given ids (one $in query), or for the whole collection"""
+    collection, _, fields = EMBEDDED[kind]
+    query = {"id": {"$in": list(ids)}} if ids is not None else {}
+    projection = {"_id": 0, "id": 1, **{field: 1 for field in fields}}
+    return {doc["id"]: summary(kind, doc) for doc in db[collection].find(query, projection)}
+
+
+def _details(guild, skills, quests, guilds, skill_map, quest_map):
+    """Assemble details.* from ids and prefetched summaries; unknown ids are skipped"""
+    details = {}
+    if guild is not ...:
+        details["guild"] = guilds.get(guild)
+    if skills is not ...:
+        details["skills"] = [skill_map[i] for i in skills or [] if i in skill_map]
+    if quests is not ...:
+        details["quests"] = [quest_map[i] for i in quests or [] if i in quest_map]
+    return details
+
+
+def details_for(fields, db=None, catalog=None):
+    """
+    details.* for whichever of guild / skills / quests appear in `fields`
+    (a new character or the body of an update). Empty when disabled.
+    `catalog` (from prefetch_summaries) replaces the summary reads.
+    """
+    if not enabled():
+        return {}
+
+    guild = fields.get("guild", ...)
+    skills = fields.get("skills", ...)
+    quests = fields.get("quests", ...)
+
+    if catalog is None:
+        db = db if db is not None else get_db()
+        catalog = {
+            "guild": _summaries(db, "guild", [guild]) if guild not in (..., None) else {},
+            "skill": _summaries(db, "skill", skills) if skills not in (..., None) else {},
+            "quest": _summaries(db, "quest", quests) if quests not in (..., None) else {},
+        }
+
+    return _details(guild, skills, quests, catalog["guild"], catalog["skill"], catalog["quest"])
+
+
+def prefetch_summaries(docs, db=None):
+    """
+    {kind: {id: summary}} for every guild / skill / quest referenced by
+    `docs`, one $in read per kind, so a batch of character writes does not
+    read the summaries once per document
+    """
+    ids = {kind: set() for kind in EMBEDDED}
+    if enabled():
+        for doc in docs:
+            if doc.get("guild") is not None:
+                ids["guild"].add(doc["guild"])
+            ids["skill"].update(doc.get("skills") or [])
+            ids["quest"].update(doc.get("quests") or [])
+
+    if db is None and any(ids.values()):
+        db = get_db()
+    return {kind: _summaries(db, kind, found) if found else {} for kind, found in ids.items()}
+
+
+def insert_details(doc, db=None, catalog=None):
+    """Add the full details sub-document to a character about to be inserted"""
+    details = details_for({"guild": doc.get("guild"), **doc}, db, catalog)
+    if details:
+        doc[DETAILS_FIELD] = details
+    return doc
+
+
+def update_details(fields, db=None, catalog=None):
+    """Add dotted details.* keys to the $set of a character update"""
+    fields.pop(DETAILS_FIELD, None)
+    for key, value in details_for(fields, db, catalog).items():
+        fields[f"{DETAILS_FIELD}.{key}"] = value
+    return fields
+
+
+def touches(kind, fields):
+    """Does an update of these fields change what characters embed?"""
+    _, _, embedded = EMBEDDED[kind]
+    return any(field in fields for field in embedded)
+
+
+def fan_out_update(kind, doc, db=None):
+    """Copy the new summary of a guild / skill / quest into every character holding it"""
+    if not enabled():
+        return 0
+
+    db = db if db is not None else get_db()
+    _, ref_field, _ = EMBEDDED[kind]
+    entry = summary(kind, doc)
+
+    if kind == "guild":
+        result = db["character"].update_many(
+            {"guild": entry["id"]},
+            {"$set": {f"{DETAILS_FIELD}.guild": entry}},
+        )
+    else:
+        # $[entry] needs the array to exist; characters written before the
+        # read model was switched on get theirs built from scratch instead
+        embedded = f"{DETAILS_FIELD}.{ref_field}"
+        result = db["character"].update_many(
+            {ref_field: entry["id"], embedded: {"$type": "array"}},
+            {"$set": {f"{embedded}.$[entry]": entry}},
+            array_filters=[{"entry.id": entry["id"]}],
+        )
+        return result.modified_count + _embed(
+            db, kind, {ref_field: entry["id"], embedded: {"$not": {"$type": "array"}}},
+        )
+    return result.modified_count
+
+
+def fan_out_delete(kind, doc_id, db=None):
+    """Drop a deleted guild / skill / quest from every character's details"""
+    if not enabled():
+        return 0
+
+    db = db if db is not None else get_db()
+    _, ref_field, _ = EMBEDDED[kind]
+
+    if kind == "guild":
+        result = db["character"].update_many(
+            {"guild": doc_id},
+            {"$set": {f"{DETAILS_FIELD}.guild": None}},
+        )
+    else:
+        result = db["character"].update_many(
+            {ref_field: doc_id},
+            {"$pull": {f"{DETAILS_FIELD}.{ref_field}": {"id": doc_id}}},
+        )
+    return result.modified_count
+
+
+def fan_out_insert(kind, ids, db=None):
+    """
+    Embed new guilds / skills / quests in the characters that already
+    reference their ids: one read of those characters, one of the summaries
+    they need and one bulk write
+    """
+    if not enabled() or not ids:
+        return 0
+
+    db = db if db is not None else get_db()
+    _, ref_field, _ = EMBEDDED[kind]
+    return _embed(db, kind, {ref_field: {"$in": list(ids)}})
+
+
+def _embed(db, kind, query):
+    """Rewrite the whole guild / skills / quests summary of the characters matching `query`"""
+    _, ref_field, _ = EMBEDDED[kind]
+    holders = list(db["character"].find(query, {"_id": 1, ref_field: 1}))
+    if not holders:
+        return 0
+
+    if kind == "guild":
+        needed = {character[ref_field] for character in holders}
+    else:
+        needed = {i for character in holders for i in character.get(ref_field) or []}
+    summaries = _summaries(db, kind, needed)
+
+    batch = []
+    for character in holders:
+        if kind == "guild":
+            value = summaries.get(character[ref_field])
+        else:
+            value = [summaries[i] for i in character.get(ref_field) or [] if i in summaries]
+        batch.append(UpdateOne({"_id": character["_id"]}, {"$set": {f"{DETAILS_FIELD}.{ref_field}": value}}))
+
+    return db["character"].bulk_write(batch, ordered=False).modified_count
+
+
+def fan_out_written(kind, written, db=None):
+    """Fan out the (op, id) pairs a bulk write applied to guilds / skills / quests"""
+    if not enabled():
+        return 0
+
+    db = db if db is not None else get_db()
+    collection, _, _ = EMBEDDED[kind]
+    modified = fan_out_insert(kind, [doc_id for op, doc_id in written if op == "insert"], db)
+
+    updated = [doc_id for op, doc_id in written if op == "update"]
+    if updated:
+        for doc in db[collection].find({"id": {"$in": updated}}):
+            modified += fan_out_update(kind, doc, db)
+
+    for op, doc_id in written:
+        if op == "delete":
+            modified += fan_out_delete(kind, doc_id, db)
+
+    return modified
+
+
+def build_read_models(db):
+    """(Re)build details on every character from in-memory catalogs, returns the count"""
+    guilds = _summaries(db, "guild")
+    skill_map = _summaries(db, "skill")
+    quest_map = _summaries(db, "quest")
+
+    built = 0
+    batch = []
+    projection = {"_id": 1, "guild": 1, "skills": 1, "quests": 1}
+
+    for character in db["character"].find({}, projection):
+        details = _details(
+            character.get("guild"), character.get("skills"), character.get("quests"),
+            guilds, skill_map, quest_map,
+        )
+        batch.append(UpdateOne({"_id": character["_id"]}, {"$set": {DETAILS_FIELD: details}}))
+        built += 1
+
+        if len(batch) == MIGRATE_BATCH:
+            db["character"].bulk_write(batch, ordered=False)
+            batch = []
+
+    if batch:
+        db["character"].bulk_write(batch, ordered=False)
+
+    return built
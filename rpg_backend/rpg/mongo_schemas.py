@@ -110,6 +110,35 @@ InventorySchema = openapi.Schema(
     }
 )
 
+CharacterDetailsSchema = openapi.Schema(
+    type=openapi.TYPE_OBJECT,
+    description="Embedded guild / skill / quest summaries (read model)",
+    properties={
+        "guild": openapi.Schema(type=openapi.TYPE_OBJECT, nullable=True),
+        "skills": openapi.Schema(type=openapi.TYPE_ARRAY, items=openapi.Items(type=openapi.TYPE_OBJECT)),
+        "quests": openapi.Schema(type=openapi.TYPE_ARRAY, items=openapi.Items(type=openapi.TYPE_OBJECT)),
+    }
+)
+
+CharacterSchema = openapi.Schema(
+    type=openapi.TYPE_OBJECT,
+    properties={
+        "id": openapi.Schema(type=Integer),
+        "character_name": openapi.Schema(type=String),
+        "user": openapi.Schema(type=Integer),
+        "level": openapi.Schema(type=Integer),
+        "hp": openapi.Schema(type=Integer),
+        "mana": openapi.Schema(type=Integer),
+        "xp": openapi.Schema(type=Integer),
+        "gold": openapi.Schema(type=Integer),
+        "guild": openapi.Schema(type=Integer, nullable=True),
+        "skills": openapi.Schema(type=openapi.TYPE_ARRAY, items=openapi.Items(type=Integer)),
+        "quests": openapi.Schema(type=openapi.TYPE_ARRAY, items=openapi.Items(type=Integer)),
+        "details": CharacterDetailsSchema,
+        "_id": openapi.Schema(type=String),
+    }
+)
+
 UserSchema = openapi.Schema(
     type=openapi.TYPE_OBJECT,
     properties={
@@ -136,6 +165,35 @@ BattleListSchema = openapi.Schema(type=openapi.TYPE_ARRAY, items=BattleSchema)
 TransactionListSchema = openapi.Schema(type=openapi.TYPE_ARRAY, items=TransactionSchema)
 InventoryListSchema = openapi.Schema(type=openapi.TYPE_ARRAY, items=InventorySchema)
 UserListSchema = openapi.Schema(type=openapi.TYPE_ARRAY, items=UserSchema)
+CharacterListSchema = openapi.Schema(type=openapi.TYPE_ARRAY, items=CharacterSchema)
+
+# ---- Keyset pages (list endpoints) ----
+def page_of(schema):
+    return openapi.Schema(
+        type=openapi.TYPE_OBJECT,
+        properties={
+            "results": openapi.Schema(type=openapi.TYPE_ARRAY, items=schema),
+            "next_cursor": openapi.Schema(type=Integer, description="Pass as ?after= for the next page, null on the last page"),
+        }
+    )
+
+ItemPageSchema = page_of(ItemSchema)
+SkillPageSchema = page_of(SkillSchema)
+NPCPageSchema = page_of(NPCSchema)
+QuestPageSchema = page_of(QuestSchema)
+GuildPageSchema = page_of(GuildSchema)
+BattlePageSchema = page_of(BattleSchema)
+TransactionPageSchema = page_of(TransactionSchema)
+InventoryPageSchema = page_of(InventorySchema)
+UserPageSchema = page_of(UserSchema)
+CharacterPageSchema = page_of(CharacterSchema)
+
+PageParams = [
+    openapi.Parameter("after", openapi.IN_QUERY, description="Return documents with id greater than this", type=Integer),
+    openapi.Parameter("limit", openapi.IN_QUERY, description="Page size (default 100, max 1000)", type=Integer),
+    openapi.Parameter("fields", openapi.IN_QUERY, description="Comma separated fields to return", type=String),
+    openapi.Parameter("stream", openapi.IN_QUERY, description="Stream every document as one JSON array", type=Boolean),
+]
 
 # ---- Reusable param definitions ----
 Param_id = openapi.Parameter("id", openapi.IN_PATH, type=openapi.TYPE_INTEGER)
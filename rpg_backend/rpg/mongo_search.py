@@ -0,0 +1,136 @@
+import re
+
+from pymongo import ASCENDING, TEXT, IndexModel
+from pymongo.collation import Collation, CollationStrength
+
+
+# =============================
+# MONGODB SEARCH
+# =============================
+# Replaces the unanchored {"$regex": q, "$options": "i"} filters, which
+# cannot use an index, with three index-backed modes:
+#   prefix        case-insensitive range scan on a collation index
+#   text          $text over a text index (whole words, stemmed)
+#   autocomplete  equality on precomputed edge n-grams (multikey index)
+
+SEARCH_MODES = ("prefix", "text", "autocomplete")
+
+# Strength 2 compares case-insensitively (and accent-sensitively)
+SEARCH_COLLATION = Collation(locale="en", strength=CollationStrength.SECONDARY)
+
+# Under ICU collation U+FFFF sorts after every other character,
+# so [q, q + U+FFFF) covers every string starting with q
+PREFIX_UPPER_BOUND = "\uffff"
+
+NGRAM_FIELD = "search_ngrams"
+MIN_NGRAM = 2
+MAX_NGRAM = 15
+
+# Excludes the n-gram keys from API responses
+HIDDEN_FIELDS = {NGRAM_FIELD: 0}
+
+# collection -> (fields searched by text/autocomplete, field used for prefix search)
+SEARCH_FIELDS = {
+    "character": (["character_name"], "character_name"),
+    "user": (["username", "email"], "username"),
+}
+
+
+def ngrams(*values):
+    """Lower-cased edge n-grams of every word in `values`"""
+    grams = set()
+    for value in values:
+        for word in re.findall(r"\w+", str(value or "").lower()):
+            for size in range(MIN_NGRAM, min(len(word), MAX_NGRAM) + 1):
+                grams.add(word[:size])
+    return sorted(grams)
+
+
+def search_keys(collection, doc):
+    """{NGRAM_FIELD: [...]} for a document about to be written"""
+    fields, _ = SEARCH_FIELDS[collection]
+    return {NGRAM_FIELD: ngrams(*(doc.get(field) for field in fields))}
+
+
+def search_indexes(collection):
+    """Indexes backing the three search modes on `collection`"""
+    fields, prefix_field = SEARCH_FIELDS[collection]
+    return [
+        IndexModel(
+            [(prefix_field, ASCENDING)],
+            name=f"{prefix_field}_ci",
+            collation=SEARCH_COLLATION,
+        ),
+        IndexModel([(field, TEXT) for field in fields], name=f"{collection}_text"),
+        IndexModel([(NGRAM_FIELD, ASCENDING)], name=NGRAM_FIELD),
+    ]
+
+
+def prefix_query(field, prefix):
+    """Case-insensitive prefix match; run it with collation=SEARCH_COLLATION"""
+    return {field: {"$gte": prefix, "$lt": prefix + PREFIX_UPPER_BOUND}}
+
+
+def search_query(collection, q, mode):
+    """Query (and collation) for `q` in one of SEARCH_MODES, raises ValueError"""
+    if mode not in SEARCH_MODES:
+        raise ValueError(f"mode must be one of {', '.join(SEARCH_MODES)}")
+
+    q = q.strip()
+    if not q:
+        raise ValueError("q is required")
+
+    _, prefix_field = SEARCH_FIELDS[collection]
+
+    if mode == "prefix":
+        return prefix_query(prefix_field, q), SEARCH_COLLATION
+    if mode == "text":
+        return {"$text": {"$search": q}}, None
+
+    # autocomplete: every word typed must be the start of a word in the document
+    words = [word[:MAX_NGRAM] for word in re.findall(r"\w+", q.lower())]
+    if not words or any(len(word) < MIN_NGRAM for word in words):
+        raise ValueError(f"autocomplete needs words of at least {MIN_NGRAM} characters")
+    return {NGRAM_FIELD: {"$all": words}}, None
+
+
+def character_filter(name=None, min_level=None, guild=None):
+    """
+    Query and collation of the character filter endpoint. The collation
+    only goes with a name prefix: the guild / level indexes use the simple
+    collation and could not serve string comparisons under another one.
+    """
+    query = prefix_query("character_name", name) if name else {}
+    if min_level is not None:
+        query["level"] = {"$gte": min_level}
+    if guild is not None:
+        query["guild"] = guild
+    return query, SEARCH_COLLATION if name else None
+
+
+def user_filter(username=None, email=None, is_staff=None):
+    """
+    Query and collation of the user filter endpoint, raises ValueError.
+    Like character_filter, the collation only goes with a username prefix
+    (the n-gram index behind ?email= uses the simple collation).
+    """
+    query = prefix_query("username", username) if username else {}
+    if email:
+        query.update(search_query("user", email, "autocomplete")[0])
+    if is_staff is not None:
+        query["is_staff"] = is_staff
+    return query, SEARCH_COLLATION if username else None
+
+
+def search(coll, collection, q, mode="prefix", limit=20, extra=None):
+    """Run a search on pymongo collection `coll` (named `collection`)"""
+    query, collation = search_query(collection, q, mode)
+    query = {**(extra or {}), **query}
+
+    if mode == "text":
+        projection = {**HIDDEN_FIELDS, "score": {"$meta": "textScore"}}
+        cursor = coll.find(query, projection).sort([("score", {"$meta": "textScore"})])
+    else:
+        cursor = coll.find(query, HIDDEN_FIELDS, collation=collation)
+
+    return cursor.limit(limit)
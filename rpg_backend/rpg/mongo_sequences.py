@@ -0,0 +1,129 @@
+from django.conf import settings
+from pymongo import ReturnDocument, UpdateOne
+
+from rpg_backend.rpg.id_blocks import IdBlocks
+from rpg_backend.rpg.mongo_connection import get_db
+
+
+# =============================
+# MONGODB ID COUNTERS
+# =============================
+# One {_id: <collection>, value: <last id>} document per collection in
+# "counters" replaces the old find_one(sort id -1) + 1. $inc is atomic,
+# so concurrent creates can never receive the same id.
+#
+# The counter documents also carry an `epoch`, bumped by sync_counters.
+# Workers re-read it at most every MONGO["ID_EPOCH_CHECK_SECONDS"] and
+# drop id blocks reserved under an older one (see id_blocks).
+
+COUNTERS_COLLECTION = "counters"
+
+# Documents with an integer id; strings and doubles sort above every number in BSON order
+WITH_INT_ID = {"id": {"$type": ["int", "long"]}}
+
+# Documents whose id is missing or not an integer; keyset pages ({"id": {"$gt": n}}) never reach them
+WITHOUT_INT_ID = {"id": {"$not": {"$type": ["int", "long"]}}}
+
+
+def _max_id(db, name):
+    """Highest integer id in collection `name` (served by the id_unique index)"""
+    last = db[name].find_one(WITH_INT_ID, {"id": 1}, sort=[("id", -1)])
+    return last["id"] if last else 0
+
+
+def _seed_counter(db, name):
+    """Create the counter at the collection's current max id ($max keeps concurrent seeds safe)"""
+    db[COUNTERS_COLLECTION].update_one({"_id": name}, {"$max": {"value": _max_id(db, name)}}, upsert=True)
+
+
+def advance_counter(name, count=1, db=None):
+    """Advance the counter for collection `name` by `count` and return the new last id"""
+    db = db if db is not None else get_db()
+    counters = db[COUNTERS_COLLECTION]
+
+    doc = counters.find_one_and_update(
+        {"_id": name},
+        {"$inc": {"value": count}},
+        return_document=ReturnDocument.AFTER,
+    )
+    if doc is None:
+        # First use of this counter: seed it from the existing documents
+        _seed_counter(db, name)
+        doc = counters.find_one_and_update(
+            {"_id": name},
+            {"$inc": {"value": count}},
+            return_document=ReturnDocument.AFTER,
+        )
+    return doc["value"]
+
+
+def counter_epoch(db, name):
+    """Epoch of the counter for collection `name`, 0 before the first sync"""
+    doc = db[COUNTERS_COLLECTION].find_one({"_id": name}, {"epoch": 1})
+    return doc.get("epoch", 0) if doc else 0
+
+
+_blocks = IdBlocks()
+
+
+def next_id(name):
+    """
+    Allocate the next id for a new document in collection `name`.
+
+    With MONGO["ID_BLOCK_SIZE"] > 1 each worker reserves that many ids at
+    once and hands them out from memory (ids stay unique but are no longer
+    gap-free or strictly ordered across workers). Blocks reserved before
+    a sync_counters, in any process, are dropped once the new epoch is read.
+    """
+    block_size = settings.MONGO["ID_BLOCK_SIZE"]
+
+    if block_size <= 1:
+        return advance_counter(name)
+
+    if _blocks.epoch_due(name, settings.MONGO["ID_EPOCH_CHECK_SECONDS"]):
+        _blocks.set_epoch(name, counter_epoch(get_db(), name))
+    return _blocks.next_id(name, block_size, advance_counter)
+
+
+def reserve_ids(name, count, db=None):
+    """Reserve `count` consecutive ids, returns the first one"""
+    return advance_counter(name, count, db) - count + 1
+
+
+def backfill_ids(db, name):
+    """
+    Give every document without an integer id fresh ids from the counter,
+    returns how many. Run it before the unique id index is built: it
+    rejects a second document without an id.
+    """
+    missing = [doc["_id"] for doc in db[name].find(WITHOUT_INT_ID, {"_id": 1}).sort("_id", 1)]
+    if not missing:
+        return 0
+
+    # Reserve the ids so concurrent creates skip them, after any id written by hand
+    _seed_counter(db, name)
+    first = reserve_ids(name, len(missing), db)
+    db[name].bulk_write(
+        [UpdateOne({"_id": _id}, {"$set": {"id": first + i}}) for i, _id in enumerate(missing)],
+        ordered=False,
+    )
+    return len(missing)
+
+
+def sync_counters(db, names):
+    """Set every counter to the collection's current max id, e.g. after a bulk load"""
+    synced = {}
+    for name in names:
+        max_id = _max_id(db, name)
+        db[COUNTERS_COLLECTION].update_one(
+            {"_id": name},
+            {"$set": {"value": max_id}, "$inc": {"epoch": 1}},
+            upsert=True,
+        )
+        synced[name] = max_id
+
+    # Ids reserved before the reload no longer match the counters (other
+    # processes notice through the epoch)
+    _blocks.clear()
+
+    return synced
@@ -0,0 +1,179 @@
+from rest_framework.response import Response
+from rest_framework import status
+from drf_yasg.utils import swagger_auto_schema
+from drf_yasg import openapi
+
+from rpg_backend.rpg.mongo_connection import LazyCollection
+from rpg_backend.rpg.mongo_analytics import (
+    DEFAULT_LIMIT, MAX_LIMIT, LEADERBOARD_METRICS, GUILD_SORTS,
+    inventory_value_pipeline, leaderboard_pipeline, guild_stats_pipeline,
+    battle_win_rates_pipeline, run_report,
+)
+from .resource import MongoView
+
+# Collections on the shared MongoDB client
+inventory_collection = LazyCollection("inventory")
+characters_collection = LazyCollection("character")
+battle_collection = LazyCollection("battle")
+
+
+def _optional_int(request, name):
+    value = request.GET.get(name)
+    return int(value) if value not in (None, "") else None
+
+
+def _choice(request, name, choices):
+    value = request.GET.get(name, choices[0])
+    if value not in choices:
+        raise ValueError(f"{name} must be one of {', '.join(choices)}")
+    return value
+
+
+def _limit(request):
+    limit = int(request.GET.get("limit", DEFAULT_LIMIT))
+    if limit < 1:
+        raise ValueError("limit must be positive")
+    return min(limit, MAX_LIMIT)
+
+
+LimitParam = openapi.Parameter("limit", openapi.IN_QUERY, description=f"Rows (default {DEFAULT_LIMIT}, max {MAX_LIMIT})", type=openapi.TYPE_INTEGER)
+RefreshParam = openapi.Parameter("refresh", openapi.IN_QUERY, description="Skip the cache and aggregate now (staff only)", type=openapi.TYPE_BOOLEAN)
+
+ReportSchema = openapi.Schema(
+    type=openapi.TYPE_OBJECT,
+    properties={
+        "results": openapi.Schema(type=openapi.TYPE_ARRAY, items=openapi.Items(type=openapi.TYPE_OBJECT)),
+        "cached": openapi.Schema(type=openapi.TYPE_BOOLEAN),
+    }
+)
+
+
+class MongoAnalyticsView(MongoView):
+    """
+    Read-only aggregation report. Subclasses set
+      collection  LazyCollection
+      name        report name (part of the cache key)
+      pipeline    staticmethod building the pipeline from the params
+    and override params(request) when the report takes any.
+    """
+
+    name = None
+    pipeline = None
+
+    def params(self, request):
+        """Report parameters from the query string, raises ValueError"""
+        return {}
+
+    def report(self, request):
+        try:
+            params = self.params(request)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        # anyone else could make every request aggregate
+        refresh = request.user.is_staff and request.GET.get("refresh", "").lower() in ("1", "true", "yes")
+        rows, cached = run_report(self.collection, self.name, self.pipeline(**params), params, refresh)
+
+        return self.respond({"results": rows, "cached": cached})
+
+
+class MongoInventoryValue(MongoAnalyticsView):
+    """GET /api/mongodb/analytics/inventory-value/?character=<id>"""
+    collection = inventory_collection
+    name = "inventory-value"
+    pipeline = staticmethod(inventory_value_pipeline)
+
+    def params(self, request):
+        return {"character": _optional_int(request, "character"), "limit": _limit(request)}
+
+    @swagger_auto_schema(
+        operation_description="Total inventory value per character (item quantity x item value), highest first",
+        manual_parameters=[
+            openapi.Parameter("character", openapi.IN_QUERY, description="Only this character", type=openapi.TYPE_INTEGER),
+            LimitParam, RefreshParam,
+        ],
+        responses={200: ReportSchema, 400: "Invalid parameters"}
+    )
+    def get(self, request):
+        return self.report(request)
+
+
+class MongoLeaderboard(MongoAnalyticsView):
+    """GET /api/mongodb/analytics/leaderboard/?metric=level|gold&guild=<id>"""
+    collection = characters_collection
+    name = "leaderboard"
+    pipeline = staticmethod(leaderboard_pipeline)
+
+    def params(self, request):
+        return {
+            "metric": _choice(request, "metric", LEADERBOARD_METRICS),
+            "guild": _optional_int(request, "guild"),
+            "limit": _limit(request),
+        }
+
+    @swagger_auto_schema(
+        operation_description="Top characters by level or gold",
+        manual_parameters=[
+            openapi.Parameter("metric", openapi.IN_QUERY, description="level (default) or gold", type=openapi.TYPE_STRING, enum=list(LEADERBOARD_METRICS)),
+            openapi.Parameter("guild", openapi.IN_QUERY, description="Only members of this guild", type=openapi.TYPE_INTEGER),
+            LimitParam, RefreshParam,
+        ],
+        responses={200: ReportSchema, 400: "Invalid parameters"}
+    )
+    def get(self, request):
+        return self.report(request)
+
+
+class MongoGuildStats(MongoAnalyticsView):
+    """GET /api/mongodb/analytics/guilds/?sort=total_gold|member_count|avg_level"""
+    collection = characters_collection
+    name = "guilds"
+    pipeline = staticmethod(guild_stats_pipeline)
+
+    def params(self, request):
+        return {
+            "guild": _optional_int(request, "guild"),
+            "sort": _choice(request, "sort", GUILD_SORTS),
+            "limit": _limit(request),
+        }
+
+    @swagger_auto_schema(
+        operation_description="Membership, level and gold statistics per guild",
+        manual_parameters=[
+            openapi.Parameter("guild", openapi.IN_QUERY, description="Only this guild", type=openapi.TYPE_INTEGER),
+            openapi.Parameter("sort", openapi.IN_QUERY, description="total_gold (default), member_count or avg_level", type=openapi.TYPE_STRING, enum=list(GUILD_SORTS)),
+            LimitParam, RefreshParam,
+        ],
+        responses={200: ReportSchema, 400: "Invalid parameters"}
+    )
+    def get(self, request):
+        return self.report(request)
+
+
+class MongoBattleWinRates(MongoAnalyticsView):
+    """GET /api/mongodb/analytics/battle-win-rates/?character=<id>&min_battles=<n>"""
+    collection = battle_collection
+    name = "battle-win-rates"
+    pipeline = staticmethod(battle_win_rates_pipeline)
+
+    def params(self, request):
+        min_battles = int(request.GET.get("min_battles", 1))
+        if min_battles < 1:
+            raise ValueError("min_battles must be positive")
+        return {
+            "character": _optional_int(request, "character"),
+            "min_battles": min_battles,
+            "limit": _limit(request),
+        }
+
+    @swagger_auto_schema(
+        operation_description="Battle win rate per character, highest first",
+        manual_parameters=[
+            openapi.Parameter("character", openapi.IN_QUERY, description="Only this character", type=openapi.TYPE_INTEGER),
+            openapi.Parameter("min_battles", openapi.IN_QUERY, description="Skip characters with fewer battles (default 1)", type=openapi.TYPE_INTEGER),
+            LimitParam, RefreshParam,
+        ],
+        responses={200: ReportSchema, 400: "Invalid parameters"}
+    )
+    def get(self, request):
+        return self.report(request)
@@ -0,0 +1,142 @@
+from rest_framework.response import Response
+from rest_framework import status
+from drf_yasg.utils import swagger_auto_schema
+from drf_yasg import openapi
+from pymongo import DeleteOne, InsertOne, UpdateOne
+from pymongo.errors import BulkWriteError
+
+from rpg_backend.rpg.mongo_sequences import reserve_ids
+from .resource import MongoResource
+
+MAX_BULK_OPS = 10000
+
+bulk_ops_schema = openapi.Schema(
+    type=openapi.TYPE_ARRAY,
+    items=openapi.Items(
+        type=openapi.TYPE_OBJECT,
+        properties={
+            "op": openapi.Schema(type=openapi.TYPE_STRING, enum=["insert", "update", "delete"]),
+            "id": openapi.Schema(type=openapi.TYPE_INTEGER, description="Target id (update / delete)"),
+            "doc": openapi.Schema(type=openapi.TYPE_OBJECT, description="New document (insert) or fields to set (update)"),
+        },
+    ),
+)
+
+
+class MongoBulkWriteView(MongoResource):
+    """
+    POST a JSON array of insert / update / delete operations, run as one
+    unordered bulk_write. Shares prepare_insert / prepare_update with the
+    collection's list and detail views.
+    """
+
+    def before_write(self, parsed):
+        """Called with the parsed (op, id, doc) operations before any is prepared"""
+
+    def after_write(self, written):
+        """Called with the (op, id) of every operation that succeeded"""
+
+    def parse(self, entries):
+        """
+        Turn the request body into (op, id, doc) tuples.
+        Raises ValueError on a malformed entry.
+        """
+        parsed = []
+        for index, entry in enumerate(entries):
+            if not isinstance(entry, dict):
+                raise ValueError(f"Operation {index} must be an object")
+
+            op = entry.get("op")
+            doc = entry.get("doc") or {}
+            if op not in ("insert", "update", "delete"):
+                raise ValueError(f"Operation {index}: op must be insert, update or delete")
+            if not isinstance(doc, dict):
+                raise ValueError(f"Operation {index}: doc must be an object")
+
+            doc = {k: v for k, v in doc.items() if k not in ("_id", "id")}
+
+            if op == "insert":
+                parsed.append((op, None, doc))
+                continue
+
+            try:
+                target = int(entry["id"])
+            except (KeyError, TypeError, ValueError):
+                raise ValueError(f"Operation {index}: {op} needs an integer id")
+            if op == "update" and not doc:
+                raise ValueError(f"Operation {index}: update needs a non-empty doc")
+            parsed.append((op, target, doc))
+
+        return parsed
+
+    @swagger_auto_schema(operation_description="Insert, update and delete many documents in one bulk write",
+                         request_body=bulk_ops_schema,
+                         responses={200: "Per-operation results", 207: "Some operations failed", 400: "Invalid body"})
+    def post(self, request):
+        if not isinstance(request.data, list):
+            return Response({"error": "Expected a JSON array"}, status=status.HTTP_400_BAD_REQUEST)
+
+        if len(request.data) > MAX_BULK_OPS:
+            return Response(
+                {"error": f"At most {MAX_BULK_OPS} operations per request"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        try:
+            parsed = self.parse(request.data)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        if not parsed:
+            return Response({"results": []}, status=status.HTTP_200_OK)
+
+        # One counter round trip for all the inserts
+        insert_count = sum(1 for op, _, _ in parsed if op == "insert")
+        next_new_id = reserve_ids(self.name, insert_count) if insert_count else None
+
+        # One read to tell "no such document" apart from a successful write
+        targets = {target for op, target, _ in parsed if op != "insert"}
+        existing = set()
+        if targets:
+            existing = {doc["id"] for doc in self.collection.find({"id": {"$in": list(targets)}}, {"id": 1})}
+
+        self.before_write(parsed)
+
+        requests = []
+        results = []
+        for index, (op, target, doc) in enumerate(parsed):
+            if op == "insert":
+                target = next_new_id
+                next_new_id += 1
+                requests.append(InsertOne(self.prepare_insert({**doc, "id": target})))
+            elif op == "update":
+                requests.append(UpdateOne({"id": target}, {"$set": self.prepare_update(doc)}))
+            else:
+                requests.append(DeleteOne({"id": target}))
+
+            result = {"index": index, "op": op, "id": target, "status": "ok"}
+            if op != "insert" and target not in existing:
+                result["status"] = "not_found"
+            results.append(result)
+
+        try:
+            summary = self.collection.bulk_write(requests, ordered=False).bulk_api_result
+        except BulkWriteError as e:
+            summary = e.details
+            for error in summary.get("writeErrors", []):
+                results[error["index"]]["status"] = "error"
+                results[error["index"]]["error"] = error.get("errmsg")
+
+        self.after_write([(result["op"], result["id"]) for result in results if result["status"] == "ok"])
+
+        failed = any(result["status"] != "ok" for result in results)
+        return Response(
+            {
+                "inserted": summary.get("nInserted", 0),
+                "matched": summary.get("nMatched", 0),
+                "modified": summary.get("nModified", 0),
+                "deleted": summary.get("nRemoved", 0),
+                "results": results,
+            },
+            status=status.HTTP_207_MULTI_STATUS if failed else status.HTTP_200_OK,
+        )
@@ -1,157 +1,69 @@
-from rest_framework.views import APIView
 from rest_framework.response import Response
-from rest_framework import status, permissions
-from pymongo import MongoClient
+from rest_framework import status
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
 
-from django.views.decorators.csrf import csrf_exempt
-from django.utils.decorators import method_decorator
+from rpg_backend.rpg.mongo_schemas import CharacterSchema, CharacterListSchema
+from rpg_backend.rpg.mongo_connection import LazyCollection
+from rpg_backend.rpg.mongo_read_model import insert_details, prefetch_summaries, update_details
+from rpg_backend.rpg.mongo_search import (
+    HIDDEN_FIELDS, NGRAM_FIELD, SEARCH_MODES, character_filter, search, search_keys,
+)
+from .resource import MongoListView, MongoDetailView, MongoResource
+from .bulk_view import MongoBulkWriteView
 
-# Connect to MongoDB
-client = MongoClient("mongodb://localhost:27017/")
-db = client["rpg_mongo"]
-characters_collection = db["character"]
+# Collections on the shared MongoDB client
+characters_collection = LazyCollection("character")
 
 
-def fix_id(doc):
-    """Convert _id ObjectId to string"""
-    doc["_id"] = str(doc["_id"])
-    return doc
+class CharacterResource(MongoResource):
+    collection = characters_collection
+    name = "character"
+    label = "character"
+    plural = "characters"
+    schema = CharacterSchema
+    # forces default lists
+    defaults = {"skills": [], "quests": []}
 
-CHAR_NOT_FOUND = {"error": "Character not found"}
-HTTP_404 = status.HTTP_404_NOT_FOUND
+    # summaries prefetched for a whole bulk write, see before_write()
+    catalog = None
 
-@method_decorator(csrf_exempt, name='dispatch')
-class MongoCharacterList(APIView):
+    def before_write(self, parsed):
+        self.catalog = prefetch_summaries(doc for _, _, doc in parsed)
 
-    # Endpoints public / no authentication required
-    permission_classes = [permissions.AllowAny]
+    def prepare_insert(self, doc):
+        doc = super().prepare_insert(doc)
+        doc.update(search_keys("character", doc))
+        # guild / skill / quest summaries for single-read detail
+        return insert_details(doc, catalog=self.catalog)
 
-    @swagger_auto_schema(
-        operation_description="Retrieve all characters stored in MongoDB",
-        responses={200: "List of characters"}
-    )
-
-    def get(self, request):
-        """Get all characters from MongoDB"""
-        data = [fix_id(doc) for doc in characters_collection.find()]
-        return Response(data, status=status.HTTP_200_OK)
-
-    @swagger_auto_schema(
-        operation_description="Create a new character",
-        request_body=openapi.Schema(
-            type=openapi.TYPE_OBJECT,
-            properties={
-                "character_name": openapi.Schema(type=openapi.TYPE_STRING),
-                "user": openapi.Schema(type=openapi.TYPE_INTEGER),
-                "level": openapi.Schema(type=openapi.TYPE_INTEGER),
-                "hp": openapi.Schema(type=openapi.TYPE_INTEGER),
-                "mana": openapi.Schema(type=openapi.TYPE_INTEGER),
-                "xp": openapi.Schema(type=openapi.TYPE_INTEGER),
-                "gold": openapi.Schema(type=openapi.TYPE_INTEGER),
-                "guild": openapi.Schema(type=openapi.TYPE_INTEGER),
-                "skills": openapi.Schema(type=openapi.TYPE_ARRAY, items=openapi.Items(type=openapi.TYPE_INTEGER)),
-                "quests": openapi.Schema(type=openapi.TYPE_ARRAY, items=openapi.Items(type=openapi.TYPE_INTEGER)),
-            }
-        ),
-        responses={201: "Character created"}
-    )
-
-    def post(self, request):
-        """Create a new character in MongoDB"""
-        body = request.data.copy()
-
-        last = characters_collection.find_one(sort=[("id", -1)])
-        body["id"] = (last["id"] + 1) if last else 1
-        # forces defult lists
-        body.setdefault("skills", [])
-        body.setdefault("quests", [])
-
-        result = characters_collection.insert_one(body)
-        body["_id"] = str(result.inserted_id)
-        return Response(body, status=status.HTTP_201_CREATED)
-    
-
-@method_decorator(csrf_exempt, name='dispatch')
-class MongoCharacterDetail(APIView):
+    def prepare_update(self, fields):
+        # keep the autocomplete keys in step with the name
+        fields.pop(NGRAM_FIELD, None)
+        if "character_name" in fields:
+            fields.update(search_keys("character", fields))
+        # and the embedded summaries with guild / skills / quests
+        return update_details(fields, catalog=self.catalog)
 
-    # Endpoints public / no authentication required
-    permission_classes = [permissions.AllowAny]
 
-    @swagger_auto_schema(
-        operation_description="Get a character by ID",
-        responses={200: "Character data returned successfully", 404: "Character not found"}
-    )
-
-    def get(self, request, char_id):
-        """Get a single character"""
-        doc = characters_collection.find_one({"id": int(char_id)})
+class MongoCharacterList(CharacterResource, MongoListView):
+    """GET all characters / POST create character"""
 
-        if not doc:
-            return Response(CHAR_NOT_FOUND, status=HTTP_404)
 
-        return Response(fix_id(doc), status=status.HTTP_200_OK)
+class MongoCharacterDetail(CharacterResource, MongoDetailView):
+    """GET one character (with embedded details) / PUT update / DELETE"""
+    lookup_url_kwarg = "char_id"
+    deleted_message = "Character deleted"
 
-    @swagger_auto_schema(
-        operation_description="Update a character by ID.",
-        request_body=openapi.Schema(
-            type=openapi.TYPE_OBJECT,
-            properties={
-                "character_name": openapi.Schema(type=openapi.TYPE_STRING),
-                "level": openapi.Schema(type=openapi.TYPE_INTEGER),
-                "hp": openapi.Schema(type=openapi.TYPE_INTEGER),
-                "mana": openapi.Schema(type=openapi.TYPE_INTEGER),
-                "xp": openapi.Schema(type=openapi.TYPE_INTEGER),
-                "gold": openapi.Schema(type=openapi.TYPE_INTEGER),
-                "guild": openapi.Schema(type=openapi.TYPE_INTEGER),
-                "skills": openapi.Schema(type=openapi.TYPE_ARRAY, items=openapi.Items(type=openapi.TYPE_INTEGER)),
-                "quests": openapi.Schema(type=openapi.TYPE_ARRAY, items=openapi.Items(type=openapi.TYPE_INTEGER)),
-            }
-        ),
-        responses={200: "Character updated.", 404: "Character not found."}
-    )
-    def put(self, request, char_id):
-        """Update a character"""
-        body = request.data.copy()
-
-        result = characters_collection.update_one(
-            {"id": int(char_id)},
-            {"$set": body}
-        )
-
-        if result.matched_count == 0:
-            return Response(CHAR_NOT_FOUND, status=HTTP_404)
-
-        updated = characters_collection.find_one({"id": int(char_id)})
-        return Response(fix_id(updated), status=status.HTTP_200_OK)
 
-
-    @swagger_auto_schema(
-        operation_description="Delete a character by ID.",
-        responses={200: "Character deleted.", 404: "Character not found."}
-    )
-    def delete(self, request, char_id):
-        """Delete a character"""
-        result = characters_collection.delete_one({"id": int(char_id)})
-
-        if result.deleted_count == 0:
-            return Response(CHAR_NOT_FOUND, status=HTTP_404)
-
-        return Response({"status": "Character deleted"}, status=status.HTTP_200_OK)
-    
-
-@method_decorator(csrf_exempt, name='dispatch')
-class MongoCharacterFilter(APIView):
-
-    # Endpoints public / no authentication required
-    permission_classes = [permissions.AllowAny]
+class MongoCharacterFilter(CharacterResource):
+    """GET characters by name prefix, minimum level or guild"""
 
     @swagger_auto_schema(
         operation_description="Filter characters by name, minimum level, or guild.",
         manual_parameters=[
             openapi.Parameter(
-                "name", openapi.IN_QUERY, description="Partial name match", type=openapi.TYPE_STRING
+                "name", openapi.IN_QUERY, description="Case-insensitive name prefix", type=openapi.TYPE_STRING
             ),
             openapi.Parameter(
                 "min_level", openapi.IN_QUERY, description="Minimum level", type=openapi.TYPE_INTEGER
@@ -160,24 +72,53 @@ class MongoCharacterFilter(APIView):
                 "guild", openapi.IN_QUERY, description="Guild ID", type=openapi.TYPE_INTEGER
             ),
         ],
-        responses={200: "Filtered character list"}
+        responses={200: CharacterListSchema}
     )
-
     def get(self, request):
-        query = {}
-
-        name = request.GET.get("name")
         min_level = request.GET.get("min_level")
         guild = request.GET.get("guild")
 
-        if name:
-            query["character_name"] = {"$regex": name, "$options": "i"}
+        # prefix range on the case-insensitive name index, not an unanchored regex
+        query, collation = character_filter(
+            request.GET.get("name"),
+            int(min_level) if min_level else None,
+            int(guild) if guild else None,
+        )
+
+        cursor = self.raw_collection().find(query, HIDDEN_FIELDS, collation=collation)
+        return self.respond(list(cursor))
+
+
+MAX_SEARCH_RESULTS = 100
+
+
+class MongoCharacterSearch(CharacterResource):
+    """GET characters matching ?q= in one of the search modes"""
+
+    @swagger_auto_schema(
+        operation_description="Index-backed character name search.",
+        manual_parameters=[
+            openapi.Parameter("q", openapi.IN_QUERY, description="Search text", type=openapi.TYPE_STRING, required=True),
+            openapi.Parameter(
+                "mode", openapi.IN_QUERY, type=openapi.TYPE_STRING, enum=list(SEARCH_MODES),
+                description="prefix (default): name starts with q, text: whole words, autocomplete: word prefixes",
+            ),
+            openapi.Parameter("limit", openapi.IN_QUERY, description="Max results (default 20)", type=openapi.TYPE_INTEGER),
+        ],
+        responses={200: CharacterListSchema, 400: "Invalid search"}
+    )
+    def get(self, request):
+        try:
+            limit = min(int(request.GET.get("limit", 20)), MAX_SEARCH_RESULTS)
+            cursor = search(
+                self.raw_collection(), "character",
+                request.GET.get("q", ""), request.GET.get("mode", "prefix"), limit,
+            )
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
-        if min_level:
-            query["level"] = {"$gte": int(min_level)}
+        return self.respond(list(cursor))
 
-        if guild:
-            query["guild"] = int(guild)
 
-        characters = [fix_id(c) for c in characters_collection.find(query)]
-        return Response(characters, status=status.HTTP_200_OK)
\ No newline at end of file
+class MongoCharacterBulk(CharacterResource, MongoBulkWriteView):
+    """POST /api/mongodb/characters/bulk/"""
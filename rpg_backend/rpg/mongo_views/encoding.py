@@ -0,0 +1,49 @@
+import json
+
+from bson import ObjectId, decode
+from bson.codec_options import CodecOptions
+from bson.decimal128 import Decimal128
+from bson.raw_bson import RawBSONDocument
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse
+
+
+# =============================
+# BSON -> JSON
+# =============================
+# Reads fetch RawBSONDocuments, which pymongo leaves undecoded. The
+# encoder still decodes each one into a dict (a single bson.decode call
+# in C, pymongo has no BSON -> JSON path of its own) and json.dumps
+# writes it out. What is saved is the rest: no fix_id() pass over every
+# document and no second encode by DRF's renderer.
+
+RAW_OPTIONS = CodecOptions(document_class=RawBSONDocument)
+
+
+def raw(collection):
+    """`collection` returning RawBSONDocuments"""
+    return collection.with_options(codec_options=RAW_OPTIONS)
+
+
+class BSONJSONEncoder(DjangoJSONEncoder):
+    """JSON encoder for (raw) BSON documents; ObjectIds become strings"""
+
+    def default(self, o):
+        if isinstance(o, RawBSONDocument):
+            # decoded to a dict here, once, right before it is written out
+            return decode(o.raw)
+        if isinstance(o, ObjectId):
+            return str(o)
+        if isinstance(o, Decimal128):
+            return str(o)
+        return super().default(o)
+
+
+def encode_json(data):
+    """JSON bytes for documents, lists of documents or plain data"""
+    return json.dumps(data, cls=BSONJSONEncoder, separators=(",", ":")).encode()
+
+
+def json_response(data, status=200):
+    """HttpResponse carrying `data` encoded by encode_json"""
+    return HttpResponse(encode_json(data), status=status, content_type="application/json")
@@ -1,96 +1,44 @@
-from rest_framework.views import APIView
-from rest_framework.response import Response
-from rest_framework import status, permissions
-from pymongo import MongoClient
-from drf_yasg.utils import swagger_auto_schema
-from drf_yasg import openapi
+from rpg_backend.rpg.mongo_schemas import GuildSchema
+from rpg_backend.rpg.mongo_connection import LazyCollection
+from rpg_backend.rpg.mongo_read_model import touches, fan_out_insert, fan_out_update, fan_out_delete, fan_out_written
+from .resource import MongoListView, MongoDetailView, MongoResource
+from .bulk_view import MongoBulkWriteView
 
-from django.views.decorators.csrf import csrf_exempt
-from django.utils.decorators import method_decorator
+# Collections on the shared MongoDB client
+guild_collection = LazyCollection("guild")
 
 
-from rpg_backend.rpg.mongo_schemas import GuildSchema, GuildListSchema
+class GuildResource(MongoResource):
+    collection = guild_collection
+    name = "guild"
+    label = "guild"
+    plural = "guilds"
+    schema = GuildSchema
 
-# Connect to MongoDB
-client = MongoClient("mongodb://localhost:27017/")
-db = client["rpg_mongo"]
-guild_collection = db["guild"]
+    # keep the copies embedded in characters current
+    def after_insert(self, doc):
+        fan_out_insert("guild", [doc["id"]])
 
+    def after_update(self, fields, doc):
+        if touches("guild", fields):
+            fan_out_update("guild", doc)
 
-def fix_id(doc):
-    """Convert ObjectId to string"""
-    doc["_id"] = str(doc["_id"])
-    return doc
+    def after_delete(self, doc_id):
+        fan_out_delete("guild", doc_id)
 
-GUILD_NOT_FOUND = {"error": "Guild not found"}
-HTTP_404 = status.HTTP_404_NOT_FOUND
+    def after_write(self, written):
+        fan_out_written("guild", written)
 
-@method_decorator(csrf_exempt, name="dispatch")
-class MongoGuildList(APIView):
-    """GET all guilds / POST create a new guild"""
 
-    # Endpoints public / no authentication required
-    permission_classes = [permissions.AllowAny]
+class MongoGuildList(GuildResource, MongoListView):
+    """GET all guilds / POST create guild"""
 
-    @swagger_auto_schema(operation_description="Get all guilds", responses={200: GuildListSchema})
-    def get(self, request):
-        guilds = [fix_id(doc) for doc in guild_collection.find()]
-        return Response(guilds, status=status.HTTP_200_OK)
 
-    """
-    POST /api/mongodb/guilds/
-    {
-        "guild_name": "Knights of Dawn",
-        "members": 15
-    }
-    """
-    @swagger_auto_schema(operation_description="Create guild", request_body=GuildSchema, responses={201: GuildSchema})
-    def post(self, request):
-        body = request.data.copy()
-
-        last = guild_collection.find_one(sort=[("id", -1)])
-        body["id"] = (last["id"] + 1) if last else 1
-
-        result = guild_collection.insert_one(body)
-        body["_id"] = str(result.inserted_id)
-
-        return Response(body, status=status.HTTP_201_CREATED)
-
-
-@method_decorator(csrf_exempt, name="dispatch")
-class MongoGuildDetail(APIView):
+class MongoGuildDetail(GuildResource, MongoDetailView):
     """GET one guild / PUT update / DELETE"""
+    lookup_url_kwarg = "guild_id"
+    deleted_message = "Guild deleted"
 
-    # Endpoints public / no authentication required
-    permission_classes = [permissions.AllowAny]
-
-    @swagger_auto_schema(operation_description="Get guild", responses={200: GuildSchema, 404: "Not found"})
-    def get(self, request, guild_id):
-        doc = guild_collection.find_one({"id": int(guild_id)})
-        if not doc:
-            return Response(GUILD_NOT_FOUND, status=HTTP_404)
-        return Response(fix_id(doc), status=status.HTTP_200_OK)
-
-    @swagger_auto_schema(operation_description="Update guild", request_body=GuildSchema, responses={200: GuildSchema, 404: "Not found"})
-    def put(self, request, guild_id):
-        body = request.data.copy()
-
-        result = guild_collection.update_one(
-            {"id": int(guild_id)},
-            {"$set": body}
-        )
-
-        if result.matched_count == 0:
-            return Response(GUILD_NOT_FOUND, status=HTTP_404)
-
-        updated = guild_collection.find_one({"id": int(guild_id)})
-        return Response(fix_id(updated), status=status.HTTP_200_OK)
-
-    @swagger_auto_schema(operation_description="Delete guild", responses={204: "Deleted", 404: "Not found"})
-    def delete(self, request, guild_id):
-        result = guild_collection.delete_one({"id": int(guild_id)})
-
-        if result.deleted_count == 0:
-            return Response(GUILD_NOT_FOUND, status=HTTP_404)
 
-        return Response({"status": "Guild deleted"}, status=status.HTTP_200_OK)
+class MongoGuildBulk(GuildResource, MongoBulkWriteView):
+    """POST /api/mongodb/guilds/bulk/"""
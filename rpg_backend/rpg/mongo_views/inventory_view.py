@@ -1,97 +1,120 @@
-from rest_framework.views import APIView
 from rest_framework.response import Response
-from rest_framework import status, permissions
-from pymongo import MongoClient
+from rest_framework import status
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
+from pymongo import ReturnDocument, UpdateOne
 
-from django.views.decorators.csrf import csrf_exempt
-from django.utils.decorators import method_decorator
+from rpg_backend.rpg.mongo_schemas import InventorySchema, InventoryListSchema
+from rpg_backend.rpg.mongo_connection import LazyCollection
+from .encoding import raw
+from .resource import MongoListView, MongoDetailView, MongoResource
+from .bulk_view import MongoBulkWriteView
 
-from rpg_backend.rpg.mongo_schemas import (
-    InventorySchema, InventoryListSchema, InventoryItemSubschema
-)
-
-# Connect to MongoDB
-client = MongoClient("mongodb://localhost:27017/")
-db = client["rpg_mongo"]
-inventory_collection = db["inventory"]
+# Collections on the shared MongoDB client
+inventory_collection = LazyCollection("inventory")
 
 
-def fix_id(doc):
-    """Convert ObjectId to string"""
-    doc["_id"] = str(doc["_id"])
-    return doc
+class InventoryResource(MongoResource):
+    collection = inventory_collection
+    name = "inventory"
+    label = "inventory"
+    plural = "inventory entries"
+    schema = InventorySchema
+    # default empty item list
+    defaults = {"items": []}
 
-INVENTORY_NOT_FOUND = {"error": "Inventory not found"}
-HTTP_404 = status.HTTP_404_NOT_FOUND
 
-@method_decorator(csrf_exempt, name="dispatch")
-class MongoInventoryList(APIView):
+class MongoInventoryList(InventoryResource, MongoListView):
     """GET all inventory entries / POST create new inventory entry"""
 
-    # Endpoints public / no authentication required
-    permission_classes = [permissions.AllowAny]
-
-    @swagger_auto_schema(operation_description="Get all inventory entries", responses={200: InventoryListSchema})
-    def get(self, request):
-        items = [fix_id(doc) for doc in inventory_collection.find()]
-        return Response(items, status=status.HTTP_200_OK)
-
-    @swagger_auto_schema(
-        operation_description="Create inventory entry",
-        request_body=InventorySchema,
-        responses={201: InventorySchema}
-    )
-    def post(self, request):
-        body = request.data.copy()
-
-        last = inventory_collection.find_one(sort=[("id", -1)])
-        body["id"] = (last["id"] + 1) if last else 1
 
-        # default empty item list
-        if "items" not in body:
-            body["items"] = []
+class MongoInventoryDetail(InventoryResource, MongoDetailView):
+    """GET one inventory entry / DELETE (items change through the endpoints below)"""
+    lookup_url_kwarg = "inv_id"
+    http_method_names = ["get", "delete", "head", "options"]
 
-        result = inventory_collection.insert_one(body)
-        body["_id"] = str(result.inserted_id)
-
-        return Response(body, status=status.HTTP_201_CREATED)
+# =============================
+# ATOMIC ITEM MUTATIONS
+# =============================
+# Each change is one server-side update on the embedded items array,
+# so concurrent requests never overwrite each other's changes.
 
+def add_item(inv_id, item_id, quantity):
+    """
+    Add `quantity` of `item_id`: $inc the existing entry or $push a new one.
+    Returns the updated inventory (raw BSON), or None if it does not exist.
+    """
+    inventories = raw(inventory_collection)
+    while True:
+        doc = inventories.find_one_and_update(
+            {"id": inv_id, "items.item": item_id},
+            {"$inc": {"items.$.quantity": quantity}},
+            return_document=ReturnDocument.AFTER,
+        )
+        if doc is not None:
+            return doc
 
-@method_decorator(csrf_exempt, name="dispatch")
-class MongoInventoryDetail(APIView):
-    """GET one inventory entry / DELETE"""
+        doc = inventories.find_one_and_update(
+            {"id": inv_id, "items.item": {"$ne": item_id}},
+            {"$push": {"items": {"item": item_id, "quantity": quantity}}},
+            return_document=ReturnDocument.AFTER,
+        )
+        if doc is not None:
+            return doc
 
-    # Endpoints public / no authentication required
-    permission_classes = [permissions.AllowAny]
+        # Neither matched: no such inventory, or the item was pushed concurrently
+        if not inventories.count_documents({"id": inv_id}, limit=1):
+            return None
 
-    @swagger_auto_schema(operation_description="Get inventory entry", responses={200: InventorySchema, 404: "Not found"})
-    def get(self, request, inv_id):
-        doc = inventory_collection.find_one({"id": int(inv_id)})
 
-        if not doc:
-            return Response(INVENTORY_NOT_FOUND, status=HTTP_404)
+def item_delta_ops(inv_id, item_id, quantity):
+    """
+    bulk_write operations adding `quantity` (may be negative) of `item_id`.
+    The entry is pushed with quantity 0 only if missing, then incremented,
+    so concurrent batches for a new item both land.
+    """
+    return [
+        UpdateOne(
+            {"id": inv_id, "items.item": {"$ne": item_id}},
+            {"$push": {"items": {"item": item_id, "quantity": 0}}},
+        ),
+        UpdateOne(
+            {"id": inv_id},
+            {"$inc": {"items.$[entry].quantity": quantity}},
+            array_filters=[{"entry.item": item_id}],
+        ),
+    ]
+
+
+def prune_ops(touched):
+    """
+    bulk_write operations removing entries at quantity <= 0, limited to the
+    item ids changed in each inventory ({inventory id: [item ids]})
+    """
+    return [
+        UpdateOne(
+            {"id": inv_id},
+            {"$pull": {"items": {"item": {"$in": sorted(set(item_ids))}, "quantity": {"$lte": 0}}}},
+        )
+        for inv_id, item_ids in touched.items()
+    ]
 
-        return Response(fix_id(doc), status=status.HTTP_200_OK)
 
-    @swagger_auto_schema(operation_description="Delete inventory entry", responses={204: "Deleted", 404: "Not found"})
-    def delete(self, request, inv_id):
-        result = inventory_collection.delete_one({"id": int(inv_id)})
+def _int_field(body, name, default=None):
+    """Read an integer from the request body, raises ValueError"""
+    value = body.get(name, default)
+    if value is None or isinstance(value, bool):
+        raise ValueError(f"'{name}' must be an integer")
+    return int(value)
 
-        if result.deleted_count == 0:
-            return Response(INVENTORY_NOT_FOUND, status=HTTP_404)
 
-        return Response(status=status.HTTP_204_NO_CONTENT)
-    
 # Add item to inventory
 add_item_schema = openapi.Schema(
     type=openapi.TYPE_OBJECT,
     properties={"item": openapi.Schema(type=openapi.TYPE_INTEGER), "quantity": openapi.Schema(type=openapi.TYPE_INTEGER)}
 )
     
-@method_decorator(csrf_exempt, name="dispatch")
-class MongoInventoryAddItem(APIView):
+class MongoInventoryAddItem(InventoryResource):
     """
     POST /api/mongodb/inventory/<id</add-item/
     {
@@ -100,46 +123,26 @@ class MongoInventoryAddItem(APIView):
     }
     """
 
-    # Endpoints public / no authentication required
-    permission_classes = [permissions.AllowAny]
-
     @swagger_auto_schema(operation_description="Add item to inventory",
                          request_body=add_item_schema,
                          responses={201: InventorySchema, 404: "Not found"})
     def post(self, request, inv_id):
-        body = request.data.copy()
-        item_id = body.get("item")
-        quantity = body.get("quantity", 1)
-
-        inventory = inventory_collection.find_one({"id": int(inv_id)})
-        if not inventory:
-            return Response(INVENTORY_NOT_FOUND, status=HTTP_404)
-        
-        # checking if item already exists
-        for entry in inventory["items"]:
-            if entry["item"] == item_id:
-                entry["quantity"] += quantity
-                break
-        else:
-            # add new item
-            inventory["items"].append({
-                "item": item_id,
-                "quantity": quantity
-            })
-        
-        inventory_collection.update_one(
-            {"id": int(inv_id)},
-            {"$set": {"items": inventory["items"]}}
-        )
+        try:
+            item_id = _int_field(request.data, "item")
+            quantity = _int_field(request.data, "quantity", 1)
+        except (TypeError, ValueError) as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        inventory = add_item(int(inv_id), item_id, quantity)
+        if inventory is None:
+            return self.not_found()
 
-        inventory = inventory_collection.find_one({"id": int(inv_id)})
-        return Response(fix_id(inventory), status=status.HTTP_201_CREATED)
+        return self.respond(inventory, status.HTTP_201_CREATED)
 
 # Update specific item quantity
 update_item_schema = openapi.Schema(type=openapi.TYPE_OBJECT, properties={"quantity": openapi.Schema(type=openapi.TYPE_INTEGER)})
 
-@method_decorator(csrf_exempt, name="dispatch")
-class MongoInventoryUpdateItem(APIView):
+class MongoInventoryUpdateItem(InventoryResource):
     """
     PATCH /api/mongodb/inventory/<id>/update-item/<item_id>/
     {
@@ -147,75 +150,110 @@ class MongoInventoryUpdateItem(APIView):
     }
     """
 
-    # Endpoints public / no authentication required
-    permission_classes = [permissions.AllowAny]
-
     @swagger_auto_schema(operation_description="Update item quantity in inventory", request_body=update_item_schema, responses={200: InventorySchema, 404: "Not found"})
     def put(self, request, inv_id, item_id):
-        body = request.data.copy()
-        new_quantity = body.get("quantity")
-
-        inventory = inventory_collection.find_one({"id": int(inv_id)})
-        if not inventory:
-            return Response(INVENTORY_NOT_FOUND, status=HTTP_404)
-        
-        updated = False
-
-        for entry in inventory["items"]:
-            if entry["item"] == int(item_id):
-                entry["quantity"] = new_quantity
-                updated = True
-
-        if not updated:
-            return Response(INVENTORY_NOT_FOUND, status=HTTP_404)
-        
-        inventory_collection.update_one(
-            {"id": int(inv_id)},
-            {"$set": {"items": inventory["items"]}}
+        try:
+            new_quantity = _int_field(request.data, "quantity")
+        except (TypeError, ValueError) as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        updated = self.raw_collection().find_one_and_update(
+            {"id": int(inv_id), "items.item": int(item_id)},
+            {"$set": {"items.$[entry].quantity": new_quantity}},
+            array_filters=[{"entry.item": int(item_id)}],
+            return_document=ReturnDocument.AFTER,
         )
 
-        updated = inventory_collection.find_one({"id": int(inv_id)})
-        return Response(fix_id(updated), status=status.HTTP_200_OK)
+        if updated is None:
+            return self.not_found()
+
+        return self.respond(updated)
     
 
-@method_decorator(csrf_exempt, name="dispatch")
-class MongoInventoryRemoveItem(APIView):
+class MongoInventoryRemoveItem(InventoryResource):
     """
     DELETE /api/mongodb/inventory/<id>/remove-item/<item_id>/
     """
 
-    # Endpoints public / no authentication required
-    permission_classes = [permissions.AllowAny]
-
     @swagger_auto_schema(operation_description="Remove item from inventory", responses={200: InventorySchema, 404: "Not found"})
     def delete(self, request, inv_id, item_id):
-        inventory = inventory_collection.find_one({"id": int(inv_id)})
-        if not inventory:
-            return Response(INVENTORY_NOT_FOUND, status=HTTP_404)
-        
-        before = len(inventory["items"])
-        inventory["items"] = [
-            x for x in inventory["items"]
-            if x["item"] != int(item_id)
-        ]
-        after = len(inventory["items"])
-
-        if before == after:
-            return Response(INVENTORY_NOT_FOUND, status=HTTP_404)
-        
-        inventory_collection.update_one(
-            {"id": int(inv_id)},
-            {"$set": {"items": inventory["items"]}}
+        inventory = self.raw_collection().find_one_and_update(
+            {"id": int(inv_id), "items.item": int(item_id)},
+            {"$pull": {"items": {"item": int(item_id)}}},
+            return_document=ReturnDocument.AFTER,
         )
 
-        return Response(fix_id(inventory), status=status.HTTP_200_OK)
-    
+        if inventory is None:
+            return self.not_found()
+
+        return self.respond(inventory)
+
+
+# Many item deltas at once
+batch_items_schema = openapi.Schema(
+    type=openapi.TYPE_ARRAY,
+    items=openapi.Items(
+        type=openapi.TYPE_OBJECT,
+        properties={
+            "inventory": openapi.Schema(type=openapi.TYPE_INTEGER),
+            "item": openapi.Schema(type=openapi.TYPE_INTEGER),
+            "quantity": openapi.Schema(type=openapi.TYPE_INTEGER, description="Delta, may be negative"),
+        },
+    ),
+)
+
+MAX_BATCH_DELTAS = 10000
+
+
+class MongoInventoryBatchItems(InventoryResource):
+    """
+    POST /api/mongodb/inventory/batch-items/
+    [
+        {"inventory": 1, "item": 2, "quantity": 5},
+        {"inventory": 1, "item": 3, "quantity": -1}
+    ]
+    Entries this batch touched whose quantity drops to 0 or below are
+    removed; other entries are left as they are.
+    """
+
+    @swagger_auto_schema(operation_description="Apply many item quantity deltas in one bulk write",
+                         request_body=batch_items_schema,
+                         responses={200: InventoryListSchema, 400: "Invalid body"})
+    def post(self, request):
+        if not isinstance(request.data, list):
+            return Response({"error": "Expected a JSON array"}, status=status.HTTP_400_BAD_REQUEST)
+
+        if len(request.data) > MAX_BATCH_DELTAS:
+            return Response(
+                {"error": f"At most {MAX_BATCH_DELTAS} deltas per request"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        ops = []
+        touched = {}  # inventory id -> item ids changed in it
+        try:
+            for entry in request.data:
+                if not isinstance(entry, dict):
+                    raise ValueError("Every entry must be an object")
+                inv_id = _int_field(entry, "inventory")
+                item_id = _int_field(entry, "item")
+                ops += item_delta_ops(inv_id, item_id, _int_field(entry, "quantity"))
+                touched.setdefault(inv_id, []).append(item_id)
+        except (TypeError, ValueError) as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
-@method_decorator(csrf_exempt, name="dispatch")
-class MongoFilterInventory(APIView):
+        if not ops:
+            return Response([], status=status.HTTP_200_OK)
 
-    # Endpoints public / no authentication required
-    permission_classes = [permissions.AllowAny]
+        # Drop the touched entries that reached zero, in the same ordered batch
+        ops += prune_ops(touched)
+        inventory_collection.bulk_write(ops, ordered=True)
+
+        return self.respond(list(self.raw_collection().find({"id": {"$in": list(touched)}})))
+
+
+class MongoFilterInventory(InventoryResource):
+    """GET inventories by character and / or item"""
 
     @swagger_auto_schema(
         operation_description="Filter inventory by character or item",
@@ -237,5 +275,8 @@ class MongoFilterInventory(APIView):
         if item:
             query["items.item"] = int(item)
 
-        inventories = [fix_id(doc) for doc in inventory_collection.find(query)]
-        return Response(inventories, status=status.HTTP_200_OK)
\ No newline at end of file
+        return self.respond(list(self.raw_collection().find(query)))
+
+
+class MongoInventoryBulk(InventoryResource, MongoBulkWriteView):
+    """POST /api/mongodb/inventory/bulk/"""
@@ -0,0 +1,105 @@
+import re
+
+from django.http import StreamingHttpResponse
+from rest_framework.response import Response
+from rest_framework import status
+
+from rpg_backend.rpg.mongo_search import HIDDEN_FIELDS
+from rpg_backend.rpg.mongo_sequences import WITH_INT_ID
+from .encoding import encode_json, json_response, raw
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+# Documents per cursor batch (and per chunk written) when streaming
+STREAM_BATCH_SIZE = 1000
+
+# Projected field names, dotted paths into embedded documents allowed
+FIELD_NAME = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*(\.[A-Za-z_][A-Za-z0-9_]*)*$")
+
+
+def page_params(request):
+    """
+    Read ?after=<id>&limit=<n>&fields=a,b&stream=1 from the request;
+    after is None on the first page. Raises ValueError on bad input.
+    """
+    after = request.GET.get("after")
+    after = int(after) if after not in (None, "") else None
+    limit = int(request.GET.get("limit", DEFAULT_PAGE_SIZE))
+
+    if limit < 1:
+        raise ValueError("limit must be positive")
+
+    fields = None
+    raw_fields = request.GET.get("fields")
+    if raw_fields:
+        fields = [f.strip() for f in raw_fields.split(",") if f.strip()]
+        for field in fields:
+            if not FIELD_NAME.match(field):
+                raise ValueError(f"Invalid field name: {field}")
+
+    stream = request.GET.get("stream", "").lower() in ("1", "true", "yes")
+
+    # Streamed exports are only bounded by an explicit limit
+    if not stream:
+        limit = min(limit, MAX_PAGE_SIZE)
+    elif "limit" not in request.GET:
+        limit = 0
+
+    return after, limit, fields, stream
+
+
+def projection(fields):
+    """find() projection for `fields`; id is always kept, it is the cursor"""
+    if fields is None:
+        return HIDDEN_FIELDS
+    return {"id": 1, **{field: 1 for field in fields}}
+
+
+def stream_documents(cursor):
+    """Yield a JSON array one cursor batch at a time"""
+    yield b"["
+    first = True
+    chunk = []
+
+    for doc in cursor:
+        chunk.append(encode_json(doc))
+        if len(chunk) == STREAM_BATCH_SIZE:
+            yield (b"" if first else b",") + b",".join(chunk)
+            first = False
+            chunk = []
+
+    if chunk:
+        yield (b"" if first else b",") + b",".join(chunk)
+    yield b"]"
+
+
+def paginated_find(collection, request, query=None):
+    """
+    One keyset page of `collection` ordered by id (served by the id index),
+    or with ?stream=1 every matching document as a streamed JSON array.
+    Pages only hold documents with an integer id, the cursor; the
+    mongo_indexes command backfills the others.
+    """
+    try:
+        after, limit, fields, stream = page_params(request)
+    except ValueError as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    # Missing ids sort first and strings after every number, neither can be
+    # a cursor; an unbounded export keeps them
+    criteria = dict(query or {})
+    if after is not None:
+        criteria["id"] = {**WITH_INT_ID["id"], "$gt": after}
+    elif not stream:
+        criteria.update(WITH_INT_ID)
+    cursor = raw(collection).find(criteria, projection(fields)).sort("id", 1).limit(limit)
+
+    if stream:
+        cursor = cursor.batch_size(STREAM_BATCH_SIZE)
+        return StreamingHttpResponse(stream_documents(cursor), content_type="application/json")
+
+    rows = list(cursor)
+    next_cursor = rows[-1]["id"] if len(rows) == limit else None
+
+    return json_response({"results": rows, "next_cursor": next_cursor})
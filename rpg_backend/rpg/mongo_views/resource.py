@@ -0,0 +1,205 @@
+import copy
+
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework import status, permissions
+from drf_yasg.utils import swagger_auto_schema
+from pymongo import ReturnDocument
+
+from django.views.decorators.csrf import csrf_exempt
+from django.utils.decorators import method_decorator
+
+from rpg_backend.rpg.mongo_schemas import PageParams, page_of
+from rpg_backend.rpg.mongo_search import HIDDEN_FIELDS
+from rpg_backend.rpg.mongo_sequences import next_id
+from .encoding import json_response, raw
+from .pagination import paginated_find
+
+
+# =============================
+# MONGODB RESOURCE BASE
+# =============================
+# One list view (GET page / POST create) and one detail view
+# (GET / PUT / DELETE) per collection. Subclasses set the collection and
+# override the hooks; reads return raw BSON that encoding.py turns into
+# JSON bytes in one pass and PUT is a single find_one_and_update.
+
+@method_decorator(csrf_exempt, name="dispatch")
+class MongoView(APIView):
+    """Base for every Mongo endpoint"""
+
+    # Endpoints public / no authentication required
+    permission_classes = [permissions.AllowAny]
+
+    collection = None
+
+    def raw_collection(self):
+        return raw(self.collection)
+
+    def respond(self, data, status=status.HTTP_200_OK):
+        """(Raw) documents or plain data as a JSON response"""
+        return json_response(data, status)
+
+
+class MongoResource(MongoView):
+    """
+    Shared configuration of a collection's list and detail views:
+      collection  LazyCollection
+      name        collection (and id counter) name
+      label       singular name used in messages and swagger
+      plural      plural name used in swagger
+      schema      openapi schema of one document
+      defaults    fields a new document starts with
+    """
+
+    name = None
+    label = None
+    plural = None
+    schema = None
+    defaults = {}
+
+    # Swagger for the handlers a subclass inherits unchanged
+    SWAGGER = {}
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if cls.schema is None:
+            return
+
+        for method, describe in cls.SWAGGER.items():
+            if method in cls.__dict__:
+                continue  # documented by the subclass itself
+
+            def handler(self, request, *args, _inherited=getattr(cls, method), **kwargs):
+                return _inherited(self, request, *args, **kwargs)
+
+            handler.__name__ = method
+            setattr(cls, method, swagger_auto_schema(**describe(cls))(handler))
+
+    def not_found(self):
+        message = f"{self.label[0].upper()}{self.label[1:]} not found"
+        return Response({"error": message}, status=status.HTTP_404_NOT_FOUND)
+
+    def prepare_insert(self, doc):
+        """Fill in defaults for a new document (id is already set)"""
+        for key, value in self.defaults.items():
+            doc.setdefault(key, copy.deepcopy(value))
+        return doc
+
+    def prepare_update(self, fields):
+        """Fields $set by a PUT"""
+        return fields
+
+    def after_insert(self, doc):
+        """Called with a document created by POST"""
+
+    def after_update(self, fields, doc):
+        """Called with the $set fields and the updated document"""
+
+    def after_delete(self, doc_id):
+        """Called once a document has been deleted"""
+
+
+class MongoListView(MongoResource):
+    """GET a keyset page / POST create"""
+
+    SWAGGER = {
+        "get": lambda cls: {
+            "operation_description": f"Get all {cls.plural}",
+            "manual_parameters": PageParams,
+            "responses": {200: page_of(cls.schema)},
+        },
+        "post": lambda cls: {
+            "operation_description": f"Create {cls.label}",
+            "request_body": cls.schema,
+            "responses": {201: cls.schema},
+        },
+    }
+
+    def get(self, request):
+        return paginated_find(self.collection, request)
+
+    def post(self, request):
+        body = request.data.copy()
+        body.pop("_id", None)
+
+        body["id"] = next_id(self.name)
+        body = self.prepare_insert(body)
+
+        self.collection.insert_one(body)
+        self.after_insert(body)
+
+        for field in HIDDEN_FIELDS:
+            body.pop(field, None)
+        return self.respond(body, status.HTTP_201_CREATED)
+
+
+class MongoDetailView(MongoResource):
+    """GET / PUT / DELETE one document by id"""
+
+    lookup_url_kwarg = None
+
+    # DELETE answers 204, or 200 {"status": ...} when set
+    deleted_message = None
+
+    SWAGGER = {
+        "get": lambda cls: {
+            "operation_description": f"Get {cls.label} by ID",
+            "responses": {200: cls.schema, 404: "Not found"},
+        },
+        "put": lambda cls: {
+            "operation_description": f"Update {cls.label} by ID",
+            "request_body": cls.schema,
+            "responses": {200: cls.schema, 400: "Empty update", 404: "Not found"},
+        },
+        "delete": lambda cls: {
+            "operation_description": f"Delete {cls.label} by ID",
+            "responses": {200 if cls.deleted_message else 204: "Deleted", 404: "Not found"},
+        },
+    }
+
+    def doc_id(self, kwargs):
+        return int(kwargs[self.lookup_url_kwarg])
+
+    def get(self, request, **kwargs):
+        doc = self.raw_collection().find_one({"id": self.doc_id(kwargs)}, HIDDEN_FIELDS)
+
+        if doc is None:
+            return self.not_found()
+
+        return self.respond(doc)
+
+    def put(self, request, **kwargs):
+        body = request.data.copy()
+        body.pop("_id", None)
+        body = self.prepare_update(body)
+
+        if not body:
+            return Response({"error": "Nothing to update"}, status=status.HTTP_400_BAD_REQUEST)
+
+        # update and read back in one round trip
+        updated = self.raw_collection().find_one_and_update(
+            {"id": self.doc_id(kwargs)},
+            {"$set": body},
+            projection=HIDDEN_FIELDS,
+            return_document=ReturnDocument.AFTER,
+        )
+
+        if updated is None:
+            return self.not_found()
+
+        self.after_update(body, updated)
+        return self.respond(updated)
+
+    def delete(self, request, **kwargs):
+        doc_id = self.doc_id(kwargs)
+        result = self.collection.delete_one({"id": doc_id})
+
+        if result.deleted_count == 0:
+            return self.not_found()
+
+        self.after_delete(doc_id)
+
+        if self.deleted_message:
+            return Response({"status": self.deleted_message}, status=status.HTTP_200_OK)
+        return Response(status=status.HTTP_204_NO_CONTENT)
@@ -1,83 +1,92 @@
-from rest_framework.views import APIView
 from rest_framework.response import Response
-from rest_framework import status, permissions
-from pymongo import MongoClient
+from rest_framework import status
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
 
-
-from django.views.decorators.csrf import csrf_exempt
-from django.utils.decorators import method_decorator
-
 from rpg_backend.rpg.mongo_schemas import UserSchema, UserListSchema
+from rpg_backend.rpg.mongo_connection import LazyCollection
+from rpg_backend.rpg.mongo_search import HIDDEN_FIELDS, SEARCH_MODES, search, user_filter
+from .resource import MongoListView, MongoDetailView, MongoResource
 
-# Connect to MongoDB
-client = MongoClient("mongodb://localhost:27017/")
-db = client["rpg_mongo"]
-user_collection = db["user"]
+# Collections on the shared MongoDB client
+user_collection = LazyCollection("user")
 
 
-def fix_id(doc):
-    """Convert _id ObjectId to string"""
-    doc["_id"] = str(doc["_id"])
-    return doc
+class UserResource(MongoResource):
+    collection = user_collection
+    name = "user"
+    label = "user"
+    plural = "users (read-only)"
+    schema = UserSchema
 
-@method_decorator(csrf_exempt, name="dispatch")
-class MongoUserList(APIView):
-    # Endpoints public / no authentication required
-    permission_classes = [permissions.AllowAny]
-
-    @swagger_auto_schema(operation_description="Get all users (read-only)", responses={200: UserListSchema})
-    def get(self, request):
-        users = [fix_id(doc) for doc in user_collection.find()]
-        return Response(users, status=status.HTTP_200_OK)
-    
+    # users are migrated from SQL, never written through the API
+    http_method_names = ["get", "head", "options"]
 
-@method_decorator(csrf_exempt, name='dispatch')
-class MongoUserDetail(APIView):
-    # Endpoints public / no authentication required
-    permission_classes = [permissions.AllowAny]
 
-    @swagger_auto_schema(operation_description="Get user by ID", responses={200: UserSchema, 404: "Not found"})
-    def get(self, request, user_id):
-        """Get a single user"""
-        doc = user_collection.find_one({"id": int(user_id)})
+class MongoUserList(UserResource, MongoListView):
+    """GET all users"""
 
-        if not doc:
-            return Response({"error": "User not found"}, status=status.HTTP_404_NOT_FOUND)
 
-        return Response(fix_id(doc), status=status.HTTP_200_OK)
+class MongoUserDetail(UserResource, MongoDetailView):
+    """GET one user"""
+    lookup_url_kwarg = "user_id"
 
 
-@method_decorator(csrf_exempt, name='dispatch')
-class MongoUserFilter(APIView):
-    # Endpoints public / no authentication required
-    permission_classes = [permissions.AllowAny]
+class MongoUserFilter(UserResource):
+    """GET users by username prefix, email words or staff flag"""
 
     @swagger_auto_schema(
         operation_description="Filter users by username, email or staff flag",
         manual_parameters=[
-            openapi.Parameter("username", openapi.IN_QUERY, type=openapi.TYPE_STRING),
-            openapi.Parameter("email", openapi.IN_QUERY, type=openapi.TYPE_STRING),
+            openapi.Parameter("username", openapi.IN_QUERY, description="Case-insensitive username prefix", type=openapi.TYPE_STRING),
+            openapi.Parameter("email", openapi.IN_QUERY, description="Words the email starts with, e.g. 'john exam'", type=openapi.TYPE_STRING),
             openapi.Parameter("is_staff", openapi.IN_QUERY, type=openapi.TYPE_BOOLEAN),
         ],
         responses={200: UserListSchema}
     )
     def get(self, request):
-        query = {}
-
-        username = request.GET.get("username")
-        email = request.GET.get("email")
         is_staff = request.GET.get("is_staff")
 
-        if username:
-            query["username"] = {"$regex": username, "$options": "i"}
+        # prefix range / n-gram keys instead of unanchored regexes, so both use an index
+        try:
+            query, collation = user_filter(
+                request.GET.get("username"),
+                request.GET.get("email"),
+                is_staff.lower() == "true" if is_staff is not None else None,
+            )
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        cursor = self.raw_collection().find(query, HIDDEN_FIELDS, collation=collation)
+        return self.respond(list(cursor))
+
 
-        if email:
-            query["email"] = {"$regex": email, "$options": "i"}
+MAX_SEARCH_RESULTS = 100
 
-        if is_staff is not None:
-            query["is_staff"] = (is_staff.lower() == "true")
 
-        users = [fix_id(doc) for doc in user_collection.find(query)]
-        return Response(users, safe=status.HTTP_200_OK)
+class MongoUserSearch(UserResource):
+    """GET users matching ?q= in one of the search modes"""
+
+    @swagger_auto_schema(
+        operation_description="Index-backed username / email search",
+        manual_parameters=[
+            openapi.Parameter("q", openapi.IN_QUERY, type=openapi.TYPE_STRING, required=True),
+            openapi.Parameter(
+                "mode", openapi.IN_QUERY, type=openapi.TYPE_STRING, enum=list(SEARCH_MODES),
+                description="prefix (default): username starts with q, text: whole words, autocomplete: word prefixes",
+            ),
+            openapi.Parameter("limit", openapi.IN_QUERY, description="Max results (default 20)", type=openapi.TYPE_INTEGER),
+        ],
+        responses={200: UserListSchema, 400: "Invalid search"}
+    )
+    def get(self, request):
+        try:
+            limit = min(int(request.GET.get("limit", 20)), MAX_SEARCH_RESULTS)
+            cursor = search(
+                self.raw_collection(), "user",
+                request.GET.get("q", ""), request.GET.get("mode", "prefix"), limit,
+            )
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        return self.respond(list(cursor))
@@ -0,0 +1,249 @@
+import asyncio
+import atexit
+import threading
+
+from django.conf import settings
+from neo4j import AsyncGraphDatabase, GraphDatabase
+
+from rpg_backend.rpg.neo4j_metrics import (
+    AsyncRecordingTransaction, RecordingTransaction, profiled, profiling_enabled, record_query,
+)
+
+
+# =============================
+# SHARED NEO4J DRIVER
+# =============================
+# One driver (and therefore one Bolt connection pool) per process.
+# It is created on first use so manage.py commands that never touch
+# Neo4j do not open any sockets.
+
+_driver = None
+_driver_lock = threading.Lock()
+
+_stats_lock = threading.Lock()
+_session_stats = {
+    "sessions_opened": 0,
+    "sessions_in_use": 0,
+    "peak_sessions_in_use": 0,
+}
+
+
+def _driver_kwargs():
+    config = settings.NEO4J
+    return {
+        "auth": (config["USER"], config["PASSWORD"]),
+        "max_connection_pool_size": config["MAX_CONNECTION_POOL_SIZE"],
+        "connection_acquisition_timeout": config["CONNECTION_ACQUISITION_TIMEOUT"],
+        "max_connection_lifetime": config["MAX_CONNECTION_LIFETIME"],
+    }
+
+
+def get_driver():
+    """Return the process-wide Neo4j driver, creating it on first call"""
+    global _driver
+
+    if _driver is None:
+        with _driver_lock:
+            if _driver is None:
+                _driver = GraphDatabase.driver(settings.NEO4J["URI"], **_driver_kwargs())
+    return _driver
+
+
+def close_driver():
+    """Close the shared driver (called automatically on interpreter exit)"""
+    global _driver
+
+    with _driver_lock:
+        if _driver is not None:
+            _driver.close()
+            _driver = None
+
+
+atexit.register(close_driver)
+
+
+def get_session(**kwargs):
+    """Open a session on the shared driver for the configured database"""
+    kwargs.setdefault("database", settings.NEO4J["DATABASE"])
+    return _TrackedSession(get_driver().session(**kwargs))
+
+
+# =============================
+# SHARED ASYNC NEO4J DRIVER
+# =============================
+# One async driver per process, bound to the event loop it was created
+# on. Under the ASGI server a worker runs a single loop, and the driver is
+# closed by the lifespan shutdown (see lifespan() and rpg_backend/asgi.py).
+# Django gives every async request under WSGI its own short-lived loop,
+# so the async views refuse to run there (AsyncNeo4jView.dispatch).
+
+_async_driver = None
+_async_driver_loop = None
+
+
+class AsyncDriverUnavailable(RuntimeError):
+    """The async driver belongs to another event loop"""
+
+
+def get_async_driver():
+    """Return the process-wide async driver, creating it on the running loop"""
+    global _async_driver, _async_driver_loop
+
+    loop = asyncio.get_running_loop()
+
+    if _async_driver is None:
+        _async_driver = AsyncGraphDatabase.driver(settings.NEO4J["URI"], **_driver_kwargs())
+        _async_driver_loop = loop
+    elif _async_driver_loop is not loop:
+        raise AsyncDriverUnavailable(
+            "The async Neo4j driver is bound to another event loop, serve the async endpoints under ASGI"
+        )
+    return _async_driver
+
+
+async def close_async_driver():
+    """Close the async driver (called by the ASGI lifespan shutdown)"""
+    global _async_driver, _async_driver_loop
+
+    driver, _async_driver, _async_driver_loop = _async_driver, None, None
+    if driver is not None:
+        await driver.close()
+
+
+async def lifespan(scope, receive, send):
+    """ASGI lifespan protocol: nothing to do on startup, closes the async driver on shutdown"""
+    while True:
+        message = await receive()
+
+        if message["type"] == "lifespan.startup":
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            await close_async_driver()
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+def get_async_session(**kwargs):
+    """Open an async session for the configured database"""
+    kwargs.setdefault("database", settings.NEO4J["DATABASE"])
+    return get_async_driver().session(**kwargs)
+
+
+async def async_execute_query(query, parameters=None):
+    """Async counterpart of Neo4jConnection.execute_query"""
+    statement = profiled(query) if profiling_enabled() else query
+
+    async with get_async_session() as session:
+        result = await session.run(statement, parameters or {})
+        records = [record.data() async for record in result]
+        record_query(statement, parameters, await result.consume())
+        return records
+
+
+async def async_execute_write(work, *args, **kwargs):
+    """Run `await work(tx, ...)` in one managed async write transaction"""
+    attempt = {}
+
+    async def recorded(tx, *args, **kwargs):
+        # as in execute_write, only the committed attempt's callbacks run
+        tx = attempt["tx"] = AsyncRecordingTransaction(tx)
+        value = await work(tx, *args, **kwargs)
+        await tx.record()
+        return value
+
+    async with get_async_session() as session:
+        value = await session.execute_write(recorded, *args, **kwargs)
+
+    attempt["tx"].committed()
+    return value
+
+
+class _TrackedSession:
+    """Session wrapper that keeps the in-use counters used by pool_stats()"""
+
+    def __init__(self, session):
+        self._session = session
+
+    def __enter__(self):
+        with _stats_lock:
+            _session_stats["sessions_opened"] += 1
+            _session_stats["sessions_in_use"] += 1
+            _session_stats["peak_sessions_in_use"] = max(
+                _session_stats["peak_sessions_in_use"],
+                _session_stats["sessions_in_use"],
+            )
+        return self._session.__enter__()
+
+    def __exit__(self, *exc_info):
+        try:
+            return self._session.__exit__(*exc_info)
+        finally:
+            with _stats_lock:
+                _session_stats["sessions_in_use"] -= 1
+
+
+def pool_stats():
+    """Snapshot of the driver pool, used to size MAX_CONNECTION_POOL_SIZE"""
+    config = settings.NEO4J
+
+    with _stats_lock:
+        stats = dict(_session_stats)
+
+    stats.update({
+        "driver_created": _driver is not None,
+        "max_connection_pool_size": config["MAX_CONNECTION_POOL_SIZE"],
+        "connection_acquisition_timeout": config["CONNECTION_ACQUISITION_TIMEOUT"],
+        "max_connection_lifetime": config["MAX_CONNECTION_LIFETIME"],
+        "addresses": {},
+    })
+
+    # The driver has no public pool API, so read its internals defensively
+    pool = getattr(_driver, "_pool", None)
+    connections = getattr(pool, "connections", None) or {}
+    for address, conns in list(connections.items()):
+        conns = list(conns)
+        in_use = sum(1 for c in conns if getattr(c, "in_use", False))
+        stats["addresses"][str(address)] = {
+            "open": len(conns),
+            "in_use": in_use,
+            "idle": len(conns) - in_use,
+        }
+
+    return stats
+
+
+class Neo4jConnection:
+    """Per-request helper on top of the shared driver"""
+
+    def __init__(self):
+        self.driver = get_driver()
+
+    def close(self):
+        # The driver is shared by the whole process; nothing to release here
+        pass
+
+    def execute_query(self, query, parameters=None):
+        statement = profiled(query) if profiling_enabled() else query
+
+        with get_session() as session:
+            result = session.run(statement, parameters or {})
+            records = [record.data() for record in result]
+            record_query(statement, parameters, result.consume())
+            return records
+
+    def execute_write(self, work, *args, **kwargs):
+        """Run `work(tx, ...)` in one managed (retried) write transaction"""
+        attempt = {}
+
+        def recorded(tx, *args, **kwargs):
+            # a retry starts over, so only the committed attempt's callbacks run
+            tx = attempt["tx"] = RecordingTransaction(tx)
+            value = work(tx, *args, **kwargs)
+            tx.record()
+            return value
+
+        with get_session() as session:
+            value = session.execute_write(recorded, *args, **kwargs)
+
+        attempt["tx"].committed()
+        return value
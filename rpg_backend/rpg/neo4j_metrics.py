@@ -0,0 +1,236 @@
+import contextvars
+import hashlib
+import json
+import logging
+import re
+import threading
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+
+# =============================
+# PER-QUERY NEO4J STATISTICS
+# =============================
+# Every statement sent through neo4j_connection is recorded from its result
+# summary and aggregated per (endpoint, query fingerprint).
+
+logger = logging.getLogger("rpg.neo4j")
+
+COUNTER_FIELDS = (
+    "nodes_created", "nodes_deleted",
+    "relationships_created", "relationships_deleted",
+    "properties_set", "labels_added", "labels_removed",
+)
+
+# Endpoint of the request being served; "-" outside a request (commands, shell)
+current_endpoint = contextvars.ContextVar("neo4j_endpoint", default="-")
+
+# Distinct (endpoint, fingerprint) entries kept; statements beyond that
+# (e.g. one per ?fields= projection) are folded into a single overflow entry
+MAX_QUERY_STATS = 1000
+OVERFLOW_KEY = ("*", "other")
+
+_stats = {}
+_stats_lock = threading.Lock()
+
+
+def fingerprint(query):
+    """Whitespace-normalised query text and a short hash identifying it"""
+    text = re.sub(r"\s+", " ", query).strip()
+    return hashlib.md5(text.encode()).hexdigest()[:12], text
+
+
+def params_shape(parameters):
+    """Parameter names and value types, never the values themselves"""
+    shape = {}
+    for key, value in (parameters or {}).items():
+        if isinstance(value, (list, tuple)):
+            shape[key] = f"list[{len(value)}]"
+        else:
+            shape[key] = type(value).__name__
+    return shape
+
+
+def profile_db_hits(plan):
+    """Sum the db hits over a PROFILE plan"""
+    if not plan:
+        return 0
+    return plan.get("dbHits", 0) + sum(profile_db_hits(child) for child in plan.get("children", []))
+
+
+def profiling_enabled():
+    return settings.NEO4J["PROFILE_QUERIES"]
+
+
+def profiled(query):
+    """Prefix `query` with PROFILE unless it already is an EXPLAIN/PROFILE"""
+    if re.match(r"\s*(EXPLAIN|PROFILE)\b", query, re.IGNORECASE):
+        return query
+    return f"PROFILE {query}"
+
+
+def record_query(query, parameters, summary):
+    """Fold one result summary into the per-endpoint statistics"""
+    key, text = fingerprint(re.sub(r"^\s*PROFILE\s+", "", query, flags=re.IGNORECASE))
+    endpoint = current_endpoint.get()
+
+    available_ms = summary.result_available_after or 0
+    consumed_ms = summary.result_consumed_after or 0
+    server_ms = available_ms + consumed_ms
+    counters = summary.counters
+    db_hits = profile_db_hits(summary.profile) if summary.profile else None
+
+    with _stats_lock:
+        stats_key = (endpoint, key)
+        if stats_key not in _stats and len(_stats) >= MAX_QUERY_STATS:
+            stats_key = OVERFLOW_KEY
+        entry = _stats.get(stats_key)
+        if entry is None:
+            overflow = stats_key == OVERFLOW_KEY
+            entry = _stats[stats_key] = {
+                "endpoint": stats_key[0],
+                "fingerprint": stats_key[1],
+                "query": "(statements beyond MAX_QUERY_STATS)" if overflow else text,
+                "params": {} if overflow else params_shape(parameters),
+                "count": 0,
+                "total_ms": 0,
+                "max_ms": 0,
+                "available_after_ms": 0,
+                "consumed_after_ms": 0,
+                "db_hits": 0,
+                "profiled": 0,
+                "counters": dict.fromkeys(COUNTER_FIELDS, 0),
+            }
+
+        entry["count"] += 1
+        entry["total_ms"] += server_ms
+        entry["max_ms"] = max(entry["max_ms"], server_ms)
+        entry["available_after_ms"] += available_ms
+        entry["consumed_after_ms"] += consumed_ms
+        for field in COUNTER_FIELDS:
+            entry["counters"][field] += getattr(counters, field, 0)
+        if db_hits is not None:
+            entry["db_hits"] += db_hits
+            entry["profiled"] += 1
+
+    if server_ms >= settings.NEO4J["SLOW_QUERY_MS"]:
+        logger.warning(json.dumps({
+            "event": "neo4j_slow_query",
+            "endpoint": endpoint,
+            "fingerprint": key,
+            "query": text,
+            "params": params_shape(parameters),
+            "available_after_ms": available_ms,
+            "consumed_after_ms": consumed_ms,
+            "db_hits": db_hits,
+        }))
+
+
+def query_stats():
+    """Aggregated statistics, most expensive statements first"""
+    with _stats_lock:
+        entries = [{**entry, "counters": dict(entry["counters"])} for entry in _stats.values()]
+
+    for entry in entries:
+        entry["avg_ms"] = round(entry["total_ms"] / entry["count"], 2)
+
+    return sorted(entries, key=lambda e: e["total_ms"], reverse=True)
+
+
+def reset_query_stats():
+    with _stats_lock:
+        _stats.clear()
+
+
+# =============================
+# INSTRUMENTED TRANSACTIONS
+# =============================
+
+class RecordingTransaction:
+    """
+    Wraps a managed transaction and records every statement run on it.
+    Callbacks registered with on_commit() run once the caller has seen
+    the transaction commit (see committed()).
+    """
+
+    def __init__(self, tx):
+        self._tx = tx
+        self._runs = []
+        self._on_commit = []
+
+    def on_commit(self, callback):
+        self._on_commit.append(callback)
+
+    def committed(self):
+        for callback in self._on_commit:
+            callback()
+
+    def run(self, query, parameters=None, **kwargs):
+        if profiling_enabled():
+            query = profiled(query)
+        result = self._tx.run(query, parameters, **kwargs)
+        self._runs.append((query, {**(parameters or {}), **kwargs}, result))
+        return result
+
+    def record(self):
+        for query, parameters, result in self._runs:
+            record_query(query, parameters, result.consume())
+
+    def __getattr__(self, name):
+        return getattr(self._tx, name)
+
+
+class AsyncRecordingTransaction(RecordingTransaction):
+    """Async counterpart of RecordingTransaction"""
+
+    async def run(self, query, parameters=None, **kwargs):
+        if profiling_enabled():
+            query = profiled(query)
+        result = await self._tx.run(query, parameters, **kwargs)
+        self._runs.append((query, {**(parameters or {}), **kwargs}, result))
+        return result
+
+    async def record(self):
+        for query, parameters, result in self._runs:
+            record_query(query, parameters, await result.consume())
+
+
+# =============================
+# ENDPOINT TAGGING
+# =============================
+
+class Neo4jQueryEndpointMiddleware:
+    """
+    Tags the Neo4j statements of a request with its URL route. The route
+    comes from request.resolver_match in process_view (no second resolve);
+    requests that never reach a view are tagged with their path.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self._is_async = iscoroutinefunction(get_response)
+        if self._is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self._is_async:
+            return self.__acall__(request)
+
+        token = current_endpoint.set(f"{request.method} {request.path_info}")
+        try:
+            return self.get_response(request)
+        finally:
+            current_endpoint.reset(token)
+
+    async def __acall__(self, request):
+        token = current_endpoint.set(f"{request.method} {request.path_info}")
+        try:
+            return await self.get_response(request)
+        finally:
+            current_endpoint.reset(token)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        current_endpoint.set(f"{request.method} /{request.resolver_match.route}")
@@ -0,0 +1,189 @@
+# =============================
+# NEO4J SCHEMA (constraints + indexes)
+# =============================
+# Every endpoint and the migrator look nodes up by {sql_id: ...}.
+# Without a constraint each lookup is a full label scan.
+
+GRAPH_LABELS = [
+    "Character",
+    "Item",
+    "Skill",
+    "Quest",
+    "Guild",
+    "NPC",
+    "Battle",
+    "Transaction",
+    "Inventory",
+    "InventoryItem",
+    "User",
+]
+
+# (label, property) pairs that are filtered or looked up by name
+SECONDARY_INDEXES = [
+    ("Character", "character_name"),
+    ("Character", "level"),
+    ("User", "username"),
+    ("Item", "name"),
+    ("Item", "rarity"),
+    ("Quest", "title"),
+    ("Quest", "status"),
+    ("Guild", "guild_name"),
+    ("Battle", "outcome"),
+]
+
+# Plan operators that mean the lookup went through an index (prefixes, so
+# the ...ByRange and (Locking) variants count too)
+INDEX_OPERATORS = ("NodeUniqueIndexSeek", "NodeIndexSeek", "MultiNodeIndexSeek")
+
+# Plan operators that read every node of a label, or of the whole graph
+SCAN_OPERATORS = ("NodeByLabelScan", "NodeByLabelsScan", "AllNodesScan")
+
+# Parameters for EXPLAIN; the values do not matter, only that they exist
+EXPLAIN_PARAMS = {"id": 0, "after": 0, "limit": 100, "props": {}, "rows": [], "label": "", "count": 1}
+
+
+def constraint_name(label):
+    return f"{label.lower()}_sql_id_unique"
+
+
+def index_name(label, prop):
+    return f"{label.lower()}_{prop}_idx"
+
+
+def schema_statements():
+    """Cypher statements that create the schema (all idempotent)"""
+    statements = []
+
+    for label in GRAPH_LABELS:
+        statements.append(
+            f"CREATE CONSTRAINT {constraint_name(label)} IF NOT EXISTS "
+            f"FOR (n:{label}) REQUIRE n.sql_id IS UNIQUE"
+        )
+
+    # Counter nodes used by neo4j_sequences
+    statements.append(
+        "CREATE CONSTRAINT sequence_label_unique IF NOT EXISTS "
+        "FOR (s:Sequence) REQUIRE s.label IS UNIQUE"
+    )
+
+    for label, prop in SECONDARY_INDEXES:
+        statements.append(
+            f"CREATE INDEX {index_name(label, prop)} IF NOT EXISTS "
+            f"FOR (n:{label}) ON (n.{prop})"
+        )
+
+    return statements
+
+
+def ensure_schema(session, wait_seconds=300):
+    """Create constraints and indexes, then wait until they are online"""
+    statements = schema_statements()
+
+    for statement in statements:
+        session.run(statement).consume()
+
+    session.run("CALL db.awaitIndexes($timeout)", timeout=wait_seconds).consume()
+    return statements
+
+
+def view_queries():
+    """
+    (name, query, labels) for the Cypher the Neo4j views run: every
+    resource's detail read, list page, create and bulk create (with their
+    link subqueries) and the sequence update. `labels` are the labels the
+    query looks nodes up in; each must be read through an index seek.
+    """
+    # imported here: the views pull in the driver, this module stays standalone
+    from rpg_backend.rpg.neo4j_sequences import ADVANCE_SEQUENCE, SEQUENCE_EPOCH
+    from rpg_backend.rpg.neo4j_writes import create_node_query, create_nodes_query
+    from rpg_backend.rpg.neo4j_views.pagination import DEFAULT_PAGE_SIZE, page_query
+    from rpg_backend.rpg.neo4j_views.battle_view import BATTLE_DETAIL_QUERY, BATTLE_LINKS, BATTLE_LIST_JOINS
+    from rpg_backend.rpg.neo4j_views.character_view import (
+        CHARACTER_DETAIL_QUERY, CHARACTER_LINKS, CHARACTER_LIST_JOINS,
+    )
+    from rpg_backend.rpg.neo4j_views.guild_view import GUILD_DETAIL_QUERY
+    from rpg_backend.rpg.neo4j_views.item_view import ITEM_DETAIL_QUERY
+    from rpg_backend.rpg.neo4j_views.npc_view import NPC_DETAIL_QUERY
+    from rpg_backend.rpg.neo4j_views.quest_view import QUEST_DETAIL_QUERY, QUEST_LINKS, QUEST_LIST_JOINS
+    from rpg_backend.rpg.neo4j_views.skill_view import SKILL_DETAIL_QUERY
+    from rpg_backend.rpg.neo4j_views.transaction_view import (
+        TRANSACTION_DETAIL_QUERY, TRANSACTION_LINKS, TRANSACTION_LIST_JOINS,
+    )
+    from rpg_backend.rpg.neo4j_views.user_view import USER_DETAIL_QUERY
+
+    # label, list variable, detail query, list joins, create links (None: read-only)
+    resources = [
+        ("Character", "c", CHARACTER_DETAIL_QUERY, CHARACTER_LIST_JOINS, CHARACTER_LINKS),
+        ("Item", "i", ITEM_DETAIL_QUERY, (), ()),
+        ("Skill", "s", SKILL_DETAIL_QUERY, (), ()),
+        ("Quest", "q", QUEST_DETAIL_QUERY, QUEST_LIST_JOINS, QUEST_LINKS),
+        ("Guild", "g", GUILD_DETAIL_QUERY, (), ()),
+        ("NPC", "n", NPC_DETAIL_QUERY, (), ()),
+        ("Battle", "b", BATTLE_DETAIL_QUERY, BATTLE_LIST_JOINS, BATTLE_LINKS),
+        ("Transaction", "t", TRANSACTION_DETAIL_QUERY, TRANSACTION_LIST_JOINS, TRANSACTION_LINKS),
+        ("User", "u", USER_DETAIL_QUERY, (), None),
+    ]
+
+    queries = []
+    for label, var, detail, joins, links in resources:
+        page, _ = page_query(label, var, DEFAULT_PAGE_SIZE, None, joins)
+        queries.append((f"{label} detail", detail, [label]))
+        queries.append((f"{label} page", page, [label]))
+
+        if links is None:
+            continue
+        targets = sorted({target for _, target, _ in links})
+        queries.append((f"{label} create", create_node_query(label, links), targets))
+        queries.append((f"{label} bulk create", create_nodes_query(label, links), targets))
+        queries.append((f"{label} sequence", ADVANCE_SEQUENCE.format(label=label), ["Sequence"]))
+
+    queries.append(("Sequence epoch", SEQUENCE_EPOCH, ["Sequence"]))
+    return queries
+
+
+def _plan_operators(plan):
+    """Flatten an EXPLAIN plan tree into (operator, details) pairs"""
+    if not plan:
+        return []
+
+    args = plan.get("args") or plan.get("arguments") or {}
+    operators = [(plan.get("operatorType", "").split("@")[0], str(args.get("Details", "")))]
+    for child in plan.get("children", []):
+        operators.extend(_plan_operators(child))
+    return operators
+
+
+def plan_problems(plan, labels):
+    """
+    What keeps a plan from being index-only: label or all-node scans, and
+    any of `labels` that no index seek reads. Empty when the plan is fine.
+    """
+    operators = _plan_operators(plan)
+    problems = [
+        f"{operator} {details}".strip()
+        for operator, details in operators
+        if operator.startswith(SCAN_OPERATORS)
+    ]
+
+    seeks = [details for operator, details in operators if operator.startswith(INDEX_OPERATORS)]
+    for label in labels:
+        if not any(f":{label}(" in details for details in seeks):
+            problems.append(f"no index seek on :{label}")
+
+    return problems
+
+
+def explain_view_queries(session):
+    """
+    EXPLAIN every view query.
+    Returns a list of (name, problems, operators); no problems means index-only.
+    """
+    report = []
+
+    for name, query, labels in view_queries():
+        summary = session.run(f"EXPLAIN {query}", EXPLAIN_PARAMS).consume()
+        problems = plan_problems(summary.plan, labels)
+        operators = [operator for operator, _ in _plan_operators(summary.plan)]
+        report.append((name, problems, operators))
+
+    return report
@@ -0,0 +1,155 @@
+from django.conf import settings
+
+from rpg_backend.rpg.id_blocks import IdBlocks
+
+
+# =============================
+# NEO4J ID SEQUENCES
+# =============================
+# One (:Sequence {label}) counter node per graph label replaces the
+# old "max(sql_id) + 1" scan. Incrementing the counter write-locks the
+# node, so concurrent creates are serialised on it and never collide.
+#
+# seq.epoch counts the syncs: sync_sequences() can move a counter below
+# ids other workers still hold in memory, so blocks remember the epoch
+# they were reserved in and are dropped once it changes. Workers re-read
+# the epoch at most every NEO4J["ID_EPOCH_CHECK_SECONDS"], so ids are
+# served from memory in between. The :Sequence nodes survive a
+# re-migration (migrate_to_neo4j keeps them), so the epoch only grows.
+
+# The first time a label's counter is used it is seeded from the highest
+# existing sql_id (an index-backed ORDER BY, run only on creation).
+ADVANCE_SEQUENCE = """
+MERGE (seq:Sequence {{label: $label}})
+ON CREATE SET seq.value = coalesce(
+    COLLECT {{
+        MATCH (n:{label}) WHERE n.sql_id IS NOT NULL
+        RETURN n.sql_id ORDER BY n.sql_id DESC LIMIT 1
+    }}[0],
+    0
+)
+SET seq.value = seq.value + $count
+RETURN seq.value AS last_id, coalesce(seq.epoch, 0) AS epoch
+"""
+
+# A plain read: takes no lock on the counter
+SEQUENCE_EPOCH = """
+MATCH (seq:Sequence {label: $label})
+RETURN coalesce(seq.epoch, 0) AS epoch
+"""
+
+SYNC_SEQUENCE = """
+OPTIONAL MATCH (n:{label})
+WITH coalesce(max(n.sql_id), 0) AS max_id
+MERGE (seq:Sequence {{label: $label}})
+SET seq.value = max_id, seq.epoch = coalesce(seq.epoch, 0) + 1
+RETURN seq.value AS last_id
+"""
+
+
+def reserve_block(tx, label, size):
+    """Advance the counter for `label` by `size` in `tx`, returns (last id, epoch)"""
+    record = tx.run(ADVANCE_SEQUENCE.format(label=label), label=label, count=size).single()
+    return record["last_id"], record["epoch"]
+
+
+def advance_sequence(tx, label, count=1):
+    """Advance the counter for `label` by `count` and return the new last id"""
+    last_id, _ = reserve_block(tx, label, count)
+    return last_id
+
+
+def sequence_epoch(tx, label):
+    """Current epoch of the `label` counter (0 before its first use)"""
+    record = tx.run(SEQUENCE_EPOCH, label=label).single()
+    return record["epoch"] if record is not None else 0
+
+
+_blocks = IdBlocks()
+
+
+def next_sql_id(tx, label):
+    """
+    Allocate the next sql_id for a new `label` node.
+
+    With NEO4J["ID_BLOCK_SIZE"] == 1 the counter is advanced by one in the
+    caller's write transaction. With a larger block size the whole block
+    is reserved in that same transaction (no second session, so a full
+    pool cannot deadlock), but the rest of it is only handed out once the
+    transaction has committed: a rollback returns the range to the counter.
+    """
+    block_size = settings.NEO4J["ID_BLOCK_SIZE"]
+    # Neo4jConnection.execute_write transactions; anything else takes ids one by one
+    on_commit = getattr(tx, "on_commit", None)
+
+    if block_size <= 1 or on_commit is None:
+        return advance_sequence(tx, label)
+
+    if _blocks.epoch_due(label, settings.NEO4J["ID_EPOCH_CHECK_SECONDS"]):
+        _blocks.set_epoch(label, sequence_epoch(tx, label))
+
+    block = _blocks.get(label)
+    new_id = block.take(_blocks.epoch(label))
+    if new_id is not None:
+        return new_id
+
+    last_id, epoch = reserve_block(tx, label, block_size)
+    return _hand_out_block(on_commit, block, last_id, block_size, epoch)
+
+
+async def async_reserve_block(tx, label, size):
+    """Async counterpart of reserve_block"""
+    result = await tx.run(ADVANCE_SEQUENCE.format(label=label), label=label, count=size)
+    record = await result.single()
+    return record["last_id"], record["epoch"]
+
+
+async def async_sequence_epoch(tx, label):
+    """Async counterpart of sequence_epoch"""
+    record = await (await tx.run(SEQUENCE_EPOCH, label=label)).single()
+    return record["epoch"] if record is not None else 0
+
+
+async def async_next_sql_id(tx, label):
+    """
+    Async counterpart of next_sql_id, sharing its id blocks: async_execute_write
+    transactions (AsyncRecordingTransaction) run on_commit callbacks too
+    """
+    block_size = settings.NEO4J["ID_BLOCK_SIZE"]
+    on_commit = getattr(tx, "on_commit", None)
+
+    if block_size <= 1 or on_commit is None:
+        last_id, _ = await async_reserve_block(tx, label, 1)
+        return last_id
+
+    if _blocks.epoch_due(label, settings.NEO4J["ID_EPOCH_CHECK_SECONDS"]):
+        _blocks.set_epoch(label, await async_sequence_epoch(tx, label))
+
+    block = _blocks.get(label)
+    new_id = block.take(_blocks.epoch(label))
+    if new_id is not None:
+        return new_id
+
+    last_id, epoch = await async_reserve_block(tx, label, block_size)
+    return _hand_out_block(on_commit, block, last_id, block_size, epoch)
+
+
+def _hand_out_block(on_commit, block, last_id, block_size, epoch):
+    """First id of a block reserved in a transaction; the rest once it has committed"""
+    on_commit(lambda: block.refill(last_id, block_size - 1, epoch))
+    return last_id - block_size + 1
+
+
+def sync_sequences(session, labels):
+    """
+    Set every counter to the current max(sql_id), e.g. after a bulk load,
+    and start a new epoch so id blocks reserved before it are dropped
+    """
+    synced = {}
+    for label in labels:
+        record = session.run(SYNC_SEQUENCE.format(label=label), label=label).single()
+        synced[label] = record["last_id"]
+
+    _blocks.clear()
+
+    return synced
@@ -1,9 +1,15 @@
-from .character_view import CharacterNeo4jView
-from .item_view import ItemNeo4jView
-from .skill_view import SkillNeo4jView
-from .quest_view import QuestNeo4jView
-from .guild_view import GuildNeo4jView
-from .npc_view import NPCNeo4jView
-from .battle_view import BattleNeo4jView
-from .transaction_view import TransactionNeo4jView
+from .character_view import CharacterNeo4jView, CharacterBulkNeo4jView
+from .item_view import ItemNeo4jView, ItemBulkNeo4jView
+from .skill_view import SkillNeo4jView, SkillBulkNeo4jView
+from .quest_view import QuestNeo4jView, QuestBulkNeo4jView
+from .guild_view import GuildNeo4jView, GuildBulkNeo4jView
+from .npc_view import NPCNeo4jView, NPCBulkNeo4jView
+from .battle_view import BattleNeo4jView, BattleBulkNeo4jView
+from .transaction_view import TransactionNeo4jView, TransactionBulkNeo4jView
 from .user_view import UserNeo4jView
+from .stats_view import Neo4jPoolStatsView, Neo4jQueryStatsView
+from .async_views import (
+    AsyncCharacterNeo4jView, AsyncItemNeo4jView, AsyncSkillNeo4jView, AsyncQuestNeo4jView,
+    AsyncGuildNeo4jView, AsyncNPCNeo4jView, AsyncBattleNeo4jView, AsyncTransactionNeo4jView,
+    AsyncUserNeo4jView,
+)
@@ -0,0 +1,242 @@
+import asyncio
+import json
+
+from django.core.handlers.asgi import ASGIRequest
+from django.http import JsonResponse
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from django.utils.decorators import method_decorator
+
+from rpg_backend.rpg.neo4j_connection import AsyncDriverUnavailable, async_execute_query, async_execute_write
+from rpg_backend.rpg.neo4j_sequences import async_next_sql_id
+from rpg_backend.rpg.neo4j_writes import create_node_query
+from .pagination import page_params, page_query
+from .battle_view import BATTLE_LINKS, BATTLE_DEFAULTS, BATTLE_LIST_JOINS
+from .character_view import CHARACTER_LINKS, CHARACTER_DEFAULTS, CHARACTER_LIST_JOINS
+from .quest_view import QUEST_LINKS, QUEST_LIST_JOINS
+from .transaction_view import TRANSACTION_LINKS, TRANSACTION_LIST_JOINS
+
+
+# =============================
+# ASYNC NEO4J ENDPOINTS
+# =============================
+# Same resources as the APIViews, built on the async driver so a worker
+# running under the ASGI server can keep many graph queries in flight
+# instead of blocking a thread per Bolt round trip.
+
+
+async def _create_node(tx, label, props, links):
+    """Async counterpart of neo4j_writes.create_node"""
+    props["sql_id"] = await async_next_sql_id(tx, label)
+
+    result = await tx.run(create_node_query(label, links), props=props)
+    return (await result.single()).data()["n"]
+
+
+def _read_json(request):
+    try:
+        body = json.loads(request.body or b"{}")
+    except ValueError:
+        return None
+    return body if isinstance(body, dict) else None
+
+
+def _bad_json():
+    return JsonResponse({"error": "Expected a JSON object"}, status=400)
+
+
+@method_decorator(csrf_exempt, name="dispatch")
+class AsyncNeo4jView(View):
+    """
+    Async list/detail/create/update/delete for one graph label.
+    Subclasses set `label`, `var` and optionally `joins`, `links`, `defaults`.
+    """
+    label = None
+    var = "n"
+    joins = ()
+    links = ()
+    defaults = {}
+    read_only = False
+
+    @property
+    def not_found(self):
+        return JsonResponse({"error": f"{self.label} not found"}, status=404)
+
+    async def dispatch(self, request, *args, **kwargs):
+        # under WSGI every request gets its own event loop, which the
+        # process-wide async driver cannot be shared across
+        if not isinstance(request, ASGIRequest):
+            return JsonResponse({"error": "Async endpoints are only served under ASGI"}, status=501)
+
+        try:
+            return await super().dispatch(request, *args, **kwargs)
+        except AsyncDriverUnavailable as e:
+            return JsonResponse({"error": str(e)}, status=503)
+
+    async def get(self, request, pk=None):
+        if pk is not None:
+            return await self.detail(int(pk))
+
+        try:
+            after, limit, fields = page_params(request)
+        except ValueError as e:
+            return JsonResponse({"error": str(e)}, status=400)
+
+        query, aliases = page_query(self.label, self.var, limit, fields, self.joins)
+        result = await async_execute_query(query, {"after": after, "limit": limit})
+
+        rows = []
+        for record in result:
+            row = record[self.var]
+            for alias in aliases:
+                row[alias] = record[alias]
+            rows.append(row)
+
+        next_cursor = rows[-1]["sql_id"] if len(rows) == limit else None
+        return JsonResponse({"results": rows, "next_cursor": next_cursor})
+
+    async def detail(self, pk):
+        v = self.var
+        matches = "".join(f"\n        {clause}" for clause, _, _ in self.joins)
+        returns = "".join(f", {expr} AS {alias}" for _, expr, alias in self.joins)
+        query = f"""
+        MATCH ({v}:{self.label} {{sql_id: $id}}){matches}
+        RETURN {v}{returns}
+        """
+        result = await async_execute_query(query, {"id": pk})
+
+        if not result:
+            return self.not_found
+
+        node = result[0][v]
+        for _, _, alias in self.joins:
+            node[alias] = result[0][alias]
+        return JsonResponse(node)
+
+    async def post(self, request, pk=None):
+        if self.read_only or pk is not None:
+            return await self.http_method_not_allowed(request)
+
+        body = _read_json(request)
+        if body is None:
+            return _bad_json()
+
+        props = {**self.defaults, **body}
+        node = await async_execute_write(_create_node, self.label, props, self.links)
+        return JsonResponse(node, status=201)
+
+    async def put(self, request, pk=None):
+        if self.read_only or pk is None:
+            return await self.http_method_not_allowed(request)
+
+        body = _read_json(request)
+        if body is None:
+            return _bad_json()
+        body.pop("sql_id", None)
+
+        query = f"MATCH (n:{self.label} {{sql_id: $id}}) SET n += $props RETURN n"
+        result = await async_execute_query(query, {"id": int(pk), "props": body})
+
+        if not result:
+            return self.not_found
+        return JsonResponse(result[0]["n"])
+
+    async def delete(self, request, pk=None):
+        if self.read_only or pk is None:
+            return await self.http_method_not_allowed(request)
+
+        query = f"""
+        MATCH (n:{self.label} {{sql_id: $id}})
+        DETACH DELETE n
+        RETURN count(n) AS deleted
+        """
+        result = await async_execute_query(query, {"id": int(pk)})
+
+        if result[0]["deleted"] == 0:
+            return self.not_found
+        return JsonResponse({"status": f"{self.label} deleted"})
+
+
+class AsyncCharacterNeo4jView(AsyncNeo4jView):
+    label = "Character"
+    var = "c"
+    joins = CHARACTER_LIST_JOINS
+    links = CHARACTER_LINKS
+    defaults = CHARACTER_DEFAULTS
+
+    async def detail(self, pk):
+        """Node, user, guild, skills and quests are fetched concurrently"""
+        params = {"id": pk}
+        node, user, guild, skills, quests = await asyncio.gather(
+            async_execute_query("MATCH (c:Character {sql_id: $id}) RETURN c", params),
+            async_execute_query(
+                "MATCH (:Character {sql_id: $id})-[:USER]->(u:User) RETURN u.username AS name LIMIT 1", params
+            ),
+            async_execute_query(
+                "MATCH (:Character {sql_id: $id})-[:GUILD]->(g:Guild) RETURN g.guild_name AS name LIMIT 1", params
+            ),
+            async_execute_query(
+                "MATCH (:Character {sql_id: $id})-[:SKILLS]->(s:Skill) RETURN s.name AS name", params
+            ),
+            async_execute_query(
+                "MATCH (:Character {sql_id: $id})-[:QUESTS]->(q:Quest) RETURN q.title AS name", params
+            ),
+        )
+
+        if not node:
+            return self.not_found
+
+        character = node[0]["c"]
+        character["user_name"] = user[0]["name"] if user else None
+        character["guild_name"] = guild[0]["name"] if guild else None
+        character["skills"] = [r["name"] for r in skills]
+        character["quests"] = [r["name"] for r in quests]
+        return JsonResponse(character)
+
+
+class AsyncItemNeo4jView(AsyncNeo4jView):
+    label = "Item"
+    var = "i"
+
+
+class AsyncSkillNeo4jView(AsyncNeo4jView):
+    label = "Skill"
+    var = "s"
+
+
+class AsyncQuestNeo4jView(AsyncNeo4jView):
+    label = "Quest"
+    var = "q"
+    joins = QUEST_LIST_JOINS
+    links = QUEST_LINKS
+
+
+class AsyncGuildNeo4jView(AsyncNeo4jView):
+    label = "Guild"
+    var = "g"
+
+
+class AsyncNPCNeo4jView(AsyncNeo4jView):
+    label = "NPC"
+    var = "n"
+
+
+class AsyncBattleNeo4jView(AsyncNeo4jView):
+    label = "Battle"
+    var = "b"
+    joins = BATTLE_LIST_JOINS
+    links = BATTLE_LINKS
+    defaults = BATTLE_DEFAULTS
+
+
+class AsyncTransactionNeo4jView(AsyncNeo4jView):
+    label = "Transaction"
+    var = "t"
+    joins = TRANSACTION_LIST_JOINS
+    links = TRANSACTION_LINKS
+
+
+class AsyncUserNeo4jView(AsyncNeo4jView):
+    label = "User"
+    var = "u"
+    read_only = True
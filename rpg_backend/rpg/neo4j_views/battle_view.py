@@ -1,26 +1,34 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status, permissions
-from neo4j import GraphDatabase
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
-import os
 
+from rpg_backend.rpg.neo4j_connection import Neo4jConnection
+from rpg_backend.rpg.neo4j_writes import create_node
+from .bulk_view import Neo4jBulkCreateView
+from .pagination import paginated_list
 
-class Neo4jConnection:
-    def __init__(self):
-        self.uri = os.environ.get("NEO4J_URI", "bolt://localhost:7687")
-        self.user = os.environ.get("NEO4J_USER", "neo4j")
-        self.password = os.environ.get("NEO4J_PASSWORD", "password")
-        self.driver = GraphDatabase.driver(self.uri, auth=(self.user, self.password))
-    
-    def close(self):
-        self.driver.close()
-    
-    def execute_query(self, query, parameters=None):
-        with self.driver.session() as session:
-            result = session.run(query, parameters or {})
-            return [record.data() for record in result]
+# (relationship type, target label, property holding the target sql_id)
+BATTLE_LINKS = [
+    ("CHARACTER", "Character", "character_id"),
+]
+BATTLE_DEFAULTS = {
+    'xp': 0,
+    'money': 0,
+}
+
+# Related names added to each list row: (match clause, expression, alias)
+BATTLE_LIST_JOINS = [
+    ("OPTIONAL MATCH (b)-[:CHARACTER]->(c:Character)", "c.character_name", "character_name"),
+]
+
+
+BATTLE_DETAIL_QUERY = """
+MATCH (b:Battle {sql_id: $id})
+OPTIONAL MATCH (b)-[:CHARACTER]->(c:Character)
+RETURN b, c.character_name as character_name
+"""
 
 
 @method_decorator(csrf_exempt, name="dispatch")
@@ -33,12 +41,7 @@ class BattleNeo4jView(APIView):
         
         try:
             if battle_id:
-                query = """
-                MATCH (b:Battle {sql_id: $id})
-                OPTIONAL MATCH (b)-[:CHARACTER]->(c:Character)
-                RETURN b, c.character_name as character_name
-                """
-                result = conn.execute_query(query, {"id": int(battle_id)})
+                result = conn.execute_query(BATTLE_DETAIL_QUERY, {"id": int(battle_id)})
                 
                 if not result:
                     return Response({"error": "Battle not found"}, status=status.HTTP_404_NOT_FOUND)
@@ -49,21 +52,8 @@ class BattleNeo4jView(APIView):
                 
                 return Response(battle, status=status.HTTP_200_OK)
             else:
-                query = """
-                MATCH (b:Battle)
-                OPTIONAL MATCH (b)-[:CHARACTER]->(c:Character)
-                RETURN b, c.character_name as character_name
-                ORDER BY b.sql_id
-                """
-                result = conn.execute_query(query)
-                
-                battles = []
-                for record in result:
-                    battle = record['b']
-                    battle['character_name'] = record['character_name']
-                    battles.append(battle)
-                
-                return Response(battles, status=status.HTTP_200_OK)
+                # Keyset page: ?after=<sql_id>&limit=<n>&fields=a,b
+                return paginated_list(conn, request, "Battle", "b", BATTLE_LIST_JOINS)
         
         finally:
             conn.close()
@@ -73,33 +63,12 @@ class BattleNeo4jView(APIView):
         conn = Neo4jConnection()
         
         try:
-            body = request.data.copy()
-            
-            max_id_query = "MATCH (b:Battle) RETURN coalesce(max(b.sql_id), 0) as max_id"
-            max_result = conn.execute_query(max_id_query)
-            new_id = max_result[0]['max_id'] + 1
+            body = {**BATTLE_DEFAULTS, **request.data}
             
-            body['sql_id'] = new_id
-            body.setdefault('xp', 0)
-            body.setdefault('money', 0)
+            # Node, sql_id and relationships are written in one transaction
+            node = conn.execute_write(create_node, "Battle", body, BATTLE_LINKS)
             
-            query = """
-            CREATE (b:Battle)
-            SET b = $props
-            RETURN b
-            """
-            result = conn.execute_query(query, {"props": body})
-            
-            # Create character relationship if provided
-            if 'character_id' in body:
-                rel_query = """
-                MATCH (b:Battle {sql_id: $battle_id})
-                MATCH (c:Character {sql_id: $char_id})
-                MERGE (b)-[:CHARACTER]->(c)
-                """
-                conn.execute_query(rel_query, {"battle_id": new_id, "char_id": body['character_id']})
-            
-            return Response(result[0]['b'], status=status.HTTP_201_CREATED)
+            return Response(node, status=status.HTTP_201_CREATED)
         
         finally:
             conn.close()
@@ -146,3 +115,10 @@ class BattleNeo4jView(APIView):
         
         finally:
             conn.close()
+
+
+class BattleBulkNeo4jView(Neo4jBulkCreateView):
+    """POST a JSON array of battles"""
+    label = "Battle"
+    links = BATTLE_LINKS
+    defaults = BATTLE_DEFAULTS
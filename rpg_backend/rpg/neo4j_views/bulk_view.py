@@ -0,0 +1,51 @@
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework import status, permissions
+from django.views.decorators.csrf import csrf_exempt
+from django.utils.decorators import method_decorator
+
+from rpg_backend.rpg.neo4j_connection import Neo4jConnection
+from rpg_backend.rpg.neo4j_writes import create_nodes
+
+MAX_BULK_ROWS = 10000
+
+
+@method_decorator(csrf_exempt, name="dispatch")
+class Neo4jBulkCreateView(APIView):
+    """
+    POST a JSON array to create many nodes in one transaction.
+    Subclasses set `label`, `links` and `defaults`.
+    """
+    permission_classes = [permissions.AllowAny]
+
+    label = None
+    links = ()
+    defaults = {}
+
+    def post(self, request):
+        """Create many nodes (and their relationships) at once"""
+        if not isinstance(request.data, list):
+            return Response({"error": "Expected a JSON array"}, status=status.HTTP_400_BAD_REQUEST)
+
+        if len(request.data) > MAX_BULK_ROWS:
+            return Response(
+                {"error": f"At most {MAX_BULK_ROWS} rows per request"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        rows = []
+        for entry in request.data:
+            if not isinstance(entry, dict):
+                return Response({"error": "Every entry must be an object"}, status=status.HTTP_400_BAD_REQUEST)
+            row = {**self.defaults, **entry}
+            row.pop('sql_id', None)
+            rows.append(row)
+
+        conn = Neo4jConnection()
+
+        try:
+            nodes = conn.execute_write(create_nodes, self.label, rows, self.links)
+            return Response(nodes, status=status.HTTP_201_CREATED)
+
+        finally:
+            conn.close()
@@ -1,26 +1,43 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status, permissions
-from neo4j import GraphDatabase
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
-import os
 
+from rpg_backend.rpg.neo4j_connection import Neo4jConnection
+from rpg_backend.rpg.neo4j_writes import create_node
+from .bulk_view import Neo4jBulkCreateView
+from .pagination import paginated_list
 
-class Neo4jConnection:
-    def __init__(self):
-        self.uri = os.environ.get("NEO4J_URI", "bolt://localhost:7687")
-        self.user = os.environ.get("NEO4J_USER", "neo4j")
-        self.password = os.environ.get("NEO4J_PASSWORD", "password")
-        self.driver = GraphDatabase.driver(self.uri, auth=(self.user, self.password))
-    
-    def close(self):
-        self.driver.close()
-    
-    def execute_query(self, query, parameters=None):
-        with self.driver.session() as session:
-            result = session.run(query, parameters or {})
-            return [record.data() for record in result]
+# (relationship type, target label, property holding the target sql_id)
+CHARACTER_LINKS = [
+    ("USER", "User", "user_id"),
+    ("GUILD", "Guild", "guild_id"),
+]
+CHARACTER_DEFAULTS = {
+    'level': 1,
+    'hp': 100,
+    'mana': 50,
+    'xp': 0,
+    'gold': 0,
+}
+
+# Related names added to each list row: (match clause, expression, alias)
+CHARACTER_LIST_JOINS = [
+    ("OPTIONAL MATCH (c)-[:USER]->(u:User)", "u.username", "user_name"),
+    ("OPTIONAL MATCH (c)-[:GUILD]->(g:Guild)", "g.guild_name", "guild_name"),
+]
+
+# Each relationship type is collected by its own pattern comprehension, so
+# the row count stays at one per character instead of skills x quests.
+CHARACTER_DETAIL_QUERY = """
+MATCH (c:Character {sql_id: $id})
+RETURN c,
+       head([(c)-[:USER]->(u:User) | u.username]) AS user_name,
+       head([(c)-[:GUILD]->(g:Guild) | g.guild_name]) AS guild_name,
+       [(c)-[:SKILLS]->(s:Skill) | s.name] AS skills,
+       [(c)-[:QUESTS]->(q:Quest) | q.title] AS quests
+"""
 
 
 @method_decorator(csrf_exempt, name="dispatch")
@@ -33,19 +50,7 @@ class CharacterNeo4jView(APIView):
         
         try:
             if char_id:
-                query = """
-                MATCH (c:Character {sql_id: $id})
-                OPTIONAL MATCH (c)-[:USER]->(u:User)
-                OPTIONAL MATCH (c)-[:GUILD]->(g:Guild)
-                OPTIONAL MATCH (c)-[:SKILLS]->(s:Skill)
-                OPTIONAL MATCH (c)-[:QUESTS]->(q:Quest)
-                RETURN c, 
-                       u.username as user_name,
-                       g.guild_name as guild_name,
-                       collect(DISTINCT s.name) as skills,
-                       collect(DISTINCT q.title) as quests
-                """
-                result = conn.execute_query(query, {"id": int(char_id)})
+                result = conn.execute_query(CHARACTER_DETAIL_QUERY, {"id": int(char_id)})
                 
                 if not result:
                     return Response({"error": "Character not found"}, status=status.HTTP_404_NOT_FOUND)
@@ -59,23 +64,8 @@ class CharacterNeo4jView(APIView):
                 
                 return Response(character, status=status.HTTP_200_OK)
             else:
-                query = """
-                MATCH (c:Character)
-                OPTIONAL MATCH (c)-[:USER]->(u:User)
-                OPTIONAL MATCH (c)-[:GUILD]->(g:Guild)
-                RETURN c, u.username as user_name, g.guild_name as guild_name
-                ORDER BY c.sql_id
-                """
-                result = conn.execute_query(query)
-                
-                characters = []
-                for record in result:
-                    char = record['c']
-                    char['user_name'] = record['user_name']
-                    char['guild_name'] = record['guild_name']
-                    characters.append(char)
-                
-                return Response(characters, status=status.HTTP_200_OK)
+                # Keyset page: ?after=<sql_id>&limit=<n>&fields=a,b
+                return paginated_list(conn, request, "Character", "c", CHARACTER_LIST_JOINS)
         
         finally:
             conn.close()
@@ -85,45 +75,12 @@ class CharacterNeo4jView(APIView):
         conn = Neo4jConnection()
         
         try:
-            body = request.data.copy()
-            
-            # Get the highest sql_id and increment
-            max_id_query = "MATCH (c:Character) RETURN coalesce(max(c.sql_id), 0) as max_id"
-            max_result = conn.execute_query(max_id_query)
-            new_id = max_result[0]['max_id'] + 1
-            
-            body['sql_id'] = new_id
-            body.setdefault('level', 1)
-            body.setdefault('hp', 100)
-            body.setdefault('mana', 50)
-            body.setdefault('xp', 0)
-            body.setdefault('gold', 0)
+            body = {**CHARACTER_DEFAULTS, **request.data}
             
-            query = """
-            CREATE (c:Character)
-            SET c = $props
-            RETURN c
-            """
-            result = conn.execute_query(query, {"props": body})
-            
-            # Create relationships if provided
-            if 'user_id' in body:
-                rel_query = """
-                MATCH (c:Character {sql_id: $char_id})
-                MATCH (u:User {sql_id: $user_id})
-                MERGE (c)-[:USER]->(u)
-                """
-                conn.execute_query(rel_query, {"char_id": new_id, "user_id": body['user_id']})
+            # Node, sql_id and relationships are written in one transaction
+            node = conn.execute_write(create_node, "Character", body, CHARACTER_LINKS)
             
-            if 'guild_id' in body:
-                rel_query = """
-                MATCH (c:Character {sql_id: $char_id})
-                MATCH (g:Guild {sql_id: $guild_id})
-                MERGE (c)-[:GUILD]->(g)
-                """
-                conn.execute_query(rel_query, {"char_id": new_id, "guild_id": body['guild_id']})
-            
-            return Response(result[0]['c'], status=status.HTTP_201_CREATED)
+            return Response(node, status=status.HTTP_201_CREATED)
         
         finally:
             conn.close()
@@ -172,3 +129,10 @@ class CharacterNeo4jView(APIView):
         
         finally:
             conn.close()
+
+
+class CharacterBulkNeo4jView(Neo4jBulkCreateView):
+    """POST a JSON array of characters"""
+    label = "Character"
+    links = CHARACTER_LINKS
+    defaults = CHARACTER_DEFAULTS
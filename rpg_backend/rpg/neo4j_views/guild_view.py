@@ -1,26 +1,16 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status, permissions
-from neo4j import GraphDatabase
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
-import os
 
+from rpg_backend.rpg.neo4j_connection import Neo4jConnection
+from rpg_backend.rpg.neo4j_writes import create_node
+from .bulk_view import Neo4jBulkCreateView
+from .pagination import paginated_list
 
-class Neo4jConnection:
-    def __init__(self):
-        self.uri = os.environ.get("NEO4J_URI", "bolt://localhost:7687")
-        self.user = os.environ.get("NEO4J_USER", "neo4j")
-        self.password = os.environ.get("NEO4J_PASSWORD", "password")
-        self.driver = GraphDatabase.driver(self.uri, auth=(self.user, self.password))
-    
-    def close(self):
-        self.driver.close()
-    
-    def execute_query(self, query, parameters=None):
-        with self.driver.session() as session:
-            result = session.run(query, parameters or {})
-            return [record.data() for record in result]
+
+GUILD_DETAIL_QUERY = "MATCH (g:Guild {sql_id: $id}) RETURN g"
 
 
 @method_decorator(csrf_exempt, name="dispatch")
@@ -33,19 +23,15 @@ class GuildNeo4jView(APIView):
         
         try:
             if guild_id:
-                query = "MATCH (g:Guild {sql_id: $id}) RETURN g"
-                result = conn.execute_query(query, {"id": int(guild_id)})
+                result = conn.execute_query(GUILD_DETAIL_QUERY, {"id": int(guild_id)})
                 
                 if not result:
                     return Response({"error": "Guild not found"}, status=status.HTTP_404_NOT_FOUND)
                 
                 return Response(result[0]['g'], status=status.HTTP_200_OK)
             else:
-                query = "MATCH (g:Guild) RETURN g ORDER BY g.sql_id"
-                result = conn.execute_query(query)
-                guilds = [record['g'] for record in result]
-                
-                return Response(guilds, status=status.HTTP_200_OK)
+                # Keyset page: ?after=<sql_id>&limit=<n>&fields=a,b
+                return paginated_list(conn, request, "Guild", "g")
         
         finally:
             conn.close()
@@ -57,20 +43,10 @@ class GuildNeo4jView(APIView):
         try:
             body = request.data.copy()
             
-            max_id_query = "MATCH (g:Guild) RETURN coalesce(max(g.sql_id), 0) as max_id"
-            max_result = conn.execute_query(max_id_query)
-            new_id = max_result[0]['max_id'] + 1
-            
-            body['sql_id'] = new_id
+            # sql_id comes from the label's sequence, allocated in the same transaction
+            node = conn.execute_write(create_node, "Guild", body)
             
-            query = """
-            CREATE (g:Guild)
-            SET g = $props
-            RETURN g
-            """
-            result = conn.execute_query(query, {"props": body})
-            
-            return Response(result[0]['g'], status=status.HTTP_201_CREATED)
+            return Response(node, status=status.HTTP_201_CREATED)
         
         finally:
             conn.close()
@@ -117,3 +93,8 @@ class GuildNeo4jView(APIView):
         
         finally:
             conn.close()
+
+
+class GuildBulkNeo4jView(Neo4jBulkCreateView):
+    """POST a JSON array of guilds"""
+    label = "Guild"
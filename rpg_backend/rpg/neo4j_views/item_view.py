@@ -1,26 +1,16 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status, permissions
-from neo4j import GraphDatabase
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
-import os
 
+from rpg_backend.rpg.neo4j_connection import Neo4jConnection
+from rpg_backend.rpg.neo4j_writes import create_node
+from .bulk_view import Neo4jBulkCreateView
+from .pagination import paginated_list
 
-class Neo4jConnection:
-    def __init__(self):
-        self.uri = os.environ.get("NEO4J_URI", "bolt://localhost:7687")
-        self.user = os.environ.get("NEO4J_USER", "neo4j")
-        self.password = os.environ.get("NEO4J_PASSWORD", "password")
-        self.driver = GraphDatabase.driver(self.uri, auth=(self.user, self.password))
-    
-    def close(self):
-        self.driver.close()
-    
-    def execute_query(self, query, parameters=None):
-        with self.driver.session() as session:
-            result = session.run(query, parameters or {})
-            return [record.data() for record in result]
+
+ITEM_DETAIL_QUERY = "MATCH (i:Item {sql_id: $id}) RETURN i"
 
 
 @method_decorator(csrf_exempt, name="dispatch")
@@ -33,19 +23,15 @@ class ItemNeo4jView(APIView):
         
         try:
             if item_id:
-                query = "MATCH (i:Item {sql_id: $id}) RETURN i"
-                result = conn.execute_query(query, {"id": int(item_id)})
+                result = conn.execute_query(ITEM_DETAIL_QUERY, {"id": int(item_id)})
                 
                 if not result:
                     return Response({"error": "Item not found"}, status=status.HTTP_404_NOT_FOUND)
                 
                 return Response(result[0]['i'], status=status.HTTP_200_OK)
             else:
-                query = "MATCH (i:Item) RETURN i ORDER BY i.sql_id"
-                result = conn.execute_query(query)
-                items = [record['i'] for record in result]
-                
-                return Response(items, status=status.HTTP_200_OK)
+                # Keyset page: ?after=<sql_id>&limit=<n>&fields=a,b
+                return paginated_list(conn, request, "Item", "i")
         
         finally:
             conn.close()
@@ -57,21 +43,10 @@ class ItemNeo4jView(APIView):
         try:
             body = request.data.copy()
             
-            # Get max ID
-            max_id_query = "MATCH (i:Item) RETURN coalesce(max(i.sql_id), 0) as max_id"
-            max_result = conn.execute_query(max_id_query)
-            new_id = max_result[0]['max_id'] + 1
-            
-            body['sql_id'] = new_id
+            # sql_id comes from the label's sequence, allocated in the same transaction
+            node = conn.execute_write(create_node, "Item", body)
             
-            query = """
-            CREATE (i:Item)
-            SET i = $props
-            RETURN i
-            """
-            result = conn.execute_query(query, {"props": body})
-            
-            return Response(result[0]['i'], status=status.HTTP_201_CREATED)
+            return Response(node, status=status.HTTP_201_CREATED)
         
         finally:
             conn.close()
@@ -118,3 +93,8 @@ class ItemNeo4jView(APIView):
         
         finally:
             conn.close()
+
+
+class ItemBulkNeo4jView(Neo4jBulkCreateView):
+    """POST a JSON array of items"""
+    label = "Item"
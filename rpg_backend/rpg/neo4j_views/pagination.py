@@ -0,0 +1,86 @@
+import re
+
+from rest_framework.response import Response
+from rest_framework import status
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+# Property names are interpolated into Cypher, so only plain identifiers pass
+FIELD_NAME = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+
+def page_params(request):
+    """
+    Read ?after=<sql_id>&limit=<n>&fields=a,b from the request.
+    Raises ValueError on bad input.
+    """
+    after = int(request.GET.get("after", 0))
+    limit = int(request.GET.get("limit", DEFAULT_PAGE_SIZE))
+
+    if limit < 1:
+        raise ValueError("limit must be positive")
+    limit = min(limit, MAX_PAGE_SIZE)
+
+    fields = None
+    raw_fields = request.GET.get("fields")
+    if raw_fields:
+        fields = [f.strip() for f in raw_fields.split(",") if f.strip()]
+        for field in fields:
+            if not FIELD_NAME.match(field):
+                raise ValueError(f"Invalid field name: {field}")
+
+    return after, limit, fields
+
+
+def page_query(label, var, limit, fields=None, joins=()):
+    """
+    Build a keyset page query over `label` ordered by sql_id.
+
+    `joins` is a list of (OPTIONAL MATCH clause, expression, alias) used to
+    add related names (e.g. the character's guild name) to each row.
+    With `fields` set, only those node properties and joins are returned.
+    """
+    if fields is None:
+        projection = var
+        selected_joins = list(joins)
+    else:
+        selected_joins = [j for j in joins if j[2] in fields]
+        join_aliases = {alias for _, _, alias in selected_joins}
+
+        # sql_id is always returned, it is the cursor
+        props = ["sql_id"] + [f for f in fields if f != "sql_id" and f not in join_aliases]
+        projection = f"{var} {{" + ", ".join(f".{p}" for p in props) + "}"
+
+    matches = "".join(f"\n    {clause}" for clause, _, _ in selected_joins)
+    returns = "".join(f", {expr} AS {alias}" for _, expr, alias in selected_joins)
+
+    return f"""
+    MATCH ({var}:{label})
+    WHERE {var}.sql_id > $after
+    WITH {var} ORDER BY {var}.sql_id LIMIT $limit{matches}
+    RETURN {projection} AS {var}{returns}
+    ORDER BY {var}.sql_id
+    """, [alias for _, _, alias in selected_joins]
+
+
+def paginated_list(conn, request, label, var, joins=()):
+    """Run one page of a Neo4j list endpoint and wrap it with the next cursor"""
+    try:
+        after, limit, fields = page_params(request)
+    except ValueError as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    query, aliases = page_query(label, var, limit, fields, joins)
+    result = conn.execute_query(query, {"after": after, "limit": limit})
+
+    rows = []
+    for record in result:
+        row = record[var]
+        for alias in aliases:
+            row[alias] = record[alias]
+        rows.append(row)
+
+    next_cursor = rows[-1]["sql_id"] if len(rows) == limit else None
+
+    return Response({"results": rows, "next_cursor": next_cursor}, status=status.HTTP_200_OK)
@@ -1,26 +1,30 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status, permissions
-from neo4j import GraphDatabase
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
-import os
 
+from rpg_backend.rpg.neo4j_connection import Neo4jConnection
+from rpg_backend.rpg.neo4j_writes import create_node
+from .bulk_view import Neo4jBulkCreateView
+from .pagination import paginated_list
 
-class Neo4jConnection:
-    def __init__(self):
-        self.uri = os.environ.get("NEO4J_URI", "bolt://localhost:7687")
-        self.user = os.environ.get("NEO4J_USER", "neo4j")
-        self.password = os.environ.get("NEO4J_PASSWORD", "password")
-        self.driver = GraphDatabase.driver(self.uri, auth=(self.user, self.password))
-    
-    def close(self):
-        self.driver.close()
-    
-    def execute_query(self, query, parameters=None):
-        with self.driver.session() as session:
-            result = session.run(query, parameters or {})
-            return [record.data() for record in result]
+# (relationship type, target label, property holding the target sql_id)
+QUEST_LINKS = [
+    ("NPC", "NPC", "npc_id"),
+]
+
+# Related names added to each list row: (match clause, expression, alias)
+QUEST_LIST_JOINS = [
+    ("OPTIONAL MATCH (q)-[:NPC]->(n:NPC)", "n.name", "npc_name"),
+]
+
+
+QUEST_DETAIL_QUERY = """
+MATCH (q:Quest {sql_id: $id})
+OPTIONAL MATCH (q)-[:NPC]->(n:NPC)
+RETURN q, n.name as npc_name
+"""
 
 
 @method_decorator(csrf_exempt, name="dispatch")
@@ -33,12 +37,7 @@ class QuestNeo4jView(APIView):
         
         try:
             if quest_id:
-                query = """
-                MATCH (q:Quest {sql_id: $id})
-                OPTIONAL MATCH (q)-[:NPC]->(n:NPC)
-                RETURN q, n.name as npc_name
-                """
-                result = conn.execute_query(query, {"id": int(quest_id)})
+                result = conn.execute_query(QUEST_DETAIL_QUERY, {"id": int(quest_id)})
                 
                 if not result:
                     return Response({"error": "Quest not found"}, status=status.HTTP_404_NOT_FOUND)
@@ -49,21 +48,8 @@ class QuestNeo4jView(APIView):
                 
                 return Response(quest, status=status.HTTP_200_OK)
             else:
-                query = """
-                MATCH (q:Quest)
-                OPTIONAL MATCH (q)-[:NPC]->(n:NPC)
-                RETURN q, n.name as npc_name
-                ORDER BY q.sql_id
-                """
-                result = conn.execute_query(query)
-                
-                quests = []
-                for record in result:
-                    quest = record['q']
-                    quest['npc_name'] = record['npc_name']
-                    quests.append(quest)
-                
-                return Response(quests, status=status.HTTP_200_OK)
+                # Keyset page: ?after=<sql_id>&limit=<n>&fields=a,b
+                return paginated_list(conn, request, "Quest", "q", QUEST_LIST_JOINS)
         
         finally:
             conn.close()
@@ -75,29 +61,10 @@ class QuestNeo4jView(APIView):
         try:
             body = request.data.copy()
             
-            max_id_query = "MATCH (q:Quest) RETURN coalesce(max(q.sql_id), 0) as max_id"
-            max_result = conn.execute_query(max_id_query)
-            new_id = max_result[0]['max_id'] + 1
-            
-            body['sql_id'] = new_id
+            # Node, sql_id and relationships are written in one transaction
+            node = conn.execute_write(create_node, "Quest", body, QUEST_LINKS)
             
-            query = """
-            CREATE (q:Quest)
-            SET q = $props
-            RETURN q
-            """
-            result = conn.execute_query(query, {"props": body})
-            
-            # Create NPC relationship if provided
-            if 'npc_id' in body:
-                rel_query = """
-                MATCH (q:Quest {sql_id: $quest_id})
-                MATCH (n:NPC {sql_id: $npc_id})
-                MERGE (q)-[:NPC]->(n)
-                """
-                conn.execute_query(rel_query, {"quest_id": new_id, "npc_id": body['npc_id']})
-            
-            return Response(result[0]['q'], status=status.HTTP_201_CREATED)
+            return Response(node, status=status.HTTP_201_CREATED)
         
         finally:
             conn.close()
@@ -144,3 +111,9 @@ class QuestNeo4jView(APIView):
         
         finally:
             conn.close()
+
+
+class QuestBulkNeo4jView(Neo4jBulkCreateView):
+    """POST a JSON array of quests"""
+    label = "Quest"
+    links = QUEST_LINKS
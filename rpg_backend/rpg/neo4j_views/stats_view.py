@@ -0,0 +1,33 @@
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework import status, permissions
+
+from rpg_backend.rpg.neo4j_connection import pool_stats
+from rpg_backend.rpg.neo4j_metrics import query_stats, reset_query_stats
+
+
+class Neo4jPoolStatsView(APIView):
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        """Connection pool statistics of the shared Neo4j driver"""
+        return Response(pool_stats(), status=status.HTTP_200_OK)
+
+
+class Neo4jQueryStatsView(APIView):
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        """Per-endpoint Cypher statistics, most expensive statements first"""
+        stats = query_stats()
+
+        endpoint = request.query_params.get("endpoint")
+        if endpoint:
+            stats = [entry for entry in stats if entry["endpoint"] == endpoint]
+
+        return Response(stats, status=status.HTTP_200_OK)
+
+    def delete(self, request):
+        """Reset the collected statistics"""
+        reset_query_stats()
+        return Response(status=status.HTTP_204_NO_CONTENT)
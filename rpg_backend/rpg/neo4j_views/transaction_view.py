@@ -1,26 +1,33 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status, permissions
-from neo4j import GraphDatabase
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
-import os
 
+from rpg_backend.rpg.neo4j_connection import Neo4jConnection
+from rpg_backend.rpg.neo4j_writes import create_node
+from .bulk_view import Neo4jBulkCreateView
+from .pagination import paginated_list
 
-class Neo4jConnection:
-    def __init__(self):
-        self.uri = os.environ.get("NEO4J_URI", "bolt://localhost:7687")
-        self.user = os.environ.get("NEO4J_USER", "neo4j")
-        self.password = os.environ.get("NEO4J_PASSWORD", "password")
-        self.driver = GraphDatabase.driver(self.uri, auth=(self.user, self.password))
-    
-    def close(self):
-        self.driver.close()
-    
-    def execute_query(self, query, parameters=None):
-        with self.driver.session() as session:
-            result = session.run(query, parameters or {})
-            return [record.data() for record in result]
+# (relationship type, target label, property holding the target sql_id)
+TRANSACTION_LINKS = [
+    ("USER", "User", "user_id"),
+    ("ITEM", "Item", "item_id"),
+]
+
+# Related names added to each list row: (match clause, expression, alias)
+TRANSACTION_LIST_JOINS = [
+    ("OPTIONAL MATCH (t)-[:USER]->(u:User)", "u.username", "user_name"),
+    ("OPTIONAL MATCH (t)-[:ITEM]->(i:Item)", "i.name", "item_name"),
+]
+
+
+TRANSACTION_DETAIL_QUERY = """
+MATCH (t:Transaction {sql_id: $id})
+OPTIONAL MATCH (t)-[:USER]->(u:User)
+OPTIONAL MATCH (t)-[:ITEM]->(i:Item)
+RETURN t, u.username as user_name, i.name as item_name
+"""
 
 
 @method_decorator(csrf_exempt, name="dispatch")
@@ -33,13 +40,7 @@ class TransactionNeo4jView(APIView):
         
         try:
             if transaction_id:
-                query = """
-                MATCH (t:Transaction {sql_id: $id})
-                OPTIONAL MATCH (t)-[:USER]->(u:User)
-                OPTIONAL MATCH (t)-[:ITEM]->(i:Item)
-                RETURN t, u.username as user_name, i.name as item_name
-                """
-                result = conn.execute_query(query, {"id": int(transaction_id)})
+                result = conn.execute_query(TRANSACTION_DETAIL_QUERY, {"id": int(transaction_id)})
                 
                 if not result:
                     return Response({"error": "Transaction not found"}, status=status.HTTP_404_NOT_FOUND)
@@ -51,23 +52,8 @@ class TransactionNeo4jView(APIView):
                 
                 return Response(transaction, status=status.HTTP_200_OK)
             else:
-                query = """
-                MATCH (t:Transaction)
-                OPTIONAL MATCH (t)-[:USER]->(u:User)
-                OPTIONAL MATCH (t)-[:ITEM]->(i:Item)
-                RETURN t, u.username as user_name, i.name as item_name
-                ORDER BY t.sql_id
-                """
-                result = conn.execute_query(query)
-                
-                transactions = []
-                for record in result:
-                    transaction = record['t']
-                    transaction['user_name'] = record['user_name']
-                    transaction['item_name'] = record['item_name']
-                    transactions.append(transaction)
-                
-                return Response(transactions, status=status.HTTP_200_OK)
+                # Keyset page: ?after=<sql_id>&limit=<n>&fields=a,b
+                return paginated_list(conn, request, "Transaction", "t", TRANSACTION_LIST_JOINS)
         
         finally:
             conn.close()
@@ -79,37 +65,10 @@ class TransactionNeo4jView(APIView):
         try:
             body = request.data.copy()
             
-            max_id_query = "MATCH (t:Transaction) RETURN coalesce(max(t.sql_id), 0) as max_id"
-            max_result = conn.execute_query(max_id_query)
-            new_id = max_result[0]['max_id'] + 1
-            
-            body['sql_id'] = new_id
-            
-            query = """
-            CREATE (t:Transaction)
-            SET t = $props
-            RETURN t
-            """
-            result = conn.execute_query(query, {"props": body})
-            
-            # Create relationships if provided
-            if 'user_id' in body:
-                rel_query = """
-                MATCH (t:Transaction {sql_id: $trans_id})
-                MATCH (u:User {sql_id: $user_id})
-                MERGE (t)-[:USER]->(u)
-                """
-                conn.execute_query(rel_query, {"trans_id": new_id, "user_id": body['user_id']})
+            # Node, sql_id and relationships are written in one transaction
+            node = conn.execute_write(create_node, "Transaction", body, TRANSACTION_LINKS)
             
-            if 'item_id' in body:
-                rel_query = """
-                MATCH (t:Transaction {sql_id: $trans_id})
-                MATCH (i:Item {sql_id: $item_id})
-                MERGE (t)-[:ITEM]->(i)
-                """
-                conn.execute_query(rel_query, {"trans_id": new_id, "item_id": body['item_id']})
-            
-            return Response(result[0]['t'], status=status.HTTP_201_CREATED)
+            return Response(node, status=status.HTTP_201_CREATED)
         
         finally:
             conn.close()
@@ -156,3 +115,9 @@ class TransactionNeo4jView(APIView):
         
         finally:
             conn.close()
+
+
+class TransactionBulkNeo4jView(Neo4jBulkCreateView):
+    """POST a JSON array of transactions"""
+    label = "Transaction"
+    links = TRANSACTION_LINKS
@@ -0,0 +1,69 @@
+from rpg_backend.rpg.neo4j_sequences import next_sql_id, advance_sequence
+
+
+# =============================
+# NEO4J CREATE HELPERS
+# =============================
+# A create writes the node and its outgoing relationships in a single
+# Cypher statement inside one managed write transaction, so a failure
+# can never leave a node without its links.
+#
+# `links` is a list of (relationship type, target label, property) tuples.
+# The property holds the target's sql_id on the new node (e.g. user_id);
+# when it is missing the link is simply skipped.
+
+
+def _link_clauses(var, links):
+    clauses = []
+    for rel_type, target_label, prop in links:
+        clauses.append(f"""
+    CALL {{
+        WITH {var}
+        MATCH (t:{target_label} {{sql_id: {var}.{prop}}})
+        CREATE ({var})-[:{rel_type}]->(t)
+    }}""")
+    return "".join(clauses)
+
+
+def create_node_query(label, links=()):
+    """Cypher that creates one node from $props and returns it"""
+    return f"""
+    CREATE (n:{label})
+    SET n = $props
+    WITH n{_link_clauses("n", links)}
+    RETURN n
+    """
+
+
+def create_nodes_query(label, links=()):
+    """Cypher that creates one node per entry of $rows and returns them"""
+    return f"""
+    UNWIND $rows AS row
+    CREATE (n:{label})
+    SET n = row
+    WITH n{_link_clauses("n", links)}
+    RETURN n
+    ORDER BY n.sql_id
+    """
+
+
+def create_node(tx, label, props, links=()):
+    """CREATE one `label` node plus its links and return its properties"""
+    props["sql_id"] = next_sql_id(tx, label)
+    record = tx.run(create_node_query(label, links), props=props).single()
+    return record.data()["n"]
+
+
+def create_nodes(tx, label, rows, links=()):
+    """CREATE many `label` nodes plus their links with one UNWIND statement"""
+    if not rows:
+        return []
+
+    # Reserve the whole id range with a single counter update
+    last_id = advance_sequence(tx, label, len(rows))
+    first_id = last_id - len(rows) + 1
+    for offset, row in enumerate(rows):
+        row["sql_id"] = first_id + offset
+
+    result = tx.run(create_nodes_query(label, links), rows=rows)
+    return [record.data()["n"] for record in result]
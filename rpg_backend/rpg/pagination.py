@@ -0,0 +1,85 @@
+from django.conf import settings
+from django.db import connections
+from rest_framework.pagination import CursorPagination
+from rest_framework.response import Response
+
+
+# =============================
+# SQL KEYSET PAGINATION
+# =============================
+# Default paginator of every ModelViewSet. Pages are read with
+# WHERE id > <cursor> ORDER BY id LIMIT n, so page 1000 costs the same
+# as page 1, unlike OFFSET. ?count=1 adds an approximate total taken
+# from the table statistics instead of a COUNT(*) over the table.
+
+def approximate_count(queryset):
+    """
+    Estimated row count of an unfiltered queryset from the database's table
+    statistics. None for filtered querysets and unsupported backends.
+    """
+    if queryset.query.where:
+        return None
+
+    table = queryset.model._meta.db_table
+    connection = connections[queryset.db]
+
+    if connection.vendor == "mysql":
+        # InnoDB's estimate, refreshed by ANALYZE TABLE / information_schema_stats_expiry
+        sql = ("SELECT TABLE_ROWS FROM information_schema.TABLES "
+               "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s")
+    elif connection.vendor == "postgresql":
+        sql = "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass"
+    else:
+        return None
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [table])
+        row = cursor.fetchone()
+
+    if not row or row[0] is None or row[0] < 0:
+        return None
+    return int(row[0])
+
+
+class KeysetPagination(CursorPagination):
+    """Cursor pages ordered by primary key, ?limit= capped at API_MAX_PAGE_SIZE"""
+
+    ordering = "pk"
+    page_size_query_param = "limit"
+    max_page_size = settings.API_MAX_PAGE_SIZE
+    count_query_param = "count"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.count = None
+        self.with_count = request.query_params.get(self.count_query_param, "").lower() in ("1", "true", "yes")
+        if self.with_count:
+            self.count = approximate_count(queryset)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if not self.with_count:
+            return super().get_paginated_response(data)
+
+        return Response({
+            "count": self.count,
+            "next": self.get_next_link(),
+            "previous": self.get_previous_link(),
+            "results": data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        response_schema = super().get_paginated_response_schema(schema)
+        response_schema["properties"] = {
+            "count": {"type": "integer", "nullable": True, "description": "Approximate total, only with ?count=1"},
+            **response_schema["properties"],
+        }
+        return response_schema
+
+    def get_schema_operation_parameters(self, view):
+        return super().get_schema_operation_parameters(view) + [{
+            "name": self.count_query_param,
+            "required": False,
+            "in": "query",
+            "description": "Add an approximate total from table statistics",
+            "schema": {"type": "boolean"},
+        }]
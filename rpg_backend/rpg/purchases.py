@@ -0,0 +1,158 @@
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import F
+from rest_framework import status
+
+from rpg_backend.rpg.models import Character, Inventory, InventoryItem, Item, Transaction
+
+
+# =============================
+# PURCHASES
+# =============================
+# A purchase (one item or a whole cart) is one transaction and a fixed
+# number of statements however many lines it has:
+#   1. lock the buying character            SELECT ... FOR UPDATE
+#   2. price the items                      one SELECT
+#   3. lock the inventory rows being topped up, in item id order
+#   4. deduct the gold                      one UPDATE
+#   5. log the lines                        one INSERT into rpg_transaction
+#   6. upsert quantities                    one UPDATE (CASE) + one INSERT
+# Locks are always taken character first, then inventory rows by item id
+# (quest completion locks characters the same way), so concurrent
+# purchases queue on the character instead of deadlocking.
+# An item is priced at its value; items without one are not for sale.
+# InventoryItem has no unique (inventory, item) key: when an item has
+# several rows, the lowest pk is topped up and "owned" sums them all.
+
+# Most distinct items one checkout may buy
+MAX_CART = 100
+
+# Most of one item a checkout may buy (repeated lines add up)
+MAX_QUANTITY = 10_000
+
+# Largest value the IntegerField columns hold
+MAX_INT = 2 ** 31 - 1
+
+
+class PurchaseError(Exception):
+    """A purchase that cannot go through; nothing was written"""
+
+    def __init__(self, message, status=status.HTTP_400_BAD_REQUEST):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+
+def parse_cart(lines):
+    """{item id: quantity} from [{"item", "quantity"}, ...]; repeated items add up"""
+    if not isinstance(lines, list) or not lines:
+        raise PurchaseError("items must be a non-empty list")
+
+    cart = Counter()
+    for line in lines:
+        try:
+            item_id = int(line["item"])
+            quantity = int(line.get("quantity", 1))
+        except (TypeError, KeyError, ValueError, AttributeError):
+            raise PurchaseError("Each line needs an integer item and quantity")
+
+        if not 1 <= quantity <= MAX_QUANTITY:
+            raise PurchaseError(f"quantity must be between 1 and {MAX_QUANTITY}")
+        cart[item_id] += quantity
+
+        if cart[item_id] > MAX_QUANTITY:
+            raise PurchaseError(f"At most {MAX_QUANTITY} of one item per checkout")
+
+    if len(cart) > MAX_CART:
+        raise PurchaseError(f"At most {MAX_CART} different items per checkout")
+
+    return dict(cart)
+
+
+def _lock_character(user, character_id):
+    """The buyer's character, locked; defaults to the user's first character"""
+    characters = Character.objects.select_for_update().filter(user=user).order_by("pk")
+    if character_id is not None:
+        characters = characters.filter(pk=character_id)
+
+    character = characters.only("id", "gold").first()
+    if character is None:
+        raise PurchaseError("Character not found", status.HTTP_404_NOT_FOUND)
+    return character
+
+
+def purchase(user, cart, character_id=None):
+    """
+    Buy {item id: quantity} for one of `user`'s characters in one transaction.
+    Raises PurchaseError (and writes nothing) on an unknown or unpriced item,
+    or when the character cannot afford the whole cart.
+    """
+    with transaction.atomic():
+        character = _lock_character(user, character_id)
+
+        prices = dict(Item.objects.filter(pk__in=cart).values_list("pk", "value"))
+        missing = sorted(set(cart) - set(prices))
+        if missing:
+            raise PurchaseError(f"Items not found: {missing}", status.HTTP_404_NOT_FOUND)
+
+        unpriced = sorted(item_id for item_id in cart if prices[item_id] is None)
+        if unpriced:
+            raise PurchaseError(f"Items not for sale: {unpriced}")
+
+        costs = {item_id: prices[item_id] * quantity for item_id, quantity in cart.items()}
+        total = sum(costs.values())
+        if character.gold < total:
+            raise PurchaseError("Not enough gold to complete purchase.")
+
+        inventory = Inventory.objects.filter(character=character).order_by("pk").first()
+        if inventory is None:
+            inventory = Inventory.objects.create(character=character)
+
+        # item id -> (lowest pk row, quantity summed over all of its rows)
+        owned = {}
+        for row in (
+            InventoryItem.objects.select_for_update()
+            .filter(inventory=inventory, item_id__in=cart)
+            .order_by("item_id", "pk")
+        ):
+            kept, held = owned.get(row.item_id, (row, 0))
+            owned[row.item_id] = (kept, held + row.quantity)
+
+        for item_id, (kept, _) in owned.items():
+            if kept.quantity + cart[item_id] > MAX_INT:
+                raise PurchaseError(f"Cannot hold more of item {item_id}")
+
+        Character.objects.filter(pk=character.pk).update(gold=F("gold") - total)
+
+        Transaction.objects.bulk_create(
+            Transaction(user=user, item_id=item_id, quantity=quantity, cost=costs[item_id])
+            for item_id, quantity in sorted(cart.items())
+        )
+
+        for item_id, (kept, _) in owned.items():
+            kept.quantity += cart[item_id]
+        if owned:
+            InventoryItem.objects.bulk_update([kept for kept, _ in owned.values()], ["quantity"])
+
+        InventoryItem.objects.bulk_create(
+            InventoryItem(inventory=inventory, item_id=item_id, quantity=quantity)
+            for item_id, quantity in sorted(cart.items())
+            if item_id not in owned
+        )
+
+    return {
+        "character": character.pk,
+        "inventory": inventory.pk,
+        "total_cost": total,
+        "gold": character.gold - total,
+        "items": [
+            {
+                "item": item_id,
+                "quantity": quantity,
+                "cost": costs[item_id],
+                "owned": owned[item_id][1] + quantity if item_id in owned else quantity,
+            }
+            for item_id, quantity in sorted(cart.items())
+        ],
+    }
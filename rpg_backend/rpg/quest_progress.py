@@ -0,0 +1,106 @@
+from collections import defaultdict
+
+from django.db import transaction
+
+from rpg_backend.rpg.models.character import Character
+
+
+# =============================
+# QUEST COMPLETION
+# =============================
+# Completing quests locks the characters involved (SELECT ... FOR UPDATE,
+# in id order), removes the active quest rows and writes gold / xp / level
+# back in one UPDATE, so concurrent completions and other reward writes
+# cannot overwrite each other. Rewards are applied like sp_complete_quest:
+# a missing reward_xp / reward_money counts as 0.
+
+XP_PER_LEVEL = 100
+
+# Most (character, quest) pairs one batch request may complete
+MAX_BATCH = 500
+
+COMPLETED = "completed"
+NOT_ACTIVE = "not_active"
+CHARACTER_NOT_FOUND = "character_not_found"
+
+ActiveQuest = Character.quests.through
+
+
+def level_up(level, xp):
+    """(level, xp) after spending `xp` on levels of XP_PER_LEVEL each"""
+    # divmod floors, so a negative balance would take levels away
+    if xp < 0:
+        return level, xp
+    levels, xp = divmod(xp, XP_PER_LEVEL)
+    return level + levels, xp
+
+
+def complete_quests(user, pairs):
+    """
+    Complete (character id, quest id) pairs for characters owned by `user`,
+    all in one transaction. Returns (results, characters):
+      results     one {"character", "quest", "status"} per pair, with
+                  gold_gained / xp_gained when completed
+      characters  {character id: {"gold", "xp", "level", "levels_gained"}}
+                  for every character that was rewarded
+    """
+    character_ids = sorted({character_id for character_id, _ in pairs})
+    quest_ids = {quest_id for _, quest_id in pairs}
+
+    with transaction.atomic():
+        # lock in id order so overlapping batches cannot deadlock
+        locked = Character.objects.select_for_update().filter(user=user, pk__in=character_ids).order_by("pk")
+        characters = {character.pk: character for character in locked.only("id", "gold", "xp", "level")}
+
+        active = {
+            (row["character_id"], row["quest_id"]): row
+            for row in ActiveQuest.objects.filter(character_id__in=characters, quest_id__in=quest_ids).values(
+                "id", "character_id", "quest_id", "quest__reward_xp", "quest__reward_money",
+            )
+        }
+
+        results = []
+        completed = []
+        gained = defaultdict(lambda: [0, 0])  # character id -> [gold, xp]
+
+        for character_id, quest_id in pairs:
+            result = {"character": character_id, "quest": quest_id}
+            # popped, so a pair listed twice is only rewarded once
+            row = active.pop((character_id, quest_id), None)
+
+            if character_id not in characters:
+                result["status"] = CHARACTER_NOT_FOUND
+            elif row is None:
+                result["status"] = NOT_ACTIVE
+            else:
+                gold = row["quest__reward_money"] or 0
+                xp = row["quest__reward_xp"] or 0
+                gained[character_id][0] += gold
+                gained[character_id][1] += xp
+                completed.append(row["id"])
+                result.update({"status": COMPLETED, "gold_gained": gold, "xp_gained": xp})
+
+            results.append(result)
+
+        rewarded = {}
+        if completed:
+            ActiveQuest.objects.filter(pk__in=completed).delete()
+
+            for character_id, (gold, xp) in gained.items():
+                character = characters[character_id]
+                level_before = character.level
+
+                character.gold += gold
+                character.level, character.xp = level_up(character.level, character.xp + xp)
+
+                rewarded[character_id] = {
+                    "gold": character.gold,
+                    "xp": character.xp,
+                    "level": character.level,
+                    "levels_gained": character.level - level_before,
+                }
+
+            # only the reward columns, one UPDATE for every character
+            Character.objects.bulk_update([characters[i] for i in gained], ["gold", "xp", "level"])
+
+    return results, rewarded
@@ -1 +1,1359 @@
-from django.test import TestCase
+import asyncio
+import json
+import threading
+from datetime import datetime
+from io import StringIO
+from itertools import count
+from unittest import SkipTest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import bson
+from bson import Decimal128, ObjectId
+from bson.raw_bson import RawBSONDocument
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.test import RequestFactory, TestCase, SimpleTestCase
+from django.urls import resolve, reverse
+from pymongo.errors import BulkWriteError
+from rest_framework.test import APIClient
+
+from rpg_backend.rpg.models import (
+    Battle, Character, Guild, Inventory, InventoryItem, Item, NPC, Quest, Skill, Transaction,
+)
+from rpg_backend.rpg.pagination import KeysetPagination, approximate_count
+from rpg_backend.rpg.quest_progress import level_up
+
+from rpg_backend.rpg import (
+    mongo_connection, mongo_read_model as read_model, mongo_sequences, neo4j_connection, neo4j_metrics, neo4j_sequences,
+    neo4j_writes,
+)
+from rpg_backend.rpg.id_blocks import IdBlock, IdBlocks
+from rpg_backend.rpg.management.commands.migrate_to_neo4j import (
+    Command as MigrateToNeo4j, create_nodes, create_relationships, relationship_sources, to_node_props,
+)
+from rpg_backend.rpg.management.commands.mongo_indexes import Command as MongoIndexes
+from rpg_backend.rpg.mongo_analytics import (
+    battle_win_rates_pipeline, guild_stats_pipeline, inventory_value_pipeline, leaderboard_pipeline,
+)
+from rpg_backend.rpg.mongo_indexes import MONGO_COLLECTIONS, ensure_indexes, explain_filter_queries
+from rpg_backend.rpg.mongo_search import (
+    HIDDEN_FIELDS, MAX_NGRAM, NGRAM_FIELD, SEARCH_COLLATION, character_filter, ngrams, search, search_keys,
+    search_query, user_filter,
+)
+from rpg_backend.rpg.mongo_sequences import WITHOUT_INT_ID, backfill_ids
+from rpg_backend.rpg.mongo_views.analytics_view import MongoAnalyticsView
+from rpg_backend.rpg.mongo_views.inventory_view import item_delta_ops, prune_ops
+from rpg_backend.rpg.mongo_views.encoding import RAW_OPTIONS, encode_json
+from rpg_backend.rpg.mongo_views.item_view import MongoItemBulk, MongoItemDetail
+from rpg_backend.rpg.mongo_views.pagination import paginated_find
+from rpg_backend.rpg.neo4j_connection import get_driver, get_session
+from rpg_backend.rpg.neo4j_metrics import (
+    AsyncRecordingTransaction, Neo4jQueryEndpointMiddleware, RecordingTransaction, current_endpoint, profile_db_hits,
+    query_stats, reset_query_stats,
+)
+from rpg_backend.rpg.neo4j_schema import plan_problems, view_queries
+from rpg_backend.rpg.neo4j_sequences import SEQUENCE_EPOCH, async_next_sql_id, next_sql_id
+from rpg_backend.rpg.neo4j_views.character_view import CHARACTER_DETAIL_QUERY
+from rpg_backend.rpg.neo4j_views.pagination import page_params, page_query, paginated_list
+
+
+# =============================
+# NEO4J QUERY PLANS
+# =============================
+# Fixture nodes use negative sql_ids so they never clash with real data
+PROFILE_CHARACTER_ID = -1
+
+
+def widest_operator(plan):
+    """Most rows any one operator of a PROFILE plan produced"""
+    return max([plan.get("rows", 0), *(widest_operator(child) for child in plan.get("children", []))])
+
+
+class CharacterDetailProfileTest(SimpleTestCase):
+    """Runs against a live Neo4j and is skipped when none is reachable"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        try:
+            get_driver().verify_connectivity()
+        except Exception as e:
+            raise SkipTest(f"Neo4j not reachable: {e}")
+
+    def tearDown(self):
+        self.clear_fixture()
+
+    def clear_fixture(self):
+        with get_session() as session:
+            session.run(
+                "MATCH (n:Character|Skill|Quest) WHERE n.sql_id < 0 DETACH DELETE n"
+            ).consume()
+
+    def profile_character(self, size):
+        """Build a character with `size` skills and quests, PROFILE the detail read"""
+        self.clear_fixture()
+
+        with get_session() as session:
+            session.run("""
+            CREATE (c:Character {sql_id: $id, character_name: 'profile-fixture'})
+            WITH c
+            UNWIND range(1, $size) AS i
+            CREATE (c)-[:SKILLS]->(:Skill {sql_id: -i, name: 'skill ' + i})
+            CREATE (c)-[:QUESTS]->(:Quest {sql_id: -i, title: 'quest ' + i})
+            """, id=PROFILE_CHARACTER_ID, size=size).consume()
+
+            result = session.run(f"PROFILE {CHARACTER_DETAIL_QUERY}", id=PROFILE_CHARACTER_ID)
+            record = result.single()
+            summary = result.consume()
+
+        self.assertEqual(len(record["skills"]), size)
+        self.assertEqual(len(record["quests"]), size)
+        return profile_db_hits(summary.profile), widest_operator(summary.profile)
+
+    def test_detail_query_stays_linear(self):
+        small_hits, small_rows = self.profile_character(10)
+        large_hits, large_rows = self.profile_character(100)
+
+        # A skills x quests product would put 10 000 rows through one operator
+        self.assertLessEqual(large_rows, 2 * 100 + 10)
+
+        # 10x the relationships may cost ~10x the db hits, never ~100x
+        self.assertLessEqual(large_hits, small_hits * 20)
+
+
+# =============================
+# NEO4J PLAN CHECK
+# =============================
+
+def plan(operator, details="", *children):
+    return {"operatorType": f"{operator}@neo4j", "args": {"Details": details}, "children": list(children)}
+
+
+class PlanCheckTest(SimpleTestCase):
+
+    def test_view_queries_are_the_shipped_cypher(self):
+        queries = {name: (query, labels) for name, query, labels in view_queries()}
+
+        self.assertEqual(queries["Character detail"], (CHARACTER_DETAIL_QUERY, ["Character"]))
+        self.assertIn("WHERE c.sql_id > $after", queries["Character page"][0])
+        self.assertEqual(queries["Character create"][1], ["Guild", "User"])
+        self.assertIn("CALL {", queries["Battle bulk create"][0])
+        self.assertNotIn("User create", queries)
+
+    def test_index_only_plan_passes(self):
+        seek = plan(
+            "Apply", "",
+            plan("NodeUniqueIndexSeek", "UNIQUE c:Character(sql_id) WHERE sql_id = $id"),
+            plan("NodeUniqueIndexSeekByRange", "UNIQUE t:User(sql_id) WHERE sql_id > $after"),
+        )
+        self.assertEqual(plan_problems(seek, ["Character", "User"]), [])
+
+    def test_a_single_label_scan_fails_the_plan(self):
+        mixed = plan(
+            "Apply", "",
+            plan("NodeUniqueIndexSeek", "UNIQUE c:Character(sql_id) WHERE sql_id = $id"),
+            plan("Filter", "t.sql_id = c.guild_id", plan("NodeByLabelScan", "t:Guild")),
+        )
+        self.assertEqual(
+            plan_problems(mixed, ["Character", "Guild"]),
+            ["NodeByLabelScan t:Guild", "no index seek on :Guild"],
+        )
+        self.assertEqual(plan_problems(plan("AllNodesScan", "n"), []), ["AllNodesScan n"])
+
+
+# =============================
+# NEO4J MIGRATION
+# =============================
+
+class NodeImportTest(SimpleTestCase):
+
+    def test_rows_become_node_properties(self):
+        joined = datetime(2024, 1, 2, 3, 4, 5)
+        self.assertEqual(
+            to_node_props({"id": 3, "guild_id": 1, "date_joined": joined}),
+            {"sql_id": 3, "guild_id": 1, "date_joined": "2024-01-02T03:04:05"},
+        )
+
+    def test_rows_are_written_in_unwind_batches(self):
+        rows = MagicMock()
+        rows.iterator.return_value = iter([{"id": i} for i in range(1, 6)])
+        session = MagicMock()
+
+        MigrateToNeo4j(stdout=StringIO()).import_nodes(session, "Item", rows, 5, 2)
+
+        batches = [call.args[2] for call in session.execute_write.call_args_list]
+        self.assertEqual([[row["sql_id"] for row in batch] for batch in batches], [[1, 2], [3, 4], [5]])
+        self.assertTrue(all(call.args[:2] == (create_nodes, "Item") for call in session.execute_write.call_args_list))
+
+        tx = MagicMock()
+        create_nodes(tx, "Item", batches[0])
+        query = tx.run.call_args.args[0]
+        self.assertIn("UNWIND $rows AS row CREATE (n:Item)", query)
+
+
+class RelationshipImportTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        user = User.objects.create_user("linker")
+        cls.guild = Guild.objects.create(guild_name="Linkers")
+        cls.skills = [Skill.objects.create(name=f"skill {i}") for i in range(3)]
+        cls.linked = Character.objects.create(character_name="linked", user=user, guild=cls.guild)
+        cls.linked.skills.add(*cls.skills)
+        Character.objects.create(character_name="guildless", user=user)
+
+    def sources(self):
+        return {
+            (source, rel_type, target): list(pairs)
+            for source, rel_type, target, pairs in relationship_sources([Character])
+        }
+
+    def test_pairs_come_from_id_columns_and_through_tables(self):
+        sources = self.sources()
+
+        # a null FK is no relationship
+        self.assertEqual(sources[("Character", "GUILD", "Guild")], [(self.linked.pk, self.guild.pk)])
+        self.assertEqual(
+            sources[("Character", "SKILLS", "Skill")],
+            [(self.linked.pk, skill.pk) for skill in self.skills],
+        )
+        self.assertEqual(len(sources[("Character", "USER", "User")]), 2)
+
+    def test_one_query_per_relationship_group(self):
+        # user, guild, skills, quests: however many characters there are
+        with self.assertNumQueries(4):
+            self.sources()
+
+    def test_one_merge_per_batch(self):
+        tx = MagicMock()
+        tx.run.return_value.single.return_value = {"linked": 2}
+
+        linked = create_relationships(tx, "Character", "SKILLS", "Skill", [[1, 2], [1, 3]])
+
+        self.assertEqual(linked, 2)
+        query = tx.run.call_args.args[0]
+        self.assertIn("UNWIND $pairs AS pair", query)
+        self.assertIn("MERGE (a)-[:SKILLS]->(b)", query)
+
+
+# =============================
+# NEO4J WRITES
+# =============================
+
+class CreateQueryTest(SimpleTestCase):
+
+    def test_links_are_subqueries_of_the_create(self):
+        query = neo4j_writes.create_node_query("Character", [("GUILD", "Guild", "guild_id")])
+        self.assertIn("CREATE (n:Character)", query)
+        self.assertIn("MATCH (t:Guild {sql_id: n.guild_id})", query)
+        self.assertIn("CREATE (n)-[:GUILD]->(t)", query)
+        self.assertEqual(query.count("CALL {"), 1)
+
+        self.assertNotIn("CALL {", neo4j_writes.create_nodes_query("Item"))
+
+    def test_bulk_create_reserves_one_id_range(self):
+        tx = MagicMock()
+        record = tx.run.return_value.single.return_value
+        record.__getitem__.side_effect = {"last_id": 12, "epoch": 0}.__getitem__
+        tx.run.return_value.__iter__.return_value = iter([])
+        rows = [{"name": "a"}, {"name": "b"}, {"name": "c"}]
+
+        neo4j_writes.create_nodes(tx, "Item", rows)
+
+        self.assertEqual([row["sql_id"] for row in rows], [10, 11, 12])
+        sequence, create = [call.args[0] for call in tx.run.call_args_list]
+        self.assertIn("MERGE (seq:Sequence", sequence)
+        self.assertEqual(tx.run.call_args_list[0].kwargs["count"], 3)
+        self.assertIn("UNWIND $rows AS row", create)
+
+    def test_empty_bulk_create_writes_nothing(self):
+        tx = MagicMock()
+        self.assertEqual(neo4j_writes.create_nodes(tx, "Item", []), [])
+        tx.run.assert_not_called()
+
+
+# =============================
+# NEO4J PAGINATION
+# =============================
+
+class Neo4jPaginationTest(SimpleTestCase):
+
+    def test_params_are_capped_and_checked(self):
+        factory = RequestFactory()
+        self.assertEqual(page_params(factory.get("/")), (0, 100, None))
+        self.assertEqual(page_params(factory.get("/", {"after": 7, "limit": 5000, "fields": "level, gold"})), (7, 1000, ["level", "gold"]))
+
+        for bad in ({"limit": 0}, {"fields": "level}) RETURN 1 //"}, {"after": "x"}):
+            with self.assertRaises(ValueError):
+                page_params(factory.get("/", bad))
+
+    def test_projection_keeps_the_cursor_and_selected_joins(self):
+        joins = [("OPTIONAL MATCH (c)-[:GUILD]->(g:Guild)", "g.guild_name", "guild_name")]
+
+        query, aliases = page_query("Character", "c", 10, ["level", "guild_name"], joins)
+        self.assertIn("RETURN c {.sql_id, .level} AS c, g.guild_name AS guild_name", query)
+        self.assertEqual(aliases, ["guild_name"])
+
+        # the joins run on the page, after ORDER BY ... LIMIT
+        query, aliases = page_query("Character", "c", 10, ["level"], joins)
+        self.assertNotIn("OPTIONAL MATCH", query)
+        self.assertEqual(aliases, [])
+
+    def test_next_cursor_only_on_a_full_page(self):
+        conn = MagicMock()
+        conn.execute_query.return_value = [{"i": {"sql_id": 3}}, {"i": {"sql_id": 4}}]
+
+        response = paginated_list(conn, RequestFactory().get("/", {"after": 2, "limit": 2}), "Item", "i")
+        self.assertEqual(response.data["next_cursor"], 4)
+        self.assertEqual(conn.execute_query.call_args.args[1], {"after": 2, "limit": 2})
+
+        response = paginated_list(conn, RequestFactory().get("/", {"limit": 3}), "Item", "i")
+        self.assertIsNone(response.data["next_cursor"])
+
+
+# =============================
+# NEO4J ID SEQUENCES
+# =============================
+
+class SequenceTransaction(RecordingTransaction):
+    """RecordingTransaction over a fake counter: {"value", "epoch"}"""
+
+    def __init__(self, counter):
+        super().__init__(MagicMock())
+        self.counter = counter
+        self.statements = []
+
+    def run(self, query, parameters=None, **kwargs):
+        self.statements.append(query)
+        result = MagicMock()
+        if query is SEQUENCE_EPOCH:
+            result.single.return_value = {"epoch": self.counter["epoch"]}
+        else:
+            self.counter["value"] += kwargs["count"]
+            result.single.return_value = {"last_id": self.counter["value"], "epoch": self.counter["epoch"]}
+        return result
+
+
+class AsyncSequenceTransaction(AsyncRecordingTransaction):
+    """AsyncRecordingTransaction over the same fake counter"""
+
+    def __init__(self, counter):
+        super().__init__(MagicMock())
+        self.sync = SequenceTransaction(counter)
+
+    async def run(self, query, parameters=None, **kwargs):
+        result = self.sync.run(query, parameters, **kwargs)
+        result.single = AsyncMock(return_value=result.single.return_value)
+        return result
+
+
+@patch.dict(settings.NEO4J, {"ID_BLOCK_SIZE": 3})
+class SequenceTest(SimpleTestCase):
+
+    def setUp(self):
+        neo4j_sequences._blocks.clear()
+        self.counter = {"value": 10, "epoch": 0}
+
+    def test_block_is_reserved_in_the_callers_transaction(self):
+        tx = SequenceTransaction(self.counter)
+        self.assertEqual(next_sql_id(tx, "Item"), 11)
+        self.assertEqual(self.counter["value"], 13)
+
+        # the rest of the block waits for the commit
+        self.assertEqual(next_sql_id(SequenceTransaction(self.counter), "Item"), 14)
+        tx.committed()
+        self.assertEqual([next_sql_id(SequenceTransaction(self.counter), "Item") for _ in range(3)], [12, 13, 17])
+
+    def test_rolled_back_blocks_are_never_handed_out(self):
+        next_sql_id(SequenceTransaction(self.counter), "Item")  # never committed
+        self.counter["value"] = 10
+
+        tx = SequenceTransaction(self.counter)
+        self.assertEqual(next_sql_id(tx, "Item"), 11)
+
+    def test_a_sync_elsewhere_retires_cached_blocks(self):
+        tx = SequenceTransaction(self.counter)
+        next_sql_id(tx, "Item")
+        tx.committed()
+
+        self.counter.update(value=20, epoch=1)  # another process synced
+
+        # between epoch checks ids come from memory, without a round trip
+        cached = SequenceTransaction(self.counter)
+        self.assertEqual(next_sql_id(cached, "Item"), 12)
+        self.assertEqual(cached.statements, [])
+
+        with patch.dict(settings.NEO4J, {"ID_EPOCH_CHECK_SECONDS": 0}):
+            self.assertEqual(next_sql_id(SequenceTransaction(self.counter), "Item"), 21)
+
+    def test_async_creates_share_the_blocks(self):
+        tx = AsyncSequenceTransaction(self.counter)
+        self.assertEqual(asyncio.run(async_next_sql_id(tx, "Item")), 11)
+        tx.committed()
+
+        self.assertEqual(next_sql_id(SequenceTransaction(self.counter), "Item"), 12)
+        self.assertEqual(asyncio.run(async_next_sql_id(AsyncSequenceTransaction(self.counter), "Item")), 13)
+        self.assertEqual(self.counter["value"], 13)
+
+    def test_plain_transactions_take_one_id_at_a_time(self):
+        tx = MagicMock()
+        tx.run.return_value.single.return_value = {"last_id": 5, "epoch": 0}
+        del tx.on_commit
+
+        self.assertEqual(next_sql_id(tx, "Item"), 5)
+        self.assertEqual(tx.run.call_args.kwargs["count"], 1)
+
+
+class IdBlocksTest(SimpleTestCase):
+
+    def test_blocks_are_refilled_only_when_used_up(self):
+        reserved = []
+
+        def reserve(name, size):
+            reserved.append(name)
+            return len(reserved) * size
+
+        blocks = IdBlocks()
+        ids = [blocks.next_id("item", 3, reserve) for _ in range(4)]
+        self.assertEqual(ids, [1, 2, 3, 4])
+        self.assertEqual(reserved, ["item", "item"])
+
+        blocks.clear()
+        self.assertEqual(blocks.next_id("item", 3, reserve), 7)
+
+    def test_ids_from_another_epoch_are_not_handed_out(self):
+        block = IdBlock()
+        block.refill(10, 2, epoch=1)
+        self.assertIsNone(block.take(epoch=2))
+        self.assertEqual(block.take(epoch=1), 9)
+
+    def test_threads_never_share_an_id(self):
+        blocks = IdBlocks()
+        counter = count(5, 5)
+        lock = threading.Lock()
+
+        def reserve(name, size):
+            with lock:
+                return next(counter)
+
+        taken = []
+        workers = [
+            threading.Thread(target=lambda: taken.extend(blocks.next_id("item", 5, reserve) for _ in range(50)))
+            for _ in range(4)
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        self.assertEqual(len(set(taken)), 200)
+
+
+# =============================
+# NEO4J QUERY STATISTICS
+# =============================
+
+class QueryStatsTest(SimpleTestCase):
+
+    def setUp(self):
+        reset_query_stats()
+        self.addCleanup(reset_query_stats)
+
+    def test_statements_are_tagged_with_the_resolved_route(self):
+        def get_response(request):
+            middleware.process_view(request, None, (), {})
+            return current_endpoint.get()
+
+        middleware = Neo4jQueryEndpointMiddleware(get_response)
+        request = RequestFactory().get("/api/neo4j/items/5/")
+        request.resolver_match = resolve(request.path_info)
+
+        with patch("django.urls.resolvers.URLResolver.resolve") as resolve_again:
+            self.assertEqual(middleware(request), "GET /api/neo4j/items/<int:item_id>/")
+        resolve_again.assert_not_called()
+        self.assertEqual(current_endpoint.get(), "-")
+
+        # never reaches a view
+        middleware = Neo4jQueryEndpointMiddleware(lambda request: current_endpoint.get())
+        self.assertEqual(middleware(RequestFactory().get("/nowhere/")), "GET /nowhere/")
+
+    @patch.object(neo4j_connection, "get_driver")
+    @patch.object(neo4j_connection, "get_session")
+    def test_sequence_statements_are_recorded(self, get_session, get_driver):
+        tx = MagicMock()
+        record = tx.run.return_value.single.return_value
+        record.__getitem__.side_effect = {"last_id": 7, "epoch": 0}.__getitem__
+        tx.run.return_value.consume.return_value = MagicMock(
+            result_available_after=1, result_consumed_after=0, profile=None, counters=MagicMock(spec=[]),
+        )
+        session = get_session.return_value.__enter__.return_value
+        session.execute_write.side_effect = lambda work, *args: work(tx, *args)
+
+        neo4j_connection.Neo4jConnection().execute_write(neo4j_writes.create_node, "Item", {"name": "Sword"})
+
+        queries = [entry["query"] for entry in query_stats()]
+        self.assertEqual(len(queries), 2)
+        self.assertTrue(any("MERGE (seq:Sequence" in query for query in queries))
+
+    @patch.object(neo4j_metrics, "MAX_QUERY_STATS", 2)
+    def test_distinct_statements_are_capped(self):
+        summary = MagicMock(result_available_after=1, result_consumed_after=0, profile=None, counters=MagicMock(spec=[]))
+
+        for fields in ("a", "b", "c", "d", "a"):
+            neo4j_metrics.record_query(f"MATCH (n) RETURN n {{.{fields}}}", {}, summary)
+
+        stats = {(entry["endpoint"], entry["fingerprint"]): entry["count"] for entry in query_stats()}
+        self.assertEqual(len(stats), 3)
+        self.assertEqual(stats[neo4j_metrics.OVERFLOW_KEY], 2)
+        self.assertEqual(sum(stats.values()), 5)
+
+
+# =============================
+# NEO4J DRIVER
+# =============================
+
+@patch("rpg_backend.rpg.neo4j_connection.GraphDatabase.driver")
+class SharedDriverTest(SimpleTestCase):
+
+    def setUp(self):
+        neo4j_connection.close_driver()
+        self.addCleanup(neo4j_connection.close_driver)
+
+    def test_every_connection_shares_one_driver(self, driver):
+        conn = neo4j_connection.Neo4jConnection()
+        self.assertIs(conn.driver, neo4j_connection.Neo4jConnection().driver)
+        self.assertEqual(driver.call_count, 1)
+        self.assertEqual(driver.call_args.kwargs["max_connection_pool_size"], settings.NEO4J["MAX_CONNECTION_POOL_SIZE"])
+
+        # per-request close leaves the pool alone
+        conn.close()
+        driver.return_value.close.assert_not_called()
+
+    def test_close_driver_starts_over(self, driver):
+        get_driver()
+        neo4j_connection.close_driver()
+        driver.return_value.close.assert_called_once()
+
+        get_driver()
+        self.assertEqual(driver.call_count, 2)
+
+
+# =============================
+# NEO4J ASYNC DRIVER
+# =============================
+
+class AsyncDriverTest(SimpleTestCase):
+
+    def tearDown(self):
+        asyncio.run(neo4j_connection.close_async_driver())
+
+    def test_async_views_refuse_wsgi(self):
+        response = self.client.get(reverse("neo4j-async-character-list"))
+        self.assertEqual(response.status_code, 501)
+
+    @patch("rpg_backend.rpg.neo4j_connection.AsyncGraphDatabase.driver")
+    def test_one_driver_per_process(self, driver):
+        driver.return_value.close = AsyncMock()
+
+        async def get():
+            return neo4j_connection.get_async_driver(), neo4j_connection.get_async_driver()
+
+        first, second = asyncio.run(get())
+        self.assertIs(first, second)
+
+        # a second loop (what WSGI gives each request) gets no new driver
+        with self.assertRaises(neo4j_connection.AsyncDriverUnavailable):
+            asyncio.run(get())
+        self.assertEqual(driver.call_count, 1)
+
+    @patch.object(neo4j_connection, "get_async_session")
+    def test_writes_run_commit_callbacks_after_the_commit(self, get_async_session):
+        session = get_async_session.return_value.__aenter__.return_value
+        committed = []
+
+        async def execute_write(work, *args):
+            value = await work(MagicMock(), *args)
+            committed.append("commit")
+            return value
+
+        async def work(tx):
+            tx.on_commit(lambda: committed.append("callback"))
+            return 5
+
+        session.execute_write.side_effect = execute_write
+
+        self.assertEqual(asyncio.run(neo4j_connection.async_execute_write(work)), 5)
+        self.assertEqual(committed, ["commit", "callback"])
+
+    @patch("rpg_backend.rpg.neo4j_connection.AsyncGraphDatabase.driver")
+    def test_lifespan_shutdown_closes_the_driver(self, driver):
+        driver.return_value.close = AsyncMock()
+        messages = [{"type": "lifespan.startup"}, {"type": "lifespan.shutdown"}]
+        sent = []
+
+        async def serve():
+            neo4j_connection.get_async_driver()
+
+            async def receive():
+                return messages.pop(0)
+
+            async def send(message):
+                sent.append(message["type"])
+
+            await neo4j_connection.lifespan({"type": "lifespan"}, receive, send)
+
+        asyncio.run(serve())
+        self.assertEqual(sent, ["lifespan.startup.complete", "lifespan.shutdown.complete"])
+        driver.return_value.close.assert_awaited_once()
+
+
+# =============================
+# MONGODB CLIENT
+# =============================
+
+@patch("rpg_backend.rpg.mongo_connection.MongoClient")
+class SharedClientTest(SimpleTestCase):
+
+    def setUp(self):
+        mongo_connection.close_client()
+        self.addCleanup(mongo_connection.close_client)
+
+    def test_collections_connect_on_first_use(self, client):
+        items = mongo_connection.LazyCollection("item")
+        client.assert_not_called()
+
+        items.find_one({"id": 1})
+        mongo_connection.LazyCollection("battle").count_documents({})
+
+        client.assert_called_once()
+        self.assertEqual(client.call_args.kwargs["maxPoolSize"], settings.MONGO["MAX_POOL_SIZE"])
+        database = client.return_value.__getitem__
+        database.assert_called_with(settings.MONGO["DATABASE"])
+        database.return_value.__getitem__.return_value.find_one.assert_called_once_with({"id": 1})
+
+    def test_compressors_are_optional(self, client):
+        with patch.dict(settings.MONGO, {"COMPRESSORS": ""}):
+            self.assertNotIn("compressors", mongo_connection._client_kwargs())
+        with patch.dict(settings.MONGO, {"COMPRESSORS": "zstd"}):
+            self.assertEqual(mongo_connection._client_kwargs()["compressors"], "zstd")
+
+
+# =============================
+# MONGODB HELPERS
+# =============================
+
+def mock_db(**collections):
+    """MagicMock database; find() on each named collection returns the given documents"""
+    mocks = {}
+    for name, docs in collections.items():
+        mocks[name] = MagicMock(name=name)
+        mocks[name].find.return_value = docs
+
+    db = MagicMock()
+    db.__getitem__.side_effect = lambda name: mocks.setdefault(name, MagicMock(name=name))
+    return db
+
+
+@patch.dict(settings.MONGO, {"CHARACTER_READ_MODEL": True})
+class CharacterReadModelTest(SimpleTestCase):
+
+    def setUp(self):
+        self.db = mock_db(
+            guild=[{"id": 1, "guild_name": "Dawn"}],
+            skill=[{"id": 1, "name": "Slash", "damage": 5, "healing": 0}, {"id": 2, "name": "Mend", "damage": 0, "healing": 9}],
+            quest=[{"id": 7, "title": "Rats", "reward_xp": 10, "reward_money": 2}],
+        )
+
+    def test_batch_reads_each_catalog_once(self):
+        docs = [
+            {"guild": 1, "skills": [2, 1], "quests": [7]},
+            {"guild": 1, "skills": [1, 99]},
+            {"quests": [7]},
+        ]
+        catalog = read_model.prefetch_summaries(docs, self.db)
+
+        for name in ("guild", "skill", "quest"):
+            self.assertEqual(self.db[name].find.call_count, 1, name)
+        query, _ = self.db["skill"].find.call_args.args
+        self.assertEqual(set(query["id"]["$in"]), {1, 2, 99})
+
+        character = read_model.insert_details(dict(docs[1]), self.db, catalog)
+        self.assertEqual(character["details"]["guild"]["guild_name"], "Dawn")
+        self.assertEqual([skill["id"] for skill in character["details"]["skills"]], [1])
+
+        fields = read_model.update_details({"skills": [2, 1]}, self.db, catalog)
+        self.assertEqual([skill["name"] for skill in fields["details.skills"]], ["Mend", "Slash"])
+        self.assertNotIn("details.guild", fields)
+
+        # everything came from the catalog
+        self.assertEqual(self.db["skill"].find.call_count, 1)
+
+    def test_new_skill_is_embedded_in_existing_holders(self):
+        self.db["character"].find.return_value = [{"_id": "a", "skills": [2, 1]}, {"_id": "b", "skills": [1]}]
+
+        read_model.fan_out_insert("skill", [1], self.db)
+
+        query, _ = self.db["character"].find.call_args.args
+        self.assertEqual(query, {"skills": {"$in": [1]}})
+        requests = self.db["character"].bulk_write.call_args.args[0]
+        self.assertEqual([request._doc["$set"]["details.skills"][0]["id"] for request in requests], [2, 1])
+        self.assertEqual(len(requests[0]._doc["$set"]["details.skills"]), 2)
+
+    def test_updates_only_patch_existing_arrays(self):
+        self.db["character"].update_many.return_value.modified_count = 2
+        self.db["character"].bulk_write.return_value.modified_count = 1
+        self.db["character"].find.return_value = [{"_id": "a", "skills": [1]}]
+
+        modified = read_model.fan_out_update("skill", {"id": 1, "name": "Cleave", "damage": 6, "healing": 0}, self.db)
+
+        query, update = self.db["character"].update_many.call_args.args
+        self.assertEqual(query, {"skills": 1, "details.skills": {"$type": "array"}})
+        self.assertIn("details.skills.$[entry]", update["$set"])
+        query, _ = self.db["character"].find.call_args.args
+        self.assertEqual(query, {"skills": 1, "details.skills": {"$not": {"$type": "array"}}})
+        self.assertEqual(modified, 3)
+
+    def test_bulk_inserts_fan_out_too(self):
+        self.db["character"].find.return_value = [{"_id": "a", "guild": 1}]
+
+        read_model.fan_out_written("guild", [("insert", 1), ("delete", 3)], self.db)
+
+        request = self.db["character"].bulk_write.call_args.args[0][0]
+        self.assertEqual(request._doc, {"$set": {"details.guild": {"id": 1, "guild_name": "Dawn"}}})
+        self.db["character"].update_many.assert_called_once()  # the delete
+
+    def test_prefetch_skips_reads_when_disabled(self):
+        with patch.dict(settings.MONGO, {"CHARACTER_READ_MODEL": False}):
+            catalog = read_model.prefetch_summaries([{"guild": 1, "skills": [1]}], self.db)
+        self.assertEqual(catalog, {"guild": {}, "skill": {}, "quest": {}})
+        self.db["guild"].find.assert_not_called()
+
+
+class MongoIndexTest(SimpleTestCase):
+
+    def test_every_collection_gets_a_unique_id_index(self):
+        db = mock_db()
+        ensure_indexes(db)
+
+        for collection in MONGO_COLLECTIONS:
+            models = db[collection].create_indexes.call_args.args[0]
+            self.assertEqual(models[0].document["name"], "id_unique")
+            self.assertTrue(models[0].document["unique"])
+
+    def test_collection_scans_are_reported(self):
+        db = mock_db()
+        db["character"].find.return_value.explain.return_value = {
+            "queryPlanner": {"winningPlan": {"stage": "FETCH", "inputStage": {"stage": "IXSCAN"}}},
+        }
+        db["item"].find.return_value.explain.return_value = {
+            "queryPlanner": {"winningPlan": {"stage": "COLLSCAN"}},
+        }
+
+        report = {name: (uses_index, stages) for name, uses_index, stages in explain_filter_queries(db)}
+
+        self.assertEqual(report["character filter ?guild="], (True, ["FETCH", "IXSCAN"]))
+        self.assertEqual(report["item detail"], (False, ["COLLSCAN"]))
+
+    def test_ids_are_backfilled_before_the_unique_index(self):
+        calls = MagicMock()
+        calls.backfill_ids.return_value = 0
+        calls.ensure_indexes.return_value = {}
+        module = "rpg_backend.rpg.management.commands.mongo_indexes"
+
+        with patch(f"{module}.get_db"), patch(f"{module}.backfill_ids", calls.backfill_ids), \
+                patch(f"{module}.ensure_indexes", calls.ensure_indexes), \
+                patch(f"{module}.report_index_sizes"), patch(f"{module}.check_filter_queries"):
+            MongoIndexes(stdout=StringIO()).handle(check_only=False)
+
+        self.assertEqual(calls.mock_calls[-1][0], "ensure_indexes")
+        self.assertEqual(len(calls.backfill_ids.mock_calls), len(MONGO_COLLECTIONS))
+
+
+class MongoSequenceTest(SimpleTestCase):
+
+    def setUp(self):
+        mongo_sequences._blocks.clear()
+        self.db = mock_db()
+        self.counters = self.db["counters"]
+
+    def test_first_use_seeds_the_counter_from_the_max_id(self):
+        self.counters.find_one_and_update.side_effect = [None, {"value": 8}]
+        self.db["item"].find_one.return_value = {"id": 7}
+
+        self.assertEqual(mongo_sequences.advance_counter("item", db=self.db), 8)
+        self.counters.update_one.assert_called_once_with({"_id": "item"}, {"$max": {"value": 7}}, upsert=True)
+
+    @patch.dict(settings.MONGO, {"ID_BLOCK_SIZE": 10})
+    def test_blocks_take_one_round_trip(self):
+        self.counters.find_one_and_update.return_value = {"value": 10}
+
+        with patch.object(mongo_sequences, "get_db", return_value=self.db):
+            ids = [mongo_sequences.next_id("item") for _ in range(3)]
+
+        self.assertEqual(ids, [1, 2, 3])
+        self.counters.find_one_and_update.assert_called_once()
+        self.assertEqual(self.counters.find_one_and_update.call_args.args[1], {"$inc": {"value": 10}})
+
+    def test_max_id_skips_non_integer_ids(self):
+        self.counters.find_one_and_update.side_effect = [None, {"value": 8}]
+        self.db["item"].find_one.return_value = {"id": 7}
+
+        mongo_sequences.advance_counter("item", db=self.db)
+
+        self.assertEqual(self.db["item"].find_one.call_args.args[0], {"id": {"$type": ["int", "long"]}})
+
+    @patch.dict(settings.MONGO, {"ID_BLOCK_SIZE": 10, "ID_EPOCH_CHECK_SECONDS": 0})
+    def test_a_sync_elsewhere_retires_cached_blocks(self):
+        self.counters.find_one.return_value = {"epoch": 1}
+        self.counters.find_one_and_update.side_effect = [{"value": 10}, {"value": 60}]
+
+        with patch.object(mongo_sequences, "get_db", return_value=self.db):
+            self.assertEqual(mongo_sequences.next_id("item"), 1)
+            self.counters.find_one.return_value = {"epoch": 2}
+            self.assertEqual(mongo_sequences.next_id("item"), 51)
+
+    def test_ranges_start_after_the_previous_value(self):
+        self.counters.find_one_and_update.return_value = {"value": 14}
+
+        with patch.object(mongo_sequences, "get_db", return_value=self.db):
+            self.assertEqual(mongo_sequences.reserve_ids("item", 4), 11)
+
+
+class MongoPaginationTest(SimpleTestCase):
+
+    def find(self, query_string, rows):
+        collection = MagicMock()
+        cursor = collection.with_options.return_value.find.return_value.sort.return_value.limit.return_value
+        cursor.__iter__.return_value = iter(rows)
+        response = paginated_find(collection, RequestFactory().get("/", query_string), {"guild": 1})
+        criteria, _ = collection.with_options.return_value.find.call_args.args
+        return criteria, json.loads(response.content)
+
+    def test_pages_only_hold_integer_ids(self):
+        criteria, page = self.find({"limit": 2}, [{"id": 3}, {"id": 4}])
+        self.assertEqual(criteria, {"guild": 1, "id": {"$type": ["int", "long"]}})
+        self.assertEqual(page["next_cursor"], 4)
+
+        criteria, page = self.find({"after": 4, "limit": 2}, [{"id": 5}])
+        self.assertEqual(criteria, {"guild": 1, "id": {"$type": ["int", "long"], "$gt": 4}})
+        self.assertIsNone(page["next_cursor"])
+
+    def test_backfill_reserves_ids_from_the_counter(self):
+        db = mock_db()
+        db["battle"].find.return_value.sort.return_value = [{"_id": "a"}, {"_id": "b"}]
+        db["battle"].find_one.return_value = {"id": 9}
+        db["counters"].find_one_and_update.return_value = {"value": 14}
+
+        self.assertEqual(backfill_ids(db, "battle"), 2)
+
+        db["counters"].update_one.assert_called_once_with({"_id": "battle"}, {"$max": {"value": 9}}, upsert=True)
+        self.assertEqual(db["counters"].find_one_and_update.call_args.args[1], {"$inc": {"value": 2}})
+        requests = db["battle"].bulk_write.call_args.args[0]
+        self.assertEqual([request._doc for request in requests], [{"$set": {"id": 13}}, {"$set": {"id": 14}}])
+        self.assertEqual(db["battle"].find.call_args.args[0], WITHOUT_INT_ID)
+
+
+class MongoInventoryOpsTest(SimpleTestCase):
+
+    def test_delta_pushes_only_a_missing_entry_then_increments(self):
+        push, inc = item_delta_ops(1, 2, -3)
+        self.assertEqual(push._filter, {"id": 1, "items.item": {"$ne": 2}})
+        self.assertEqual(push._doc, {"$push": {"items": {"item": 2, "quantity": 0}}})
+        self.assertEqual(inc._doc, {"$inc": {"items.$[entry].quantity": -3}})
+        self.assertEqual(inc._array_filters, [{"entry.item": 2}])
+
+    def test_prune_is_limited_to_touched_items(self):
+        ops = prune_ops({1: [3, 2, 3], 4: [2]})
+        self.assertEqual([(op._filter, op._doc) for op in ops], [
+            ({"id": 1}, {"$pull": {"items": {"item": {"$in": [2, 3]}, "quantity": {"$lte": 0}}}}),
+            ({"id": 4}, {"$pull": {"items": {"item": {"$in": [2]}, "quantity": {"$lte": 0}}}}),
+        ])
+
+
+class MongoSearchTest(SimpleTestCase):
+
+    def test_ngrams_are_word_prefixes(self):
+        self.assertEqual(ngrams("Dark Elf", None), ["da", "dar", "dark", "el", "elf"])
+        self.assertEqual(len(ngrams("x" * 40)), MAX_NGRAM - 1)
+        self.assertEqual(search_keys("user", {"username": "Al", "email": "al@x.io"}), {NGRAM_FIELD: ["al", "io"]})
+
+    def test_prefix_is_an_anchored_range(self):
+        query, collation = search_query("character", " Dra ", "prefix")
+        self.assertEqual(query, {"character_name": {"$gte": "Dra", "$lt": "Dra\uffff"}})
+        self.assertIs(collation, SEARCH_COLLATION)
+
+    def test_autocomplete_needs_every_word(self):
+        query, collation = search_query("user", "Al Bo", "autocomplete")
+        self.assertEqual(query, {NGRAM_FIELD: {"$all": ["al", "bo"]}})
+        self.assertIsNone(collation)
+
+        for q, mode in (("a", "autocomplete"), ("  ", "prefix"), ("al", "regex")):
+            with self.assertRaises(ValueError):
+                search_query("user", q, mode)
+
+    def test_filters_only_collate_name_prefixes(self):
+        query, collation = character_filter(min_level=3, guild=1)
+        self.assertEqual(query, {"level": {"$gte": 3}, "guild": 1})
+        self.assertIsNone(collation)
+        self.assertIs(character_filter("Dra", guild=1)[1], SEARCH_COLLATION)
+
+        query, collation = user_filter(email="al", is_staff=False)
+        self.assertEqual(query, {NGRAM_FIELD: {"$all": ["al"]}, "is_staff": False})
+        self.assertIsNone(collation)
+        self.assertIs(user_filter("al")[1], SEARCH_COLLATION)
+
+    def test_text_results_sort_by_score(self):
+        coll = MagicMock()
+        search(coll, "character", "dragon", "text", limit=5, extra={"guild": 1})
+
+        query, projection = coll.find.call_args.args
+        self.assertEqual(query, {"guild": 1, "$text": {"$search": "dragon"}})
+        self.assertEqual(projection[NGRAM_FIELD], 0)
+        coll.find.return_value.sort.return_value.limit.assert_called_once_with(5)
+
+
+@patch("rpg_backend.rpg.mongo_views.bulk_view.reserve_ids", return_value=20)
+class MongoBulkWriteTest(SimpleTestCase):
+
+    def setUp(self):
+        self.collection = MagicMock()
+        self.collection.find.return_value = [{"id": 1}]
+        patcher = patch.object(MongoItemBulk, "collection", self.collection)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def post(self, body):
+        return self.client.post(reverse("mongo-item-bulk"), body, content_type="application/json")
+
+    def test_every_operation_gets_a_result(self, reserve_ids):
+        self.collection.bulk_write.return_value.bulk_api_result = {"nInserted": 2, "nModified": 1}
+
+        response = self.post([
+            {"op": "insert", "doc": {"name": "a", "id": 99}},
+            {"op": "update", "id": 1, "doc": {"value": 5}},
+            {"op": "delete", "id": 2},
+            {"op": "insert", "doc": {"name": "b"}},
+        ])
+
+        self.assertEqual(response.status_code, 207)
+        results = response.json()["results"]
+        self.assertEqual([(r["op"], r["id"], r["status"]) for r in results], [
+            ("insert", 20, "ok"), ("update", 1, "ok"), ("delete", 2, "not_found"), ("insert", 21, "ok"),
+        ])
+        reserve_ids.assert_called_once_with("item", 2)
+
+        requests = self.collection.bulk_write.call_args.args[0]
+        self.assertEqual(requests[0]._doc, {"name": "a", "id": 20})
+        self.assertFalse(self.collection.bulk_write.call_args.kwargs["ordered"])
+
+    def test_write_errors_are_reported_per_operation(self, reserve_ids):
+        self.collection.bulk_write.side_effect = BulkWriteError({
+            "nInserted": 1, "writeErrors": [{"index": 1, "errmsg": "duplicate key"}],
+        })
+
+        response = self.post([{"op": "insert", "doc": {}}, {"op": "insert", "doc": {}}])
+
+        self.assertEqual(response.status_code, 207)
+        self.assertEqual([r["status"] for r in response.json()["results"]], ["ok", "error"])
+        self.assertEqual(response.json()["results"][1]["error"], "duplicate key")
+
+    def test_malformed_operations_are_rejected(self, reserve_ids):
+        for body in ({"op": "insert"}, [{"op": "upsert"}], [{"op": "update", "id": 1}], [{"op": "delete"}]):
+            self.assertEqual(self.post(body).status_code, 400, body)
+        self.collection.bulk_write.assert_not_called()
+
+
+class MongoResourceTest(SimpleTestCase):
+
+    def setUp(self):
+        self.collection = MagicMock()
+        self.raw = self.collection.with_options.return_value
+        patcher = patch.object(MongoItemDetail, "collection", self.collection)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_raw_documents_encode_in_one_pass(self):
+        object_id = ObjectId("0123456789ab0123456789ab")
+        doc = RawBSONDocument(bson.encode({"_id": object_id, "id": 1, "price": Decimal128("1.50")}))
+        self.assertEqual(encode_json([doc]), b'[{"_id":"0123456789ab0123456789ab","id":1,"price":"1.50"}]')
+
+    def test_detail_reads_raw_bson(self):
+        self.raw.find_one.return_value = RawBSONDocument(bson.encode({"id": 4, "name": "Sword"}))
+
+        response = self.client.get(reverse("mongo-item-detail", args=[4]))
+
+        self.assertEqual(response.json(), {"id": 4, "name": "Sword"})
+        self.assertEqual(self.collection.with_options.call_args.kwargs["codec_options"], RAW_OPTIONS)
+        self.assertEqual(self.raw.find_one.call_args.args, ({"id": 4}, HIDDEN_FIELDS))
+
+    def test_update_is_one_round_trip(self):
+        self.raw.find_one_and_update.return_value = None
+        url = reverse("mongo-item-detail", args=[4])
+
+        response = self.client.put(url, {"name": "Axe", "_id": "x"}, content_type="application/json")
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.json(), {"error": "Item not found"})
+        self.assertEqual(self.raw.find_one_and_update.call_args.args, ({"id": 4}, {"$set": {"name": "Axe"}}))
+
+        response = self.client.put(url, {"_id": "x"}, content_type="application/json")
+        self.assertEqual(response.status_code, 400)
+
+
+class MongoAnalyticsTest(SimpleTestCase):
+
+    def test_pipelines_start_with_an_indexable_match(self):
+        self.assertEqual(leaderboard_pipeline("gold", guild=3, limit=5)[:3], [
+            {"$match": {"guild": 3}}, {"$sort": {"gold": -1, "id": 1}}, {"$limit": 5},
+        ])
+        self.assertEqual(guild_stats_pipeline()[0], {"$match": {"guild": {"$ne": None}}})
+        self.assertEqual(inventory_value_pipeline(character=2)[0], {"$match": {"character": 2}})
+        stages = battle_win_rates_pipeline(min_battles=3)
+        self.assertIn({"$match": {"battles": {"$gte": 3}}}, stages)
+
+    @patch("rpg_backend.rpg.mongo_views.analytics_view.run_report", return_value=([{"n": 1}], False))
+    def test_reports_without_params_use_the_pipeline_attribute(self, run_report):
+        class Report(MongoAnalyticsView):
+            collection = MagicMock()
+            name = "all"
+            pipeline = staticmethod(lambda: [{"$match": {}}])
+
+        request = RequestFactory().get("/", {"refresh": 1})
+        request.user = MagicMock(is_staff=False)
+        response = Report().report(request)
+
+        self.assertEqual(response.status_code, 200)
+        _, name, pipeline, params, refresh = run_report.call_args.args
+        self.assertEqual((name, pipeline, params, refresh), ("all", [{"$match": {}}], {}, False))
+
+        request.user.is_staff = True
+        Report().report(request)
+        self.assertTrue(run_report.call_args.args[4])
+
+
+# =============================
+# SQL QUERY COUNTS
+# =============================
+# Every ModelViewSet in views/ answers a list or a detail request in a
+# fixed number of queries: the counts below must hold however many rows
+# (and related rows) are serialized.
+
+# router basename -> queries for a list / a detail
+VIEWSET_QUERIES = {
+    "user": 1,
+    # characters, user + guild joined, then skills, quests (+ npc) and battles
+    "character": 4,
+    "guild": 1,
+    "item": 1,
+    "inventory": 1,
+    "npc": 1,
+    # npc joined for npc_name
+    "quest": 1,
+    "skill": 1,
+    "battle": 1,
+    # user joined for the nested user
+    "transaction": 1,
+}
+
+RELATED_PER_CHARACTER = 3
+
+
+class ViewSetQueryCountTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user("query-owner", password="query-owner", is_staff=True)
+        cls.serial = count(1)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+
+    def add_rows(self, size):
+        """`size` more rows behind every endpoint, each character fully related"""
+        for _ in range(size):
+            n = next(self.serial)
+            npc = NPC.objects.create(name=f"npc {n}")
+            guild = Guild.objects.create(guild_name=f"guild {n}")
+            item = Item.objects.create(name=f"item {n}", rarity="common", value=n)
+            user = User.objects.create_user(f"user {n}")
+
+            character = Character.objects.create(character_name=f"character {n}", user=self.owner, guild=guild)
+            for i in range(RELATED_PER_CHARACTER):
+                character.skills.add(Skill.objects.create(name=f"skill {n}.{i}"))
+                character.quests.add(Quest.objects.create(title=f"quest {n}.{i}", npc=npc))
+                Battle.objects.create(character=character, outcome="Victory")
+
+            inventory = Inventory.objects.create(character=character)
+            InventoryItem.objects.create(inventory=inventory, item=item, quantity=n)
+            Transaction.objects.create(user=user, item=item, quantity=1, cost=n)
+
+    def assertQueries(self, url, expected):
+        with self.assertNumQueries(expected):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, response.content)
+        return response
+
+    def test_list_queries_do_not_grow_with_rows(self):
+        for size in (1, 10):
+            self.add_rows(size)
+            for basename, expected in VIEWSET_QUERIES.items():
+                with self.subTest(basename=basename, rows=size):
+                    self.assertQueries(reverse(f"{basename}-list"), expected)
+
+    def test_detail_queries_do_not_grow_with_relations(self):
+        self.add_rows(2)
+        models = {
+            "user": User, "character": Character, "guild": Guild, "item": Item,
+            "inventory": Inventory, "npc": NPC, "quest": Quest, "skill": Skill,
+            "battle": Battle, "transaction": Transaction,
+        }
+
+        for basename, expected in VIEWSET_QUERIES.items():
+            pk = models[basename].objects.order_by("pk").values_list("pk", flat=True).last()
+            with self.subTest(basename=basename):
+                self.assertQueries(reverse(f"{basename}-detail", args=[pk]), expected)
+
+    def test_character_list_serializes_relations(self):
+        self.add_rows(3)
+        response = self.assertQueries(reverse("character-list"), VIEWSET_QUERIES["character"])
+
+        for character in response.json()["results"]:
+            self.assertEqual(character["user"]["username"], "query-owner")
+            self.assertEqual(len(character["skills"]), RELATED_PER_CHARACTER)
+            self.assertEqual(len(character["battles"]), RELATED_PER_CHARACTER)
+            self.assertTrue(all(quest["npc_name"] for quest in character["quests"]))
+
+
+# =============================
+# SQL KEYSET PAGINATION
+# =============================
+
+class KeysetPaginationTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("pager", password="pager")
+        npc = NPC.objects.create(name="pager npc")
+        Quest.objects.bulk_create(Quest(title=f"quest {i}", npc=npc) for i in range(25))
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_pages_follow_the_primary_key(self):
+        seen = []
+        url = reverse("quest-list") + "?limit=10"
+
+        while url:
+            page = self.client.get(url).json()
+            self.assertLessEqual(len(page["results"]), 10)
+            seen += [quest["id"] for quest in page["results"]]
+            url = page["next"]
+
+        self.assertEqual(seen, list(Quest.objects.order_by("pk").values_list("pk", flat=True)))
+
+    def test_limit_is_capped(self):
+        with patch.object(KeysetPagination, "max_page_size", 5):
+            page = self.client.get(reverse("quest-list") + "?limit=1000").json()
+        self.assertEqual(len(page["results"]), 5)
+
+    def test_approximate_count_is_opt_in(self):
+        self.assertNotIn("count", self.client.get(reverse("quest-list")).json())
+
+        page = self.client.get(reverse("quest-list") + "?count=1").json()
+        self.assertIn("count", page)
+
+        # table statistics cannot answer for a filtered queryset
+        self.assertIsNone(approximate_count(Quest.objects.filter(title="quest 1")))
+
+
+# =============================
+# QUEST COMPLETION
+# =============================
+
+class QuestCompletionTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("quester", password="quester")
+        cls.other = User.objects.create_user("other-quester", password="other-quester")
+        npc = NPC.objects.create(name="quest giver")
+        cls.big = Quest.objects.create(title="big", npc=npc, reward_xp=250, reward_money=30)
+        cls.small = Quest.objects.create(title="small", npc=npc, reward_xp=20, reward_money=5)
+        cls.unpaid = Quest.objects.create(title="unpaid", npc=npc, reward_xp=None, reward_money=None)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def character(self, name, user=None, xp=0, quests=()):
+        character = Character.objects.create(character_name=name, user=user or self.user, xp=xp, gold=10)
+        character.quests.add(*quests)
+        return character
+
+    def test_level_up_is_closed_form(self):
+        self.assertEqual(level_up(1, 99), (1, 99))
+        self.assertEqual(level_up(1, 100), (2, 0))
+        self.assertEqual(level_up(4, 1040), (14, 40))
+        self.assertEqual(level_up(3, -20), (3, -20))
+
+    def test_complete_applies_rewards_once(self):
+        character = self.character("hero", xp=90, quests=[self.big])
+        url = reverse("quest-action-complete", args=[self.big.pk])
+
+        response = self.client.post(url)
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(response.json()["level"], 4)
+
+        character.refresh_from_db()
+        self.assertEqual((character.level, character.xp, character.gold), (4, 40, 40))
+        self.assertFalse(character.quests.exists())
+
+        self.assertEqual(self.client.post(url).status_code, 400)
+
+    def test_batch_completes_pairs_set_wise(self):
+        first = self.character("first", quests=[self.big, self.small, self.unpaid])
+        second = self.character("second", xp=95, quests=[self.small])
+        foreign = self.character("foreign", user=self.other, quests=[self.small])
+
+        completions = [
+            {"character": first.pk, "quest": self.big.pk},
+            {"character": first.pk, "quest": self.small.pk},
+            {"character": first.pk, "quest": self.small.pk},
+            {"character": first.pk, "quest": self.unpaid.pk},
+            {"character": second.pk, "quest": self.small.pk},
+            {"character": second.pk, "quest": self.big.pk},
+            {"character": foreign.pk, "quest": self.small.pk},
+        ]
+        # lock, active quests, delete and one UPDATE, plus the savepoint and its release
+        with self.assertNumQueries(6):
+            response = self.client.post(
+                reverse("quest-action-complete-batch"), {"completions": completions}, format="json",
+            )
+        self.assertEqual(response.status_code, 200, response.content)
+
+        body = response.json()
+        self.assertEqual(body["completed"], 4)
+        self.assertEqual(
+            [result["status"] for result in body["results"]],
+            ["completed", "completed", "not_active", "completed", "completed", "not_active", "character_not_found"],
+        )
+
+        first.refresh_from_db()
+        second.refresh_from_db()
+        foreign.refresh_from_db()
+        self.assertEqual((first.level, first.xp, first.gold), (3, 70, 45))
+        self.assertEqual((second.level, second.xp, second.gold), (2, 15, 15))
+        self.assertEqual(foreign.quests.count(), 1)
+        self.assertEqual(body["characters"][str(first.pk)]["levels_gained"], 2)
+
+    def test_batch_rejects_invalid_bodies(self):
+        url = reverse("quest-action-complete-batch")
+        for body in ({}, {"completions": []}, {"completions": [{"character": 1}]}):
+            with self.subTest(body=body):
+                self.assertEqual(self.client.post(url, body, format="json").status_code, 400)
+
+
+# =============================
+# PURCHASES
+# =============================
+
+class PurchaseTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("buyer", password="buyer")
+        cls.other = User.objects.create_user("other-buyer", password="other-buyer")
+        cls.sword = Item.objects.create(name="sword", rarity="common", value=30)
+        cls.potion = Item.objects.create(name="potion", rarity="common", value=5)
+        cls.relic = Item.objects.create(name="relic", rarity="legendary", value=None)
+        cls.items = Item.objects.bulk_create(
+            Item(name=f"trinket {i}", rarity="common", value=1) for i in range(20)
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.character = Character.objects.create(character_name="buyer", user=self.user, gold=100)
+        self.inventory = Inventory.objects.create(character=self.character)
+
+    def post(self, name, body):
+        return self.client.post(reverse(f"transaction-{name}"), body, format="json")
+
+    def owned(self, item):
+        return InventoryItem.objects.get(inventory=self.inventory, item=item).quantity
+
+    def test_purchase_pays_logs_and_stacks(self):
+        InventoryItem.objects.create(inventory=self.inventory, item=self.potion, quantity=2)
+
+        response = self.post("purchase", {"item": self.potion.pk, "quantity": 3})
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(response.json()["gold"], 85)
+
+        self.character.refresh_from_db()
+        self.assertEqual(self.character.gold, 85)
+        self.assertEqual(self.owned(self.potion), 5)
+        self.assertTrue(Transaction.objects.filter(user=self.user, item=self.potion, quantity=3, cost=15).exists())
+
+    def test_duplicate_inventory_rows_are_collapsed(self):
+        first = InventoryItem.objects.create(inventory=self.inventory, item=self.potion, quantity=2)
+        second = InventoryItem.objects.create(inventory=self.inventory, item=self.potion, quantity=3)
+
+        response = self.post("purchase", {"item": self.potion.pk, "quantity": 1})
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(response.json()["items"][0]["owned"], 6)
+
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual((first.quantity, second.quantity), (3, 3))
+
+    def test_cart_is_all_or_nothing(self):
+        response = self.post("cart", {"items": [
+            {"item": self.sword.pk, "quantity": 3},
+            {"item": self.potion.pk, "quantity": 3},
+        ]})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["error"], "Not enough gold to complete purchase.")
+
+        self.character.refresh_from_db()
+        self.assertEqual(self.character.gold, 100)
+        self.assertFalse(Transaction.objects.exists())
+        self.assertFalse(InventoryItem.objects.exists())
+
+    def test_cart_statements_do_not_grow_with_lines(self):
+        InventoryItem.objects.create(inventory=self.inventory, item=self.items[0], quantity=1)
+        lines = [{"item": item.pk, "quantity": 2} for item in self.items]
+
+        # lock, prices, inventory, inventory rows, gold, log, update, insert + savepoint pair
+        with self.assertNumQueries(10):
+            response = self.post("cart", {"items": lines + [{"item": self.items[0].pk}]})
+        self.assertEqual(response.status_code, 200, response.content)
+
+        self.assertEqual(response.json()["total_cost"], 41)
+        self.assertEqual(self.owned(self.items[0]), 4)
+        self.assertEqual(self.owned(self.items[-1]), 2)
+        self.assertEqual(Transaction.objects.count(), len(self.items))
+
+    def test_rejected_purchases(self):
+        foreign = Character.objects.create(character_name="not mine", user=self.other, gold=100)
+        cases = [
+            ({"item": self.relic.pk}, 400),
+            ({"item": 0}, 404),
+            ({"item": self.potion.pk, "quantity": 0}, 400),
+            ({"item": self.potion.pk, "quantity": 10 ** 12}, 400),
+            ({"item": self.potion.pk, "character": foreign.pk}, 404),
+        ]
+        for body, expected in cases:
+            with self.subTest(body=body):
+                self.assertEqual(self.post("purchase", body).status_code, expected)
+
+        self.assertEqual(self.post("cart", {"items": []}).status_code, 400)
+        self.assertFalse(Transaction.objects.exists())
+
+    def test_transactions_are_only_written_by_purchases(self):
+        transaction = Transaction.objects.create(user=self.user, item=self.potion, quantity=1, cost=5)
+
+        self.assertEqual(self.client.post(reverse("transaction-list"), {"quantity": 1}).status_code, 405)
+        detail = reverse("transaction-detail", args=[transaction.pk])
+        self.assertEqual(self.client.put(detail, {"cost": 0}).status_code, 405)
+        self.assertEqual(self.client.delete(detail).status_code, 405)
@@ -16,27 +16,34 @@ from .views.transaction_view import TransactionViewSet
 from .views.quest_actions import QuestActionViewSet
 
 # Import MongoDB ViewSets
-from .mongo_views.character_view import MongoCharacterList, MongoCharacterDetail, MongoCharacterFilter
-from .mongo_views.item_view import MongoItemList, MongoItemDetail
-from .mongo_views.skills_view import MongoSkillList, MongoSkillDetail
-from .mongo_views.quest_view import MongoQuestList, MongoQuestDetail
-from .mongo_views.npc_view import MongoNPCList, MongoNPCDetail
-from .mongo_views.guild_view import MongoGuildList, MongoGuildDetail
-from .mongo_views.inventory_view import MongoInventoryList, MongoInventoryDetail, MongoInventoryAddItem, MongoInventoryUpdateItem, MongoInventoryRemoveItem, MongoFilterInventory
-from .mongo_views.transaction_view import MongoTransactionList, MongoTransactionDetail
-from .mongo_views.battle_view import MongoBattleList, MongoBattleDetail
-from .mongo_views.user_view import MongoUserList, MongoUserDetail, MongoUserFilter
+from .mongo_views.character_view import MongoCharacterList, MongoCharacterDetail, MongoCharacterFilter, MongoCharacterSearch, MongoCharacterBulk
+from .mongo_views.item_view import MongoItemList, MongoItemDetail, MongoItemBulk
+from .mongo_views.skills_view import MongoSkillList, MongoSkillDetail, MongoSkillBulk
+from .mongo_views.quest_view import MongoQuestList, MongoQuestDetail, MongoQuestBulk
+from .mongo_views.npc_view import MongoNPCList, MongoNPCDetail, MongoNPCBulk
+from .mongo_views.guild_view import MongoGuildList, MongoGuildDetail, MongoGuildBulk
+from .mongo_views.inventory_view import MongoInventoryList, MongoInventoryDetail, MongoInventoryAddItem, MongoInventoryUpdateItem, MongoInventoryRemoveItem, MongoInventoryBatchItems, MongoFilterInventory, MongoInventoryBulk
+from .mongo_views.transaction_view import MongoTransactionList, MongoTransactionDetail, MongoTransactionBulk
+from .mongo_views.battle_view import MongoBattleList, MongoBattleDetail, MongoBattleBulk
+from .mongo_views.user_view import MongoUserList, MongoUserDetail, MongoUserFilter, MongoUserSearch
+from .mongo_views.analytics_view import MongoInventoryValue, MongoLeaderboard, MongoGuildStats, MongoBattleWinRates
 
 # Import Neo4j Views
-from .neo4j_views.character_view import CharacterNeo4jView
-from .neo4j_views.item_view import ItemNeo4jView
-from .neo4j_views.skill_view import SkillNeo4jView
-from .neo4j_views.quest_view import QuestNeo4jView
-from .neo4j_views.guild_view import GuildNeo4jView
-from .neo4j_views.npc_view import NPCNeo4jView
-from .neo4j_views.battle_view import BattleNeo4jView
-from .neo4j_views.transaction_view import TransactionNeo4jView
+from .neo4j_views.character_view import CharacterNeo4jView, CharacterBulkNeo4jView
+from .neo4j_views.item_view import ItemNeo4jView, ItemBulkNeo4jView
+from .neo4j_views.skill_view import SkillNeo4jView, SkillBulkNeo4jView
+from .neo4j_views.quest_view import QuestNeo4jView, QuestBulkNeo4jView
+from .neo4j_views.guild_view import GuildNeo4jView, GuildBulkNeo4jView
+from .neo4j_views.npc_view import NPCNeo4jView, NPCBulkNeo4jView
+from .neo4j_views.battle_view import BattleNeo4jView, BattleBulkNeo4jView
+from .neo4j_views.transaction_view import TransactionNeo4jView, TransactionBulkNeo4jView
 from .neo4j_views.user_view import UserNeo4jView
+from .neo4j_views.stats_view import Neo4jPoolStatsView, Neo4jQueryStatsView
+from .neo4j_views.async_views import (
+    AsyncCharacterNeo4jView, AsyncItemNeo4jView, AsyncSkillNeo4jView, AsyncQuestNeo4jView,
+    AsyncGuildNeo4jView, AsyncNPCNeo4jView, AsyncBattleNeo4jView, AsyncTransactionNeo4jView,
+    AsyncUserNeo4jView,
+)
 
 
 
@@ -49,6 +56,8 @@ router.register(r'guilds', GuildViewSet, basename='guild')
 router.register(r'items', ItemViewSet, basename='item')
 router.register(r'inventories', InventoryViewSet, basename='inventory')
 router.register(r'npcs', NPCViewSet, basename='npc')
+# quest actions first: quests/complete/ would otherwise match quests/<pk>/
+router.register(r'quests', QuestActionViewSet, basename='quest-action')
 router.register(r'quests', QuestViewSet, basename='quest')
 router.register(r'skills', SkillViewSet, basename='skill')
 router.register(r'battles', BattleViewSet, basename='battle')
@@ -62,25 +71,33 @@ urlpatterns = [
     # MongoDB CRUD endpoints
     path("mongodb/characters/", MongoCharacterList.as_view(), name="mongo-character-list"),
     path("mongodb/characters/<int:char_id>/", MongoCharacterDetail.as_view(), name="mongo-character-details"),
+    path("mongodb/characters/bulk/", MongoCharacterBulk.as_view(), name="mongo-character-bulk"),
     path("mongodb/characters/filter/", MongoCharacterFilter.as_view(), name="mongo-character-filter"),
+    path("mongodb/characters/search/", MongoCharacterSearch.as_view(), name="mongo-character-search"),
 
     path("mongodb/items/", MongoItemList.as_view(), name="mongo-item-list"),
     path("mongodb/items/<int:item_id>/", MongoItemDetail.as_view(), name="mongo-item-detail"),
+    path("mongodb/items/bulk/", MongoItemBulk.as_view(), name="mongo-item-bulk"),
 
     path("mongodb/skills/", MongoSkillList.as_view(), name="mongo-skill-list"),
     path("mongodb/skills/<int:skill_id>/", MongoSkillDetail.as_view(), name="mongo-skill-detail"),
+    path("mongodb/skills/bulk/", MongoSkillBulk.as_view(), name="mongo-skill-bulk"),
     
     path("mongodb/quests/", MongoQuestList.as_view(), name="mongo-quest-list"),
     path("mongodb/quests/<int:quest_id>/", MongoQuestDetail.as_view(), name="mongo-quest-detail"),
+    path("mongodb/quests/bulk/", MongoQuestBulk.as_view(), name="mongo-quest-bulk"),
     
     path("mongodb/npcs/", MongoNPCList.as_view(), name="mongo-npc-list"),
     path("mongodb/npcs/<int:npc_id>/", MongoNPCDetail.as_view(), name="mongo-npc-detail"),
+    path("mongodb/npcs/bulk/", MongoNPCBulk.as_view(), name="mongo-npc-bulk"),
     
     path("mongodb/guilds/", MongoGuildList.as_view(), name="mongo-guild-list"),
     path("mongodb/guilds/<int:guild_id>/", MongoGuildDetail.as_view(), name="mongo-guild-detail"),
+    path("mongodb/guilds/bulk/", MongoGuildBulk.as_view(), name="mongo-guild-bulk"),
     
     path("mongodb/inventory/", MongoInventoryList.as_view(), name="mongo-inventory-list"),
     path("mongodb/inventory/<int:inv_id>/", MongoInventoryDetail.as_view(), name="mongo-inventory-detail"),
+    path("mongodb/inventory/bulk/", MongoInventoryBulk.as_view(), name="mongo-inventory-bulk"),
     # embedded item management
     path("mongodb/inventory/", MongoInventoryList.as_view()),
     path("mongodb/inventory/<int:inv_id>/", MongoInventoryDetail.as_view()),
@@ -88,43 +105,83 @@ urlpatterns = [
     path("mongodb/inventory/<int:inv_id>/update-item/<int:item_id>/", MongoInventoryUpdateItem.as_view()),
     path("mongodb/inventory/<int:inv_id>/remove-item/<int:item_id>/", MongoInventoryRemoveItem.as_view()),
     path("mongodb/inventory/filter/", MongoFilterInventory.as_view()),
+    path("mongodb/inventory/batch-items/", MongoInventoryBatchItems.as_view(), name="mongo-inventory-batch-items"),
 
     path("mongodb/transactions/", MongoTransactionList.as_view(), name="mongo-transaction-list"),
     path("mongodb/transactions/<int:transaction_id>/", MongoTransactionDetail.as_view(), name="mongo-transaction-detail"),
+    path("mongodb/transactions/bulk/", MongoTransactionBulk.as_view(), name="mongo-transaction-bulk"),
     
     path("mongodb/battles/", MongoBattleList.as_view(), name="mongo-battle-list"),
     path("mongodb/battles/<int:battle_id>/", MongoBattleDetail.as_view(), name="mongo-battle-detail"),
+    path("mongodb/battles/bulk/", MongoBattleBulk.as_view(), name="mongo-battle-bulk"),
 
     path("mongodb/users/", MongoUserList.as_view(), name="mongo-user-list"),
     path("mongodb/users/<int:user_id>/", MongoUserDetail.as_view(), name="mongo-user-detail"),
     path("mongodb/users/filter/", MongoUserFilter.as_view(), name="mongo-user-filter"),
+    path("mongodb/users/search/", MongoUserSearch.as_view(), name="mongo-user-search"),
+
+    path("mongodb/analytics/inventory-value/", MongoInventoryValue.as_view(), name="mongo-analytics-inventory-value"),
+    path("mongodb/analytics/leaderboard/", MongoLeaderboard.as_view(), name="mongo-analytics-leaderboard"),
+    path("mongodb/analytics/guilds/", MongoGuildStats.as_view(), name="mongo-analytics-guilds"),
+    path("mongodb/analytics/battle-win-rates/", MongoBattleWinRates.as_view(), name="mongo-analytics-battle-win-rates"),
 
     # Neo4j CRUD endpoints
     path("neo4j/characters/", CharacterNeo4jView.as_view(), name="neo4j-character-list"),
     path("neo4j/characters/<int:char_id>/", CharacterNeo4jView.as_view(), name="neo4j-character-detail"),
+    path("neo4j/characters/bulk/", CharacterBulkNeo4jView.as_view(), name="neo4j-character-bulk"),
 
     path("neo4j/items/", ItemNeo4jView.as_view(), name="neo4j-item-list"),
     path("neo4j/items/<int:item_id>/", ItemNeo4jView.as_view(), name="neo4j-item-detail"),
+    path("neo4j/items/bulk/", ItemBulkNeo4jView.as_view(), name="neo4j-item-bulk"),
 
     path("neo4j/skills/", SkillNeo4jView.as_view(), name="neo4j-skill-list"),
     path("neo4j/skills/<int:skill_id>/", SkillNeo4jView.as_view(), name="neo4j-skill-detail"),
+    path("neo4j/skills/bulk/", SkillBulkNeo4jView.as_view(), name="neo4j-skill-bulk"),
 
     path("neo4j/quests/", QuestNeo4jView.as_view(), name="neo4j-quest-list"),
     path("neo4j/quests/<int:quest_id>/", QuestNeo4jView.as_view(), name="neo4j-quest-detail"),
+    path("neo4j/quests/bulk/", QuestBulkNeo4jView.as_view(), name="neo4j-quest-bulk"),
 
     path("neo4j/guilds/", GuildNeo4jView.as_view(), name="neo4j-guild-list"),
     path("neo4j/guilds/<int:guild_id>/", GuildNeo4jView.as_view(), name="neo4j-guild-detail"),
+    path("neo4j/guilds/bulk/", GuildBulkNeo4jView.as_view(), name="neo4j-guild-bulk"),
 
     path("neo4j/npcs/", NPCNeo4jView.as_view(), name="neo4j-npc-list"),
     path("neo4j/npcs/<int:npc_id>/", NPCNeo4jView.as_view(), name="neo4j-npc-detail"),
+    path("neo4j/npcs/bulk/", NPCBulkNeo4jView.as_view(), name="neo4j-npc-bulk"),
 
     path("neo4j/battles/", BattleNeo4jView.as_view(), name="neo4j-battle-list"),
     path("neo4j/battles/<int:battle_id>/", BattleNeo4jView.as_view(), name="neo4j-battle-detail"),
+    path("neo4j/battles/bulk/", BattleBulkNeo4jView.as_view(), name="neo4j-battle-bulk"),
 
     path("neo4j/transactions/", TransactionNeo4jView.as_view(), name="neo4j-transaction-list"),
     path("neo4j/transactions/<int:transaction_id>/", TransactionNeo4jView.as_view(), name="neo4j-transaction-detail"),
+    path("neo4j/transactions/bulk/", TransactionBulkNeo4jView.as_view(), name="neo4j-transaction-bulk"),
 
     path("neo4j/users/", UserNeo4jView.as_view(), name="neo4j-user-list"),
     path("neo4j/users/<int:user_id>/", UserNeo4jView.as_view(), name="neo4j-user-detail"),
 
+    path("neo4j/stats/pool/", Neo4jPoolStatsView.as_view(), name="neo4j-pool-stats"),
+    path("neo4j/stats/queries/", Neo4jQueryStatsView.as_view(), name="neo4j-query-stats"),
+
+    # Async Neo4j endpoints (run under the ASGI server)
+    path("neo4j/async/characters/", AsyncCharacterNeo4jView.as_view(), name="neo4j-async-character-list"),
+    path("neo4j/async/characters/<int:pk>/", AsyncCharacterNeo4jView.as_view(), name="neo4j-async-character-detail"),
+    path("neo4j/async/items/", AsyncItemNeo4jView.as_view(), name="neo4j-async-item-list"),
+    path("neo4j/async/items/<int:pk>/", AsyncItemNeo4jView.as_view(), name="neo4j-async-item-detail"),
+    path("neo4j/async/skills/", AsyncSkillNeo4jView.as_view(), name="neo4j-async-skill-list"),
+    path("neo4j/async/skills/<int:pk>/", AsyncSkillNeo4jView.as_view(), name="neo4j-async-skill-detail"),
+    path("neo4j/async/quests/", AsyncQuestNeo4jView.as_view(), name="neo4j-async-quest-list"),
+    path("neo4j/async/quests/<int:pk>/", AsyncQuestNeo4jView.as_view(), name="neo4j-async-quest-detail"),
+    path("neo4j/async/guilds/", AsyncGuildNeo4jView.as_view(), name="neo4j-async-guild-list"),
+    path("neo4j/async/guilds/<int:pk>/", AsyncGuildNeo4jView.as_view(), name="neo4j-async-guild-detail"),
+    path("neo4j/async/npcs/", AsyncNPCNeo4jView.as_view(), name="neo4j-async-npc-list"),
+    path("neo4j/async/npcs/<int:pk>/", AsyncNPCNeo4jView.as_view(), name="neo4j-async-npc-detail"),
+    path("neo4j/async/battles/", AsyncBattleNeo4jView.as_view(), name="neo4j-async-battle-list"),
+    path("neo4j/async/battles/<int:pk>/", AsyncBattleNeo4jView.as_view(), name="neo4j-async-battle-detail"),
+    path("neo4j/async/transactions/", AsyncTransactionNeo4jView.as_view(), name="neo4j-async-transaction-list"),
+    path("neo4j/async/transactions/<int:pk>/", AsyncTransactionNeo4jView.as_view(), name="neo4j-async-transaction-detail"),
+    path("neo4j/async/users/", AsyncUserNeo4jView.as_view(), name="neo4j-async-user-list"),
+    path("neo4j/async/users/<int:pk>/", AsyncUserNeo4jView.as_view(), name="neo4j-async-user-detail"),
+
 ]
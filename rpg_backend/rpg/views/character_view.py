@@ -1,6 +1,7 @@
+from django.db.models import Prefetch
 from rest_framework import viewsets
 from rest_framework.permissions import IsAuthenticated
-from ..models import Character
+from ..models import Character, Quest
 from ..serializers.character_serializer import CharacterSerializer
 from ..permissions import IsOwner
 
@@ -10,4 +11,14 @@ class CharacterViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated, IsOwner]
 
     def get_queryset(self):
-        return Character.objects.filter(user=self.request.user)
+        # user / guild joined, skills, quests (with their npc) and battles
+        # in one query each, however many characters are serialized
+        return (
+            Character.objects.filter(user=self.request.user)
+            .select_related("user", "guild")
+            .prefetch_related(
+                "skills",
+                Prefetch("quests", queryset=Quest.objects.select_related("npc")),
+                "battles",
+            )
+        )
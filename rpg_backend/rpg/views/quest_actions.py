@@ -8,12 +8,30 @@ from rpg_backend.rpg.models.skill import Skill
 from rpg_backend.rpg.models.inventory import Inventory
 from rpg_backend.rpg.serializers.quest_serializer import QuestSerializer
 
-from django.db import connection
+from rpg_backend.rpg.quest_progress import COMPLETED, MAX_BATCH, complete_quests
 
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
 
 
+CompletionBatchSchema = openapi.Schema(
+    type=openapi.TYPE_OBJECT,
+    required=["completions"],
+    properties={
+        "completions": openapi.Schema(
+            type=openapi.TYPE_ARRAY,
+            items=openapi.Schema(
+                type=openapi.TYPE_OBJECT,
+                properties={
+                    "character": openapi.Schema(type=openapi.TYPE_INTEGER),
+                    "quest": openapi.Schema(type=openapi.TYPE_INTEGER),
+                },
+            ),
+        ),
+    },
+)
+
+
 class QuestActionViewSet(viewsets.ViewSet):
     permission_classes = [permissions.IsAuthenticated]
 
@@ -62,7 +80,7 @@ class QuestActionViewSet(viewsets.ViewSet):
 
     @swagger_auto_schema(
     operation_summary="Complete a quest",
-    operation_description="Grants gold, XP, and handles level-up logic.",
+    operation_description="Grants gold, XP, and handles level-up logic in one transaction.",
     tags=["Quests"],
     responses={200: "Quest completed", 400: "Quest not active"}
     )
@@ -79,36 +97,66 @@ class QuestActionViewSet(viewsets.ViewSet):
 
         character = Character.objects.get(user=user)
 
-        # Check if user has started quest
-        if not character.quests.filter(pk=quest_id).exists():
+        # Locks the character, removes the quest and applies the rewards atomically
+        results, rewarded = complete_quests(user, [(character.pk, quest.pk)])
+        result = results[0]
+
+        if result["status"] != COMPLETED:
             return Response({"error": "Quest not active"}, status=400)
 
-        # Remove from active quests
-        character.quests.remove(quest)
+        progress = rewarded[character.pk]
 
-        # Apply rewards
-        gold_before = character.gold
-        xp_before = character.xp
+        return Response(
+            {
+                "message": "Quest completed",
+                "quest_id": quest_id,
+                "gold_gained": result["gold_gained"],
+                "xp_gained": result["xp_gained"],
+                "level_up": progress["levels_gained"] > 0,
+                "level": progress["level"],
+                "xp": progress["xp"],
+            },
+            status=200,
+        )
 
-        character.gold += quest.reward_money or 0
-        character.xp += quest.reward_xp or 0
+    # -----------------------------
+    # COMPLETE QUESTS (BATCH)
+    # -----------------------------
+    @swagger_auto_schema(
+    method="post",
+    operation_summary="Complete many quests",
+    operation_description=(
+        "Completes (character, quest) pairs of your characters in one transaction. "
+        "Each pair reports completed, not_active or character_not_found; "
+        f"at most {MAX_BATCH} pairs per request."
+    ),
+    tags=["Quests"],
+    request_body=CompletionBatchSchema,
+    responses={200: "Per-pair results and the rewarded characters", 400: "Invalid body"}
+    )
+    @action(detail=False, methods=["post"], url_path="complete")
+
+    def complete_batch(self, request):
+        completions = request.data.get("completions") if isinstance(request.data, dict) else None
 
-        # Level-up logic
-        level_up = False
-        while character.xp >= 100:
-            character.level += 1
-            character.xp -= 100
-            level_up = True
+        if not isinstance(completions, list) or not completions:
+            return Response({"error": "completions must be a non-empty list"}, status=400)
 
-        character.save()
+        if len(completions) > MAX_BATCH:
+            return Response({"error": f"At most {MAX_BATCH} completions per request"}, status=400)
+
+        try:
+            pairs = [(int(pair["character"]), int(pair["quest"])) for pair in completions]
+        except (TypeError, KeyError, ValueError):
+            return Response({"error": "Each completion needs integer character and quest"}, status=400)
+
+        results, rewarded = complete_quests(request.user, pairs)
 
         return Response(
             {
-                "message": "Quest completed",
-                "quest_id": quest_id,
-                "gold_gained": (quest.reward_money or 0),
-                "xp_gained": (quest.reward_xp or 0),
-                "level_up": level_up,
+                "completed": sum(result["status"] == COMPLETED for result in results),
+                "results": results,
+                "characters": rewarded,
             },
             status=200,
         )
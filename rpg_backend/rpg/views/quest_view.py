@@ -3,5 +3,6 @@ from ..models.quest import Quest
 from ..serializers.quest_serializer import QuestSerializer
 
 class QuestViewSet(viewsets.ModelViewSet):
-    queryset = Quest.objects.all()
+    # QuestSerializer reads npc.name
+    queryset = Quest.objects.select_related("npc")
     serializer_class = QuestSerializer
@@ -1,7 +1,90 @@
-from rest_framework import viewsets
+from rest_framework import viewsets, status
+from rest_framework.decorators import action
+from rest_framework.response import Response
+from drf_yasg.utils import swagger_auto_schema
+from drf_yasg import openapi
+
 from ..models.transaction import Transaction
 from ..serializers.transaction_serializer import TransactionSerializer
+from .. import purchases
+from ..purchases import MAX_CART, PurchaseError, parse_cart
+
+
+CartLineSchema = openapi.Schema(
+    type=openapi.TYPE_OBJECT,
+    required=["item"],
+    properties={
+        "item": openapi.Schema(type=openapi.TYPE_INTEGER),
+        "quantity": openapi.Schema(type=openapi.TYPE_INTEGER, default=1),
+    },
+)
+
+CharacterProperty = openapi.Schema(
+    type=openapi.TYPE_INTEGER, description="Buying character (default: your first character)"
+)
+
+PurchaseResponses = {
+    200: "Gold left, total cost and the inventory quantities",
+    400: "Invalid body, item not for sale or not enough gold",
+    404: "Character or item not found",
+}
+
+
+class TransactionViewSet(viewsets.ReadOnlyModelViewSet):
+    # Read-only: transactions are only written by purchase / cart, together
+    # with the gold and inventory changes they record.
+    # TransactionSerializer nests the user
+    queryset = Transaction.objects.select_related("user")
+    serializer_class = TransactionSerializer
+
+    def checkout(self, request, lines):
+        """Run a purchase, mapping PurchaseError onto an error response"""
+        character = request.data.get("character")
+        try:
+            character = int(character) if character is not None else None
+        except (TypeError, ValueError):
+            return Response({"error": "character must be an integer"}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            result = purchases.purchase(request.user, parse_cart(lines), character)
+        except PurchaseError as e:
+            return Response({"error": e.message}, status=e.status)
+
+        return Response(result, status=status.HTTP_200_OK)
+
+    @swagger_auto_schema(
+        method="post",
+        operation_summary="Buy an item",
+        operation_description="Pays item value x quantity in gold, logs a transaction and adds the item to the inventory, atomically.",
+        request_body=openapi.Schema(
+            type=openapi.TYPE_OBJECT,
+            required=["item"],
+            properties={**CartLineSchema.properties, "character": CharacterProperty},
+        ),
+        responses=PurchaseResponses,
+    )
+    @action(detail=False, methods=["post"])
+    def purchase(self, request):
+        if not isinstance(request.data, dict):
+            return Response({"error": "Expected a JSON object"}, status=status.HTTP_400_BAD_REQUEST)
+        return self.checkout(request, [request.data])
 
-class TransactionViewSet(viewsets.ModelViewSet):
-    queryset = Transaction.objects.all()
-    serializer_class = TransactionSerializer
\ No newline at end of file
+    @swagger_auto_schema(
+        method="post",
+        operation_summary="Check out a cart",
+        operation_description=f"Buys every line (at most {MAX_CART} different items) in one transaction, or none if the character cannot afford them all.",
+        request_body=openapi.Schema(
+            type=openapi.TYPE_OBJECT,
+            required=["items"],
+            properties={
+                "items": openapi.Schema(type=openapi.TYPE_ARRAY, items=CartLineSchema),
+                "character": CharacterProperty,
+            },
+        ),
+        responses=PurchaseResponses,
+    )
+    @action(detail=False, methods=["post"])
+    def cart(self, request):
+        if not isinstance(request.data, dict):
+            return Response({"error": "Expected a JSON object"}, status=status.HTTP_400_BAD_REQUEST)
+        return self.checkout(request, request.data.get("items"))
@@ -63,8 +63,14 @@ REST_FRAMEWORK = {
         "rest_framework.authentication.TokenAuthentication",
         "rest_framework_simplejwt.authentication.JWTAuthentication",
     ],
+    # keyset pages on the primary key for every ModelViewSet, see rpg/pagination.py
+    "DEFAULT_PAGINATION_CLASS": "rpg_backend.rpg.pagination.KeysetPagination",
+    "PAGE_SIZE": int(os.getenv('API_PAGE_SIZE', 100)),
 }
 
+# Largest ?limit= a client may ask the SQL list endpoints for
+API_MAX_PAGE_SIZE = int(os.getenv('API_MAX_PAGE_SIZE', 1000))
+
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=30),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=1),
@@ -104,6 +110,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'rpg_backend.rpg.neo4j_metrics.Neo4jQueryEndpointMiddleware',
 ]
 
 ROOT_URLCONF = 'rpg_backend.urls'
@@ -129,6 +136,19 @@ WSGI_APPLICATION = 'rpg_backend.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# Connection reuse:
+#   MYSQL_CONN_MAX_AGE        seconds a connection is kept across requests
+#                             (0 = new connection per request, "none" = no limit)
+#   MYSQL_CONN_HEALTH_CHECKS  '1' pings a reused connection before a request uses it
+#   MYSQL_POOL_SIZE           > 0 takes connections from a mysql.connector pool of
+#                             that size per worker process (max 32). Connections
+#                             then go back to the pool after every request
+#                             (CONN_MAX_AGE is forced to 0), and a worker must not
+#                             run more threads than the pool holds: an empty pool
+#                             raises PoolError instead of waiting.
+MYSQL_CONN_MAX_AGE = os.getenv('MYSQL_CONN_MAX_AGE', '60')
+MYSQL_POOL_SIZE = int(os.getenv('MYSQL_POOL_SIZE', 0))
+
 DATABASES = {
     'default': {
         'ENGINE': 'mysql.connector.django',
@@ -137,13 +157,66 @@ DATABASES = {
         'PASSWORD': os.getenv('MYSQL_PASSWORD'),
         'HOST': os.getenv('MYSQL_HOST'),
         'PORT': os.getenv('MYSQL_PORT'),
+        'CONN_MAX_AGE': None if MYSQL_CONN_MAX_AGE.lower() == 'none' else int(MYSQL_CONN_MAX_AGE),
+        'CONN_HEALTH_CHECKS': os.getenv('MYSQL_CONN_HEALTH_CHECKS', '1') == '1',
         'OPTIONS': {
             'charset': 'utf8mb4',
         }
     }
 }
 
-print("ENV DEBUG:", os.getenv('MYSQL_HOST'), os.getenv('MYSQL_PASSWORD'))
+if MYSQL_POOL_SIZE > 0:
+    # a persistent connection would keep its pool slot across requests
+    DATABASES['default']['CONN_MAX_AGE'] = 0
+    DATABASES['default']['OPTIONS'].update({
+        'pool_name': os.getenv('MYSQL_POOL_NAME', 'rpg'),
+        'pool_size': MYSQL_POOL_SIZE,
+        # pooled connections come back with a clean session
+        'pool_reset_session': True,
+    })
+
+# Neo4j
+# One pooled driver per process, shared by neo4j_views and migrate_to_neo4j
+
+NEO4J = {
+    'URI': os.getenv('NEO4J_URI', 'bolt://localhost:7687'),
+    'USER': os.getenv('NEO4J_USER', 'neo4j'),
+    'PASSWORD': os.getenv('NEO4J_PASSWORD', 'password'),
+    'DATABASE': os.getenv('NEO4J_DATABASE') or None,
+    'MAX_CONNECTION_POOL_SIZE': int(os.getenv('NEO4J_MAX_POOL_SIZE', 100)),
+    'CONNECTION_ACQUISITION_TIMEOUT': float(os.getenv('NEO4J_ACQUISITION_TIMEOUT', 60)),
+    'MAX_CONNECTION_LIFETIME': float(os.getenv('NEO4J_MAX_CONNECTION_LIFETIME', 3600)),
+    # ids reserved per label per process; 1 = allocate inside each create transaction
+    'ID_BLOCK_SIZE': int(os.getenv('NEO4J_ID_BLOCK_SIZE', 1)),
+    # how often a worker re-reads a counter's epoch to drop blocks a sync retired
+    'ID_EPOCH_CHECK_SECONDS': float(os.getenv('NEO4J_ID_EPOCH_CHECK_SECONDS', 5)),
+    # queries whose server time (available + consumed) reaches this are logged
+    'SLOW_QUERY_MS': int(os.getenv('NEO4J_SLOW_QUERY_MS', 500)),
+    # PROFILE every query to collect db hits (adds overhead, keep off in production)
+    'PROFILE_QUERIES': os.getenv('NEO4J_PROFILE_QUERIES', '0') == '1',
+}
+
+MONGO = {
+    'URI': os.getenv('MONGO_URI', 'mongodb://localhost:27017/'),
+    'DATABASE': os.getenv('MONGO_DATABASE', 'rpg_mongo'),
+    'MAX_POOL_SIZE': int(os.getenv('MONGO_MAX_POOL_SIZE', 100)),
+    'MIN_POOL_SIZE': int(os.getenv('MONGO_MIN_POOL_SIZE', 0)),
+    'MAX_IDLE_TIME_MS': int(os.getenv('MONGO_MAX_IDLE_TIME_MS', 0)) or None,
+    'SERVER_SELECTION_TIMEOUT_MS': int(os.getenv('MONGO_SERVER_SELECTION_TIMEOUT_MS', 5000)),
+    'CONNECT_TIMEOUT_MS': int(os.getenv('MONGO_CONNECT_TIMEOUT_MS', 5000)),
+    'SOCKET_TIMEOUT_MS': int(os.getenv('MONGO_SOCKET_TIMEOUT_MS', 0)) or None,
+    'WAIT_QUEUE_TIMEOUT_MS': int(os.getenv('MONGO_WAIT_QUEUE_TIMEOUT_MS', 0)) or None,
+    # comma separated wire compressors, e.g. "zstd,zlib" (zstd/snappy need extra packages)
+    'COMPRESSORS': os.getenv('MONGO_COMPRESSORS', ''),
+    # ids reserved per collection per process; 1 = one atomic $inc per insert
+    'ID_BLOCK_SIZE': int(os.getenv('MONGO_ID_BLOCK_SIZE', 1)),
+    # how often a worker re-reads a counter's epoch to drop blocks a sync retired
+    'ID_EPOCH_CHECK_SECONDS': float(os.getenv('MONGO_ID_EPOCH_CHECK_SECONDS', 5)),
+    # seconds analytics results stay in the Django cache; 0 = always aggregate
+    'ANALYTICS_CACHE_SECONDS': int(os.getenv('MONGO_ANALYTICS_CACHE_SECONDS', 60)),
+    # embed guild / skill / quest summaries in character documents (see mongo_read_model)
+    'CHARACTER_READ_MODEL': os.getenv('MONGO_CHARACTER_READ_MODEL', '1') == '1',
+}
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -51,47 +51,106 @@ DELIMITER ;
 
 
 -- Procedure 3 - Safe Purchase Transaction
+-- Same rules and lock order as the purchase API (rpg/purchases.py): the
+-- buyer's character is locked first, then its inventory rows for the item.
+-- The price is the item's value; item quantities live in rpg_inventoryitem,
+-- and when an item has several rows the one with the lowest id is topped up.
 DELIMITER $$
 
 CREATE PROCEDURE sp_purchase_item(
     IN p_user_id INT,
     IN p_item_id BIGINT,
-    IN p_quantity INT,
-    IN p_cost_per_item INT
+    IN p_quantity INT
 )
 BEGIN
-    DECLARE total_cost INT;
-    DECLARE user_gold INT;
+    DECLARE v_character_id BIGINT;
+    DECLARE v_gold INT;
+    DECLARE v_price INT;
+    DECLARE v_total_cost BIGINT;
+    DECLARE v_inventory_id BIGINT;
+    DECLARE v_row_id BIGINT;
+
+    DECLARE EXIT HANDLER FOR SQLEXCEPTION
+    BEGIN
+        ROLLBACK;
+        RESIGNAL;
+    END;
+
+    IF p_quantity IS NULL OR p_quantity < 1 THEN
+        SIGNAL SQLSTATE '45000'
+        SET MESSAGE_TEXT = 'Quantity must be positive.';
+    END IF;
 
-    SET total_cost = p_quantity * p_cost_per_item;
+    START TRANSACTION;
 
-    -- 1. Get user gold
-    SELECT gold INTO user_gold
+    -- 1. Lock the buyer's (first) character
+    SELECT id, gold INTO v_character_id, v_gold
     FROM rpg_character
     WHERE user_id = p_user_id
-    LIMIT 1;
+    ORDER BY id
+    LIMIT 1
+    FOR UPDATE;
+
+    IF v_character_id IS NULL THEN
+        SIGNAL SQLSTATE '45000'
+        SET MESSAGE_TEXT = 'Character not found.';
+    END IF;
+
+    -- 2. Price the item
+    SELECT value INTO v_price
+    FROM rpg_item
+    WHERE id = p_item_id;
+
+    IF v_price IS NULL THEN
+        SIGNAL SQLSTATE '45000'
+        SET MESSAGE_TEXT = 'Item not found or not for sale.';
+    END IF;
+
+    -- 3. Check if enough gold
+    SET v_total_cost = v_price * p_quantity;
 
-    -- 2. Check if enough gold
-    IF user_gold < total_cost THEN
+    IF v_gold < v_total_cost THEN
         SIGNAL SQLSTATE '45000'
         SET MESSAGE_TEXT = 'Not enough gold to complete purchase.';
     END IF;
 
-    -- 3. Deduct gold
-    UPDATE rpg_character
-    SET gold = gold - total_cost
-    WHERE user_id = p_user_id;
+    -- 4. The character's inventory, created when missing
+    SELECT MIN(id) INTO v_inventory_id
+    FROM rpg_inventory
+    WHERE character_id = v_character_id;
+
+    IF v_inventory_id IS NULL THEN
+        INSERT INTO rpg_inventory (character_id) VALUES (v_character_id);
+        SET v_inventory_id = LAST_INSERT_ID();
+    END IF;
+
+    -- 5. Lock the inventory rows holding the item
+    SELECT MIN(id) INTO v_row_id
+    FROM rpg_inventoryitem
+    WHERE inventory_id = v_inventory_id AND item_id = p_item_id
+    FOR UPDATE;
 
-    -- 4. Insert into transaction log
-    INSERT INTO rpg_transaction (user_id, quantity, cost)
-    VALUES (p_user_id, p_quantity, total_cost);
+    -- 6. Deduct gold and log the transaction
+    UPDATE rpg_character
+    SET gold = gold - v_total_cost
+    WHERE id = v_character_id;
+
+    INSERT INTO rpg_transaction (user_id, item_id, quantity, cost)
+    VALUES (p_user_id, p_item_id, p_quantity, v_total_cost);
+
+    -- 7. Add to inventory
+    IF v_row_id IS NULL THEN
+        INSERT INTO rpg_inventoryitem (inventory_id, item_id, quantity)
+        VALUES (v_inventory_id, p_item_id, p_quantity);
+    ELSE
+        UPDATE rpg_inventoryitem
+        SET quantity = quantity + p_quantity
+        WHERE id = v_row_id;
+    END IF;
 
-    -- 5. Add to inventory (character_id = user_id)
-    INSERT INTO rpg_inventory (character_id, item_id, quantity)
-    VALUES (p_user_id, p_item_id, p_quantity)
-    ON DUPLICATE KEY UPDATE quantity = quantity + p_quantity;
+    COMMIT;
 
-    -- 6. Return success message
+    -- 8. Return success message
     SELECT 'Purchase completed successfully.' AS message;
 
 END$$
@@ -7,7 +7,7 @@
 DELIMITER $$
 
 CREATE TRIGGER trg_inventory_prevent_negative
-BEFORE UPDATE ON rpg_inventory
+BEFORE UPDATE ON rpg_inventoryitem
 FOR EACH ROW
 BEGIN
     IF NEW.quantity < 0 THEN
@@ -20,40 +20,16 @@ DELIMITER ;
 
 
 
--- TRIGGER 2 — Update inventory after a transaction
+-- TRIGGERS 2 and 3 (removed)
+-- trg_transaction_adjust_inventory / trg_transaction_adjust_gold applied
+-- purchases on every rpg_transaction insert. Item quantities moved from
+-- rpg_inventory to rpg_inventoryitem, so the inventory trigger broke every
+-- insert, and the gold trigger never checked the balance. The purchase API
+-- (POST /api/transactions/purchase/ and /cart/, rpg/purchases.py) now
+-- deducts gold and upserts inventory in one transaction, so both go.
 
-DELIMITER $$
-
-CREATE TRIGGER trg_transaction_adjust_inventory
-AFTER INSERT ON rpg_transaction
-FOR EACH ROW
-BEGIN
-    INSERT INTO rpg_inventory (character_id, item_id, quantity)
-    VALUES (
-        (SELECT id FROM rpg_character WHERE user_id = NEW.user_id LIMIT 1),
-        NEW.item_id,
-        NEW.quantity
-    )
-    ON DUPLICATE KEY UPDATE quantity = quantity + NEW.quantity;
-END$$
-
-DELIMITER ;
-
-
--- TRIGGER 3 — Auto-update character gold
-
-DELIMITER $$
-
-CREATE TRIGGER trg_transaction_adjust_gold
-AFTER INSERT ON rpg_transaction
-FOR EACH ROW
-BEGIN
-    UPDATE rpg_character
-    SET gold = gold - NEW.cost
-    WHERE user_id = NEW.user_id;
-END$$
-
-DELIMITER ;
+DROP TRIGGER IF EXISTS trg_transaction_adjust_inventory;
+DROP TRIGGER IF EXISTS trg_transaction_adjust_gold;
 
 
 -- TRIGGER 4 — Auto set quest completion timestamp